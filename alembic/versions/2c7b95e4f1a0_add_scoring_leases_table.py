@@ -0,0 +1,31 @@
+"""add scoring leases table"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "2c7b95e4f1a0"
+down_revision = "8d3e61b0a4c2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scoring_leases",
+        sa.Column("text_item_id", sa.String(length=36), primary_key=True),
+        sa.Column("model_name", sa.String(length=128), primary_key=True),
+        sa.Column("model_version", sa.String(length=64), primary_key=True),
+        sa.Column("worker_id", sa.String(length=128), nullable=False),
+        sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("leased_until", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["text_item_id"], ["text_items.id"], ondelete="CASCADE"),
+    )
+    op.create_index("ix_scoring_leases_leased_until", "scoring_leases", ["leased_until"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_scoring_leases_leased_until", table_name="scoring_leases")
+    op.drop_table("scoring_leases")
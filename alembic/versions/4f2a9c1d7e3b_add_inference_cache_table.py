@@ -0,0 +1,27 @@
+"""add inference cache table"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "4f2a9c1d7e3b"
+down_revision = "cf8f3a6ad3b6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inference_cache",
+        sa.Column("text_hash", sa.String(length=64), primary_key=True),
+        sa.Column("model_name", sa.String(length=128), primary_key=True),
+        sa.Column("model_version", sa.String(length=64), primary_key=True),
+        sa.Column("scores_by_label", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("inference_cache")
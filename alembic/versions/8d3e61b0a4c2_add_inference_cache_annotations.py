@@ -0,0 +1,20 @@
+"""add annotations to inference cache"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "8d3e61b0a4c2"
+down_revision = "4f2a9c1d7e3b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("inference_cache", sa.Column("annotations", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("inference_cache", "annotations")
@@ -0,0 +1,41 @@
+"""add evaluation runs"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "a6d94e2b7f10"
+down_revision = "f3a8d6b1c925"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "evaluation_runs",
+        sa.Column("id", sa.String(length=36), primary_key=True),
+        sa.Column("model_name", sa.String(length=128), nullable=False),
+        sa.Column("model_version", sa.String(length=64), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("items", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("reused", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("accuracy", sa.Float(), nullable=True),
+        sa.Column("macro_f1", sa.Float(), nullable=True),
+        sa.Column("labels", sa.JSON(), nullable=False),
+        sa.Column("per_class", sa.JSON(), nullable=False),
+        sa.Column("confusion", sa.JSON(), nullable=False),
+    )
+    op.create_index(
+        "ix_evaluation_runs_model_finished_at",
+        "evaluation_runs",
+        ["model_name", "model_version", "finished_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_evaluation_runs_model_finished_at", table_name="evaluation_runs")
+    op.drop_table("evaluation_runs")
@@ -0,0 +1,40 @@
+"""unique sentiment result per item and model"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "b91f4d2e6c83"
+down_revision = "2c7b95e4f1a0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # keep the most recent score for each item/model before enforcing uniqueness
+    op.execute(
+        """
+        DELETE FROM sentiment_results
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY text_item_id, model_name, model_version
+                    ORDER BY scored_at DESC, id
+                ) AS position
+                FROM sentiment_results
+            ) ranked
+            WHERE position > 1
+        )
+        """
+    )
+    with op.batch_alter_table("sentiment_results") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_sentiment_results_item_model",
+            ["text_item_id", "model_name", "model_version"],
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sentiment_results") as batch_op:
+        batch_op.drop_constraint("uq_sentiment_results_item_model", type_="unique")
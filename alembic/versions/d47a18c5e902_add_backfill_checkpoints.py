@@ -0,0 +1,35 @@
+"""add backfill checkpoints and keyset index"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d47a18c5e902"
+down_revision = "b91f4d2e6c83"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backfill_checkpoints",
+        sa.Column("model_name", sa.String(length=128), primary_key=True),
+        sa.Column("model_version", sa.String(length=64), primary_key=True),
+        sa.Column("cutoff", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("cursor_ingested_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("cursor_id", sa.String(length=36), nullable=True),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("scanned", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("scored", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_text_items_ingested_at_id", "text_items", ["ingested_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_text_items_ingested_at_id", table_name="text_items")
+    op.drop_table("backfill_checkpoints")
@@ -0,0 +1,33 @@
+"""add scoring attempts for poison-item quarantine"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e5c21f7a9b34"
+down_revision = "d47a18c5e902"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scoring_attempts",
+        sa.Column("text_item_id", sa.String(length=36), primary_key=True),
+        sa.Column("model_name", sa.String(length=128), primary_key=True),
+        sa.Column("model_version", sa.String(length=64), primary_key=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("first_failed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_failed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("quarantined_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["text_item_id"], ["text_items.id"], ondelete="CASCADE"),
+    )
+    op.create_index("ix_scoring_attempts_quarantined_at", "scoring_attempts", ["quarantined_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_scoring_attempts_quarantined_at", table_name="scoring_attempts")
+    op.drop_table("scoring_attempts")
@@ -0,0 +1,26 @@
+"""add scoring priority to text items and sources"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f3a8d6b1c925"
+down_revision = "e5c21f7a9b34"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("text_items", sa.Column("priority", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("sources", sa.Column("priority", sa.Integer(), nullable=False, server_default="0"))
+    op.create_index("ix_text_items_priority_ingested_at", "text_items", ["priority", "ingested_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_text_items_priority_ingested_at", table_name="text_items")
+    with op.batch_alter_table("sources") as batch_op:
+        batch_op.drop_column("priority")
+    with op.batch_alter_table("text_items") as batch_op:
+        batch_op.drop_column("priority")
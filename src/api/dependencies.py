@@ -8,8 +8,17 @@ from fastapi import Header, HTTPException, status
 from sqlalchemy.orm import Session
 
 from ingestion_service.db import SessionLocal, init_db
+from sentiment_service.cache import InferenceCache, predict_with_cache
 from sentiment_service.config import get_settings as get_sentiment_settings
+from sentiment_service.db import SessionLocal as SentimentSessionLocal
+from sentiment_service.hot_swap import swapper
 from sentiment_service.model import SentimentModel
+from sentiment_service.registry import get_model
+from sentiment_service.repository import SentimentRepository
+from sentiment_service.sidecar import InferenceClient
+from sentiment_service.worker import build_inference_cache
+
+from .services.micro_batcher import MicroBatcher
 
 
 def init_application_state() -> None:
@@ -37,11 +46,44 @@ def require_admin(role: str = Header("analyst", alias="X-Role")) -> str:
 
 
 @lru_cache
-def get_sentiment_model() -> SentimentModel:
+def get_sentiment_repository() -> SentimentRepository:
+    return SentimentRepository(SentimentSessionLocal)
+
+
+def get_sentiment_model() -> SentimentModel | InferenceClient:
+    """Model currently being served; looked up per request so hot swaps take effect immediately."""
+    settings = swapper.settings
+    if settings.inference_socket:
+        return get_inference_client()
+    return get_model(settings)
+
+
+def get_inference_client() -> InferenceClient:
+    """Client for the shared inference sidecar, so API workers do not each load the model."""
+    settings = swapper.settings
+    return _inference_client(settings.inference_socket, settings.model_name, settings.effective_model_version)
+
+
+@lru_cache(maxsize=2)
+def _inference_client(socket: str, model_name: str, model_version: str) -> InferenceClient:
+    return InferenceClient.from_settings(swapper.settings)
+
+
+def get_inference_cache() -> InferenceCache | None:
+    settings = swapper.settings
+    return _inference_cache(settings.model_name, settings.cache_version)
+
+
+@lru_cache(maxsize=2)
+def _inference_cache(model_name: str, cache_version: str) -> InferenceCache | None:
+    return build_inference_cache(swapper.settings, get_sentiment_repository())
+
+
+@lru_cache
+def get_micro_batcher() -> MicroBatcher:
     settings = get_sentiment_settings()
-    return SentimentModel(
-        model_name=settings.model_name,
-        revision=settings.model_revision,
-        device=settings.device,
-        label_mapping=settings.label_mapping,
+    return MicroBatcher(
+        lambda texts: predict_with_cache(get_sentiment_model(), texts, get_inference_cache()),
+        max_batch_size=settings.microbatch_max_size,
+        max_wait_ms=settings.microbatch_max_wait_ms,
     )
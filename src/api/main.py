@@ -2,16 +2,28 @@
 from __future__ import annotations
 
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from .dependencies import init_application_state
+from sentiment_service.hot_swap import swapper
+
+from .dependencies import get_micro_batcher, init_application_state
 from .routers import auth, branding, contents, reports, security, sentiment, sources, system
 from fastapi.middleware.cors import CORSMiddleware
 
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    batcher = get_micro_batcher()
+    await batcher.start()
+    swapper.follow()
+    yield
+    await batcher.stop()
+
+
 def create_app() -> FastAPI:
     init_application_state()
-    app = FastAPI(title="Sentiment Analysis API", version="1.0.0")
+    app = FastAPI(title="Sentiment Analysis API", version="1.0.0", lifespan=lifespan)
 
     cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
     cors_origins = [origin.strip() for origin in cors_origins if origin.strip()]
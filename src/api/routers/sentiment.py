@@ -1,32 +1,49 @@
 """Sentiment processing endpoints."""
 from __future__ import annotations
 
+import os
 from collections import Counter
 from datetime import datetime, timedelta
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from ingestion_service.orm import KeywordSentimentORM, SentimentResultORM, TextItemORM
+from sentiment_service.autotune import load_snapshot
+from sentiment_service.cache import predict_with_cache
 from sentiment_service.config import get_settings as get_sentiment_settings
+from sentiment_service.explain import ExplanationError, top_spans
+from sentiment_service.hot_swap import SwapInProgress, swapper
+from sentiment_service.profiling import load_profile, profiler
 
 from .. import schemas
-from ..dependencies import get_db, get_sentiment_model
+from ..dependencies import (
+    get_db,
+    get_inference_cache,
+    get_micro_batcher,
+    get_sentiment_model,
+    get_sentiment_repository,
+    require_admin,
+)
+from ..services.micro_batcher import MicroBatcher
 from ..services.keyword_analytics import refresh_keyword_stat, refresh_keyword_stats
-from ..services.sentiment_runner import run_sentiment_for_item, run_sentiment_worker
+from ..services.sentiment_runner import explain_item, get_worker, run_sentiment_for_item, run_sentiment_worker
 
 
 router = APIRouter(prefix="/sentiment", tags=["Sentiment"])
 
 
 @router.post("/analyze", response_model=schemas.SentimentAnalyzeResponse)
-def analyze_text(
+async def analyze_text(
     payload: schemas.SentimentAnalyzeRequest,
-    model=Depends(get_sentiment_model),
+    batcher: MicroBatcher = Depends(get_micro_batcher),
 ) -> schemas.SentimentAnalyzeResponse:
-    scores = model.predict(payload.text)
+    prediction = await batcher.submit(payload.text)
+    if not prediction.ok:
+        raise ValueError(prediction.error or "No scores returned")
+    scores = prediction.scores
     label = max(scores, key=scores.get)
     return schemas.SentimentAnalyzeResponse(
         sentiment=label,
@@ -36,6 +53,100 @@ def analyze_text(
     )
 
 
+@router.post("/analyze/batch", response_model=schemas.SentimentBatchAnalyzeResponse)
+def analyze_texts(
+    payload: schemas.SentimentBatchAnalyzeRequest,
+    model=Depends(get_sentiment_model),
+    cache=Depends(get_inference_cache),
+) -> schemas.SentimentBatchAnalyzeResponse:
+    results = []
+    for prediction in predict_with_cache(model, payload.texts, cache):
+        if not prediction.ok:
+            results.append(schemas.SentimentBatchAnalyzeItem(error=prediction.error or "No scores returned"))
+            continue
+        label = max(prediction.scores, key=prediction.scores.get)
+        results.append(
+            schemas.SentimentBatchAnalyzeItem(
+                sentiment=label,
+                score=prediction.scores[label],
+                scores_by_label=prediction.scores,
+            )
+        )
+    return schemas.SentimentBatchAnalyzeResponse(results=results, created_at=datetime.utcnow())
+
+
+@router.get("/microbatch", response_model=schemas.MicroBatchMetrics)
+def micro_batch_metrics(batcher: MicroBatcher = Depends(get_micro_batcher)) -> schemas.MicroBatchMetrics:
+    return schemas.MicroBatchMetrics(**batcher.metrics())
+
+
+@router.get("/autotune", response_model=schemas.AutotuneSnapshot)
+def autotune_snapshot() -> schemas.AutotuneSnapshot:
+    """Batch-size controller state, as last written by a worker or held by the API's own worker."""
+    settings = get_sentiment_settings()
+    if not settings.autotune_enabled:
+        return schemas.AutotuneSnapshot(enabled=False, batch_size=settings.batch_limit)
+    snapshot = load_snapshot(settings.autotune_state_path) if settings.autotune_state_path else None
+    if snapshot is None:
+        snapshot = get_worker().autotuner.snapshot()
+    return schemas.AutotuneSnapshot(enabled=True, **snapshot)
+
+
+@router.get("/profile", response_model=schemas.ScoringProfile)
+def scoring_profile(runs: int = 20) -> schemas.ScoringProfile:
+    """Per-stage timings of recent scoring runs, from the worker state file or this process."""
+    settings = get_sentiment_settings()
+    if not settings.profiling_enabled:
+        return schemas.ScoringProfile(enabled=False, source="disabled")
+    snapshot = load_profile(settings.profiling_state_path) if settings.profiling_state_path else None
+    source = "state_file"
+    if snapshot is None:
+        snapshot, source = profiler.snapshot(), "process"
+    snapshot["runs"] = snapshot.get("runs", [])[-runs:] if runs > 0 else []
+    return schemas.ScoringProfile(enabled=True, source=source, totals=snapshot.get("totals", {}), runs=snapshot["runs"])
+
+
+@router.get("/cache", response_model=schemas.InferenceCacheStats)
+def inference_cache_stats(cache=Depends(get_inference_cache)) -> schemas.InferenceCacheStats:
+    if cache is None:
+        settings = swapper.settings
+        return schemas.InferenceCacheStats(
+            enabled=False,
+            model_name=settings.model_name,
+            model_version=settings.effective_model_version,
+        )
+    return schemas.InferenceCacheStats(enabled=True, **cache.stats())
+
+
+@router.get("/model", response_model=schemas.ModelSwapStatus)
+def model_status() -> schemas.ModelSwapStatus:
+    """The model being served and the state of the last hot swap."""
+    return schemas.ModelSwapStatus(**swapper.status())
+
+
+@router.post("/model", response_model=schemas.ModelSwapStatus, status_code=status.HTTP_202_ACCEPTED)
+def swap_model(payload: schemas.ModelSwapRequest, _: str = Depends(require_admin)) -> schemas.ModelSwapStatus:
+    """Load and warm another model in the background, then swap it in; poll ``GET /model``."""
+    current = swapper.settings
+    changes = payload.model_dump(exclude_none=True)
+    moved = any(changes.get(key, getattr(current, key)) != getattr(current, key) for key in ("model_name", "model_revision"))
+    if moved and "model_version" not in changes:
+        # a pinned version label belongs to the old model; fall back to the derived one
+        changes["model_version"] = None
+    if not changes:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nothing to swap")
+    if current.swap_state_path is None and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        # without the state file only the process answering this request would swap
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Hot swaps need SENTIMENT_SWAP_STATE_PATH when the API runs several worker processes",
+        )
+    try:
+        return schemas.ModelSwapStatus(**swapper.publish(changes))
+    except SwapInProgress as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+
+
 @router.get("/stats", response_model=schemas.SentimentStatsResponse)
 def sentiment_stats(session: Session = Depends(get_db)) -> schemas.SentimentStatsResponse:
     stmt = select(SentimentResultORM.label, func.count(SentimentResultORM.id)).group_by(SentimentResultORM.label)
@@ -108,12 +219,25 @@ def retrain_model(payload: schemas.RetrainRequest) -> schemas.RetrainResponse:
 
 @router.get("/accuracy", response_model=schemas.SentimentAccuracyResponse)
 def sentiment_accuracy() -> schemas.SentimentAccuracyResponse:
-    settings = get_sentiment_settings()
+    """Latest stored evaluation of the served model; run ``python -m sentiment_service.evaluation`` to refresh it."""
+    settings = swapper.settings
+    model_version = settings.effective_model_version
+    run = get_sentiment_repository().latest_evaluation(settings.model_name, model_version)
+    if run is None:
+        return schemas.SentimentAccuracyResponse(model_name=settings.model_name, model_version=model_version)
     return schemas.SentimentAccuracyResponse(
-        model_name=settings.model_name,
-        model_version=settings.model_version or settings.model_revision or "latest",
-        accuracy=0.86,
-        evaluated_at=datetime.utcnow(),
+        model_name=run.model_name,
+        model_version=run.model_version,
+        accuracy=run.accuracy,
+        evaluated_at=run.finished_at,
+        run_id=run.id,
+        items=run.items,
+        reused=run.reused,
+        failed=run.failed,
+        macro_f1=run.macro_f1,
+        labels=run.labels,
+        per_class=run.per_class,
+        confusion=run.confusion,
     )
 
 
@@ -123,9 +247,72 @@ def run_sentiment(batch_limit: int | None = None) -> dict:
     return {"status": "completed", "processed": len(results), "results": results}
 
 
+@router.get("/quarantine", response_model=schemas.QuarantineList)
+def list_quarantine(
+    model_name: str | None = None,
+    model_version: str | None = None,
+    limit: int = 100,
+    offset: int = 0,
+    _: str = Depends(require_admin),
+) -> schemas.QuarantineList:
+    """Items the worker stopped retrying after ``max_scoring_attempts`` failures (defaults to the served model)."""
+    model_name = model_name or swapper.settings.model_name
+    model_version = model_version or swapper.settings.effective_model_version
+    total, attempts = get_sentiment_repository().quarantined_items(model_name, model_version, limit=limit, offset=offset)
+    return schemas.QuarantineList(
+        model_name=model_name,
+        model_version=model_version,
+        total=total,
+        items=[
+            schemas.QuarantinedItem(
+                text_item_id=attempt.text_item_id,
+                attempts=attempt.attempts,
+                last_error=attempt.last_error,
+                first_failed_at=attempt.first_failed_at,
+                last_failed_at=attempt.last_failed_at,
+                quarantined_at=attempt.quarantined_at,
+            )
+            for attempt in attempts
+        ],
+    )
+
+
+@router.post("/quarantine/requeue", response_model=schemas.QuarantineRequeueResponse)
+def requeue_quarantine(
+    payload: schemas.QuarantineRequeueRequest,
+    _: str = Depends(require_admin),
+) -> schemas.QuarantineRequeueResponse:
+    """Give quarantined items (all of them when ``text_item_ids`` is omitted) a fresh set of attempts."""
+    model_name = payload.model_name or swapper.settings.model_name
+    model_version = payload.model_version or swapper.settings.effective_model_version
+    requeued = get_sentiment_repository().requeue_quarantined(model_name, model_version, payload.text_item_ids)
+    return schemas.QuarantineRequeueResponse(model_name=model_name, model_version=model_version, requeued=requeued)
+
+
 @router.post("/run/{text_item_id}")
-def run_sentiment_single(text_item_id: str) -> dict:
-    return run_sentiment_for_item(text_item_id)
+def run_sentiment_single(text_item_id: str, wait: bool = True) -> dict:
+    return run_sentiment_for_item(text_item_id, wait=wait)
+
+
+@router.get("/explain/{text_item_id}", response_model=schemas.SentimentExplanation)
+def explain_sentiment(text_item_id: str, max_tokens: int | None = None, top: int | None = None) -> schemas.SentimentExplanation:
+    """Which words drove the item's label; computed once per item and model version, then served from the DB."""
+    try:
+        explanation = explain_item(text_item_id, max_tokens=max_tokens)
+    except LookupError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except ExplanationError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    summary = explanation.pop("summary")
+    spans = explanation.pop("spans")
+    return schemas.SentimentExplanation(
+        **explanation,
+        base_score=summary.get("base_score"),
+        words_per_span=summary.get("words_per_span", 1),
+        tokens=summary.get("tokens", 0),
+        truncated=summary.get("truncated", False),
+        spans=top_spans(spans, top) if top else spans,
+    )
 
 
 @router.get("/keyword-stats", response_model=schemas.KeywordSentimentStats)
@@ -34,6 +34,7 @@ def create_source(payload: schemas.SourceBase, session: Session = Depends(get_db
         config=payload.config,
         status=payload.status,
         schedule=payload.schedule,
+        priority=payload.priority,
     )
     session.add(source)
     session.commit()
@@ -51,6 +52,7 @@ def update_source(source_id: str, payload: schemas.SourceBase, session: Session
     source.config = payload.config
     source.status = payload.status
     source.schedule = payload.schedule
+    source.priority = payload.priority
     source.updated_at = datetime.utcnow()
     session.add(source)
     session.commit()
@@ -125,6 +127,7 @@ def _to_schema(source: SourceORM) -> schemas.SourceResponse:
         config=source.config or {},
         status=source.status,
         schedule=source.schedule,
+        priority=source.priority or 0,
         last_run=source.last_run,
         last_error=source.last_error,
     )
@@ -65,6 +65,7 @@ class SourceBase(BaseModel):
     config: Dict[str, object]
     status: str = "inactive"
     schedule: str = "manual"
+    priority: int = 0
 
 
 class SourceResponse(SourceBase):
@@ -129,6 +130,67 @@ class SentimentAnalyzeResponse(BaseModel):
     created_at: datetime
 
 
+class SentimentBatchAnalyzeRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=256)
+
+
+class SentimentBatchAnalyzeItem(BaseModel):
+    sentiment: Optional[str] = None
+    score: Optional[float] = None
+    scores_by_label: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+
+
+class SentimentBatchAnalyzeResponse(BaseModel):
+    results: List[SentimentBatchAnalyzeItem]
+    created_at: datetime
+
+
+class MicroBatchMetrics(BaseModel):
+    batches: int
+    items: int
+    queue_depth: int
+    max_batch_size: int
+    max_wait_ms: float
+    mean_batch_size: float
+    batch_size_histogram: Dict[str, int]
+    queue_wait_ms_p50: float
+    queue_wait_ms_p99: float
+    queue_wait_ms_max: float
+
+
+class AutotuneSnapshot(BaseModel):
+    enabled: bool
+    batch_size: int
+    min_batch_size: int = 0
+    max_batch_size: int = 0
+    memory_ceiling_bytes: Optional[int] = None
+    rss_bytes: int = 0
+    converged: bool = False
+    per_size: Dict[str, Dict[str, object]] = Field(default_factory=dict)
+    adjustments: List[Dict[str, object]] = Field(default_factory=list)
+    recent: List[Dict[str, object]] = Field(default_factory=list)
+
+
+class ScoringProfile(BaseModel):
+    enabled: bool
+    source: str
+    totals: Dict[str, object] = Field(default_factory=dict)
+    runs: List[Dict[str, object]] = Field(default_factory=list)
+
+
+class InferenceCacheStats(BaseModel):
+    enabled: bool
+    model_name: str
+    model_version: str
+    entries: int = 0
+    max_entries: int = 0
+    memory_hits: int = 0
+    db_hits: int = 0
+    misses: int = 0
+    hit_rate: float = 0.0
+
+
 class SentimentStatsResponse(BaseModel):
     positive: int = 0
     neutral: int = 0
@@ -158,6 +220,74 @@ class BrandSentimentResponse(BaseModel):
     top_items: list[ContentResponse]
 
 
+class ModelSwapRequest(BaseModel):
+    model_name: Optional[str] = None
+    model_revision: Optional[str] = None
+    model_version: Optional[str] = None
+
+
+class ModelSwapStatus(BaseModel):
+    state: str
+    current: str
+    target: Optional[str] = None
+    requested_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+    warmup_items: int = 0
+    error: Optional[str] = None
+
+
+class QuarantinedItem(BaseModel):
+    text_item_id: str
+    attempts: int
+    last_error: Optional[str] = None
+    first_failed_at: datetime
+    last_failed_at: datetime
+    quarantined_at: datetime
+
+
+class QuarantineList(BaseModel):
+    model_name: str
+    model_version: str
+    total: int
+    items: List[QuarantinedItem] = Field(default_factory=list)
+
+
+class QuarantineRequeueRequest(BaseModel):
+    text_item_ids: Optional[List[str]] = None
+    model_name: Optional[str] = None
+    model_version: Optional[str] = None
+
+
+class QuarantineRequeueResponse(BaseModel):
+    model_name: str
+    model_version: str
+    requeued: int
+
+
+class ExplanationSpan(BaseModel):
+    start: int
+    end: int
+    text: str
+    importance: float
+
+
+class SentimentExplanation(BaseModel):
+    text_item_id: str
+    model_name: str
+    model_version: str
+    label: str
+    score: float
+    cached: bool
+    method: str = "occlusion"
+    base_score: Optional[float] = None
+    words_per_span: int = 1
+    tokens: int = 0
+    truncated: bool = False
+    spans: List[ExplanationSpan] = Field(default_factory=list)
+
+
 class RetrainRequest(BaseModel):
     dataset_version: str
     notes: Optional[str] = None
@@ -169,11 +299,26 @@ class RetrainResponse(BaseModel):
     submitted_at: datetime
 
 
+class EvaluationClassMetrics(BaseModel):
+    precision: float
+    recall: float
+    f1: float
+    support: int
+
+
 class SentimentAccuracyResponse(BaseModel):
     model_name: str
     model_version: str
-    accuracy: float
-    evaluated_at: datetime
+    accuracy: Optional[float] = None
+    evaluated_at: Optional[datetime] = None
+    run_id: Optional[str] = None
+    items: int = 0
+    reused: int = 0
+    failed: int = 0
+    macro_f1: Optional[float] = None
+    labels: List[str] = Field(default_factory=list)
+    per_class: Dict[str, EvaluationClassMetrics] = Field(default_factory=dict)
+    confusion: List[List[int]] = Field(default_factory=list)
 
 
 class KeywordSentimentStats(BaseModel):
@@ -12,11 +12,16 @@ from ingestion_service.orm import SourceORM
 
 def ingest_source(source: SourceORM) -> int:
     base_settings = get_settings()
+    configured_language = source.config.get("language") if source.config else None
     update_payload = {
         "feed_url": source.config.get("url", str(base_settings.feed_url)) if source.config else str(base_settings.feed_url),
         "source_type": source.type or base_settings.source_type,
-        "language": (source.config.get("language") if source.config else None) or base_settings.language,
+        "language": configured_language or base_settings.language,
+        "priority": source.priority or 0,
     }
+    if configured_language:
+        # a source pinned to one language skips detection
+        update_payload["detect_language"] = False
     if (source.type or base_settings.source_type) in {"csv", "csv_file"}:
         csv_path = source.config.get("path") if source.config else None
         if not csv_path:
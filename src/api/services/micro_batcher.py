@@ -0,0 +1,124 @@
+"""Coalesce concurrent /sentiment/analyze calls into batched forward passes."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Callable, Deque, List, Optional, Sequence, Tuple
+
+from sentiment_service.model import Prediction
+
+logger = logging.getLogger(__name__)
+
+PredictFn = Callable[[Sequence[str]], List[Prediction]]
+
+
+class MicroBatcher:
+    """Single-consumer asyncio queue in front of a batch predict function.
+
+    The consumer takes the first queued text, then keeps collecting until it
+    holds ``max_batch_size`` texts or ``max_wait_ms`` has passed, runs one
+    batched prediction in the default executor and resolves every caller's
+    future with its own result. Stopping fails every caller still waiting,
+    including those whose batch is mid-prediction.
+    """
+
+    def __init__(self, predict: PredictFn, max_batch_size: int = 32, max_wait_ms: float = 10.0) -> None:
+        self._predict = predict
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue[Tuple[str, asyncio.Future, float]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batch_sizes: Counter[int] = Counter()
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self._items = 0
+        self._batches = 0
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._consume(), name="sentiment-micro-batcher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, text: str) -> Prediction:
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    def metrics(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+            "queue_wait_ms_p50": round(_percentile(waits, 0.50) * 1000, 3),
+            "queue_wait_ms_p99": round(_percentile(waits, 0.99) * 1000, 3),
+            "queue_wait_ms_max": round((waits[-1] if waits else 0.0) * 1000, 3),
+        }
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                await self._run_batch(loop, batch)
+            except asyncio.CancelledError:
+                # these texts are off the queue, so stop() cannot fail their callers
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Micro-batcher stopped"))
+                raise
+
+    async def _run_batch(self, loop: asyncio.AbstractEventLoop, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        """Top ``batch`` up from the queue until it is full or the wait is over, then predict it."""
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        dequeued_at = time.perf_counter()
+        self._waits.extend(dequeued_at - enqueued_at for _, _, enqueued_at in batch)
+        self._batch_sizes[len(batch)] += 1
+        self._batches += 1
+        self._items += len(batch)
+        texts = [text for text, _, _ in batch]
+        try:
+            predictions = await loop.run_in_executor(None, self._predict, texts)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Micro-batch of %s texts failed", len(batch))
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future, _), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+
+def _percentile(values: List[float], quantile: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(quantile * len(values)))]
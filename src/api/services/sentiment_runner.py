@@ -1,23 +1,25 @@
 """Trigger the sentiment worker synchronously."""
 from __future__ import annotations
 
-from datetime import datetime
+from functools import lru_cache
 from typing import List
 
 from sqlalchemy import select
 
-from ingestion_service.models import SentimentResult
 from ingestion_service.orm import SentimentResultORM, TextItemORM
 from sentiment_service.db import SessionLocal
+from sentiment_service.explain import explain, stored_spans
 from sentiment_service.worker import SentimentWorker
-from sentiment_service.worker import _top_label
+
+
+@lru_cache
+def get_worker() -> SentimentWorker:
+    """Worker shared by every request; its model comes from the process-wide registry."""
+    return SentimentWorker()
 
 
 def run_sentiment_worker(batch_limit: int | None = None) -> List[dict]:
-    worker = SentimentWorker()
-    if batch_limit is not None:
-        worker.settings.batch_limit = batch_limit
-    results = worker.run()
+    results = get_worker().run(limit=batch_limit)
     return [
         {
             "text_item_id": str(result.text_item_id),
@@ -29,39 +31,77 @@ def run_sentiment_worker(batch_limit: int | None = None) -> List[dict]:
     ]
 
 
-def run_sentiment_for_item(text_item_id: str) -> dict:
-    worker = SentimentWorker()
+def run_sentiment_for_item(text_item_id: str, wait: bool = True) -> dict:
+    """Score one item now, or with ``wait=False`` only move it to the front of the worker queue.
+
+    Either way the item is boosted, so a failed or skipped synchronous run
+    and every other routed model still pick it up first.
+    """
+    worker = get_worker()
     with SessionLocal() as session:
         orm_item = session.get(TextItemORM, text_item_id)
         if not orm_item:
             raise ValueError("Text item not found")
+        route = worker.route_for(orm_item.language)
         existing = session.scalar(
             select(SentimentResultORM.id)
             .where(SentimentResultORM.text_item_id == text_item_id)
-            .where(SentimentResultORM.model_name == worker.settings.model_name)
-            .where(SentimentResultORM.model_version == worker.model_version)
+            .where(SentimentResultORM.model_name == route.model_name)
+            .where(SentimentResultORM.model_version == route.model_version)
         )
         if existing:
             return {"status": "skipped", "reason": "already_processed"}
         text_item = orm_item.to_model()
-    scores = worker.model.predict(text_item.body)
-    if not scores:
-        raise ValueError("No scores returned")
-    label, score = _top_label(scores)
-    result = SentimentResult(
-        text_item_id=text_item.id,
-        model_name=worker.settings.model_name,
-        model_version=worker.model_version,
-        pipeline_stage=worker.settings.pipeline_stage,
-        scored_at=datetime.utcnow(),
-        label=label,
-        score=score,
-        scores_by_label=scores,
-    )
+    worker.repository.boost_priority([text_item_id], worker.settings.priority_requested_boost)
+    if not wait:
+        priority = max(text_item.priority, worker.settings.priority_requested_boost)
+        return {"status": "queued", "text_item_id": text_item_id, "priority": priority}
+    prediction = worker.predict_items([text_item], route=route)[0]
+    if not prediction.ok:
+        raise ValueError(prediction.error or "No scores returned")
+    result = worker.build_result(text_item.id, prediction.scores, prediction.annotations, route=route)
     stored = worker.repository.save_result(result)
+    if stored.id != result.id:
+        # another worker scored the item while this request was running
+        return {"status": "skipped", "reason": "already_processed"}
     return {
         "status": "completed",
         "text_item_id": str(stored.text_item_id),
         "label": stored.label,
         "score": stored.score,
     }
+
+
+def explain_item(text_item_id: str, max_tokens: int | None = None) -> dict:
+    """Occlusion explanation of an item's stored result, computed on first request and then reused.
+
+    Raises ``LookupError`` when the item or its result for the served model
+    does not exist, and ``ExplanationError`` when it cannot be explained
+    within the token budget.
+    """
+    worker = get_worker()
+    with SessionLocal() as session:
+        orm_item = session.get(TextItemORM, text_item_id)
+        if not orm_item:
+            raise LookupError("Text item not found")
+        text_item = orm_item.to_model()
+    route = worker.route_for(text_item.language)
+    result = worker.repository.get_result(text_item_id, route.model_name, route.model_version)
+    if result is None:
+        raise LookupError(f"Text item has no result for {route.model_name}:{route.model_version}; score it first")
+    cached = result.explanations is not None
+    if not cached:
+        budget = min(max_tokens or worker.settings.explain_max_tokens, worker.settings.explain_max_tokens)
+        explanation = explain(worker.model_for(route), text_item.body, result.label, budget, route.settings)
+        result = worker.repository.save_explanation(str(result.id), explanation.attributions(), explanation.summary())
+    summary = (result.annotations or {}).get("explanation", {})
+    return {
+        "text_item_id": text_item_id,
+        "model_name": result.model_name,
+        "model_version": result.model_version,
+        "label": result.label,
+        "score": result.score,
+        "cached": cached,
+        "summary": summary,
+        "spans": stored_spans(result.explanations or [], summary),
+    }
@@ -6,15 +6,24 @@ import io
 from email.utils import parsedate_to_datetime
 from typing import Dict
 
+from ingestion_service.config import get_settings
+from ingestion_service.langid import detect_language
 from ingestion_service.models import TextItem
 from ingestion_service.sql_repository import DatabaseRepository
 from ingestion_service.db import SessionLocal
+from ingestion_service.text_normalizer import TextNormalizer
+
+# Sentiment140-style exports are English tweets
+DATASET_LANGUAGE = "en"
 
 
 def import_twitter_csv(content: bytes, limit: int | None = None) -> Dict[str, int]:
     text = content.decode("latin-1")
     reader = csv.reader(io.StringIO(text))
     repository = DatabaseRepository(SessionLocal)
+    settings = get_settings()
+    # same cleaning and language handling as feed ingestion, so both kinds of item score alike
+    normalizer = TextNormalizer.from_settings(settings) if settings.normalize_text else None
     inserted = 0
     skipped = 0
     for index, row in enumerate(reader):
@@ -24,19 +33,27 @@ def import_twitter_csv(content: bytes, limit: int | None = None) -> Dict[str, in
             skipped += 1
             continue
         sentiment_code, tweet_id, published_at, query, username, body = row[:6]
+        metadata = {
+            "username": username,
+            "query": query,
+            "tweet_index": index,
+        }
+        if normalizer is not None:
+            normalized = normalizer.normalize(body)
+            body = normalized.text
+            metadata["normalization"] = normalized.stats()
         if not body:
             skipped += 1
             continue
+        language = DATASET_LANGUAGE
+        if settings.detect_language:
+            language = detect_language(body, default=language)
         text_item = TextItem(
             source_type="twitter_csv",
             source_id=tweet_id,
-            source_metadata={
-                "username": username,
-                "query": query,
-                "tweet_index": index,
-            },
+            source_metadata=metadata,
             published_at=_parse_datetime(published_at),
-            language="en",
+            language=language,
             title=body[:120],
             body=body,
             labels=[_label_from_code(sentiment_code)] if sentiment_code else None,
@@ -1,8 +1,9 @@
 """Configuration for ingestion service."""
 from functools import lru_cache
 from pathlib import Path
+from typing import List
 
-from pydantic import AnyHttpUrl
+from pydantic import AnyHttpUrl, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,9 +18,16 @@ class Settings(BaseSettings):
     feed_url: AnyHttpUrl
     source_type: str = "rss_feed"
     language: str = "en"
+    detect_language: bool = True
+    normalize_text: bool = True
+    strip_urls: bool = True
+    boilerplate_patterns: List[str] = Field(default_factory=list)
     storage_path: Path = Path("data/text_items.jsonl")
     database_url: str = "sqlite:///data/sentiment.db"
     csv_path: Path | None = None
+    priority: int = 0
+    fresh_priority_boost: int = 10
+    fresh_priority_hours: float = 6.0
 
 
 @lru_cache
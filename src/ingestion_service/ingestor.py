@@ -6,10 +6,13 @@ from typing import Iterable, List
 
 from .config import Settings, get_settings
 from .db import SessionLocal, init_db
+from .langid import detect_language
 from .models import ArticleSummary, TextItem
 from .news_client import NewsFeedClient
+from .priority import item_priority
 from .csv_client import CsvSourceClient
 from .sql_repository import DatabaseRepository
+from .text_normalizer import TextNormalizer
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +21,7 @@ class IngestionService:
     def __init__(self, settings: Settings | None = None):
         self.settings = settings or get_settings()
         self.client = _build_client(self.settings)
+        self.normalizer = TextNormalizer.from_settings(self.settings) if self.settings.normalize_text else None
         self.repository = DatabaseRepository(SessionLocal)
 
     def run(self) -> List[TextItem]:
@@ -41,14 +45,30 @@ class IngestionService:
             "feed_url": str(self.settings.feed_url),
         }
         published = article.published
+        title, body = article.title, article.summary
+        if self.normalizer is not None:
+            normalized = self.normalizer.normalize(body)
+            # stored cleaned so scoring never pays for the markup again
+            body = normalized.text
+            title = self.normalizer.clean(title) or title
+            metadata["normalization"] = normalized.stats()
+        language = self.settings.language
+        if self.settings.detect_language:
+            language = detect_language(f"{title or ''} {body or ''}", default=language)
         return TextItem(
             source_type=self.settings.source_type,
             source_id=str(article.link),
             source_metadata=metadata,
             published_at=published,
-            language=self.settings.language,
-            title=article.title,
-            body=article.summary,
+            language=language,
+            title=title,
+            body=body,
+            priority=item_priority(
+                self.settings.priority,
+                published,
+                self.settings.fresh_priority_boost,
+                self.settings.fresh_priority_hours,
+            ),
         )
 
 
@@ -26,6 +26,7 @@ class TextItem(BaseModel):
     body: str
     entities: List[Entity] | None = None
     labels: List[str] | None = None
+    priority: int = 0
 
     @field_validator("language")
     @classmethod
@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from uuid import UUID
 
-from sqlalchemy import JSON, DateTime, Float, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 from .models import SentimentResult, TextItem
@@ -17,7 +17,11 @@ class Base(DeclarativeBase):
 
 class TextItemORM(Base):
     __tablename__ = "text_items"
-    __table_args__ = (UniqueConstraint("source_id", name="uq_text_items_source_id"),)
+    __table_args__ = (
+        UniqueConstraint("source_id", name="uq_text_items_source_id"),
+        Index("ix_text_items_ingested_at_id", "ingested_at", "id"),
+        Index("ix_text_items_priority_ingested_at", "priority", "ingested_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     source_type: Mapped[str] = mapped_column(String(64))
@@ -30,6 +34,7 @@ class TextItemORM(Base):
     body: Mapped[str] = mapped_column(Text, nullable=False)
     entities: Mapped[Optional[List[Dict[str, object]]]] = mapped_column(JSON, nullable=True)
     labels: Mapped[Optional[List[str]]] = mapped_column(JSON, nullable=True)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
     sentiments: Mapped[List["SentimentResultORM"]] = relationship(back_populates="text_item", cascade="all, delete-orphan")
 
@@ -46,6 +51,7 @@ class TextItemORM(Base):
             body=self.body,
             entities=self.entities,
             labels=self.labels,
+            priority=self.priority or 0,
         )
 
     @classmethod
@@ -62,11 +68,15 @@ class TextItemORM(Base):
             body=model.body,
             entities=model.entities,
             labels=model.labels,
+            priority=model.priority,
         )
 
 
 class SentimentResultORM(Base):
     __tablename__ = "sentiment_results"
+    __table_args__ = (
+        UniqueConstraint("text_item_id", "model_name", "model_version", name="uq_sentiment_results_item_model"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     text_item_id: Mapped[str] = mapped_column(ForeignKey("text_items.id", ondelete="CASCADE"), index=True)
@@ -114,12 +124,87 @@ class SentimentResultORM(Base):
         )
 
 
+class InferenceCacheORM(Base):
+    __tablename__ = "inference_cache"
+
+    text_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model_name: Mapped[str] = mapped_column(String(128), primary_key=True)
+    model_version: Mapped[str] = mapped_column(String(64), primary_key=True)
+    scores_by_label: Mapped[Dict[str, float]] = mapped_column(JSON, nullable=False)
+    annotations: Mapped[Optional[Dict[str, object]]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+
+class ScoringLeaseORM(Base):
+    __tablename__ = "scoring_leases"
+
+    text_item_id: Mapped[str] = mapped_column(ForeignKey("text_items.id", ondelete="CASCADE"), primary_key=True)
+    model_name: Mapped[str] = mapped_column(String(128), primary_key=True)
+    model_version: Mapped[str] = mapped_column(String(64), primary_key=True)
+    worker_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    claimed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    leased_until: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class ScoringAttemptORM(Base):
+    """Failed scoring attempts per item and model; ``quarantined_at`` takes the item out of the queue."""
+
+    __tablename__ = "scoring_attempts"
+
+    text_item_id: Mapped[str] = mapped_column(ForeignKey("text_items.id", ondelete="CASCADE"), primary_key=True)
+    model_name: Mapped[str] = mapped_column(String(128), primary_key=True)
+    model_version: Mapped[str] = mapped_column(String(64), primary_key=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    first_failed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_failed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    quarantined_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+
+
+class BackfillCheckpointORM(Base):
+    __tablename__ = "backfill_checkpoints"
+
+    model_name: Mapped[str] = mapped_column(String(128), primary_key=True)
+    model_version: Mapped[str] = mapped_column(String(64), primary_key=True)
+    cutoff: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    cursor_ingested_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    cursor_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    scanned: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    scored: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class EvaluationRunORM(Base):
+    """One evaluation of a model version against the labeled text items."""
+
+    __tablename__ = "evaluation_runs"
+    __table_args__ = (Index("ix_evaluation_runs_model_finished_at", "model_name", "model_version", "finished_at"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    model_name: Mapped[str] = mapped_column(String(128), nullable=False)
+    model_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    items: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    reused: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    accuracy: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    macro_f1: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    labels: Mapped[List[str]] = mapped_column(JSON, nullable=False)
+    per_class: Mapped[Dict[str, Dict[str, float]]] = mapped_column(JSON, nullable=False)
+    confusion: Mapped[List[List[int]]] = mapped_column(JSON, nullable=False)
+
+
 class SourceORM(Base):
     __tablename__ = "sources"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     name: Mapped[str] = mapped_column(String(128), nullable=False)
     type: Mapped[str] = mapped_column(String(32), nullable=False)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     config: Mapped[Optional[Dict[str, object]]] = mapped_column(JSON, nullable=True)
     schedule: Mapped[str] = mapped_column(String(32), nullable=False, default="manual")
     status: Mapped[str] = mapped_column(String(32), nullable=False, default="inactive")
@@ -0,0 +1,27 @@
+"""Scoring priority stamped on text items when they are ingested."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+
+def item_priority(
+    source_priority: int,
+    published_at: Optional[datetime],
+    fresh_boost: int,
+    fresh_hours: float,
+    now: Optional[datetime] = None,
+) -> int:
+    """Source priority plus ``fresh_boost`` for items published within ``fresh_hours``.
+
+    Items without a publication date get no boost, so bulk imports of old
+    content cannot pass themselves off as breaking news.
+    """
+    if published_at is None or not fresh_boost:
+        return source_priority
+    if published_at.tzinfo is not None:
+        published_at = published_at.astimezone(timezone.utc).replace(tzinfo=None)
+    now = now or datetime.utcnow()
+    if now - published_at <= timedelta(hours=fresh_hours):
+        return source_priority + fresh_boost
+    return source_priority
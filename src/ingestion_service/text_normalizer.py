@@ -0,0 +1,249 @@
+"""Strip markup and feed boilerplate from ingested text before it is stored.
+
+Usage::
+
+    python -m ingestion_service.text_normalizer --report
+    python -m ingestion_service.text_normalizer --backfill
+
+RSS summaries carry tags, entities, tracking pixels and "read more" links
+that cost tokens without carrying sentiment. Items are normalized once at
+ingestion, and the cleaned text is what gets stored and scored. Before/after
+sizes are kept under ``source_metadata["normalization"]`` so the report can
+show the token savings per source. ``--backfill`` normalizes rows ingested
+before this stage existed.
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import logging
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from .db import SessionLocal
+from .orm import TextItemORM
+
+logger = logging.getLogger(__name__)
+
+# bump when the normalization changes so --backfill knows which rows to redo
+NORMALIZER_VERSION = 1
+
+# each pattern is bounded to a line tail so a phrase inside real prose cannot eat the text after it
+DEFAULT_BOILERPLATE: Tuple[str, ...] = (
+    r"\bThe post [^\n]{1,300}? appeared first on [^\n]{1,200}?(?:\.|$)",
+    r"\b(?:read more|continue reading|baca selengkapnya|selengkapnya)\s*(?:(?:at|on|di)\s+[^\n]{1,60}?)?\s*[»›→>.…:\-]*\s*$",
+    r"\bcontinue reading\b[^\n]{0,120}?[→»›]\s*$",
+    r"\bBaca [Jj]uga\s*:[^\n]{0,160}",
+    r"\b(?:click|klik) (?:here|di sini)\b[^\n]{0,60}?[.»›→:]*\s*$",
+    r"\[(?:…|\.\.\.)\]\s*$",
+    r"\((?:foto|photo|ilustrasi)\s*:[^)\n]{0,120}\)",
+)
+
+_SKIPPED_TAGS = frozenset({"script", "style", "noscript", "iframe", "svg", "head", "template"})
+_BLOCK_TAGS = frozenset(
+    {"p", "br", "div", "li", "ul", "ol", "tr", "td", "th", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "hr", "section", "article", "figcaption"}
+)
+_URL = re.compile(r"https?://\S+")
+_INLINE_SPACE = re.compile(r"[ \t\r\f\v\u00a0\u200b]+")
+_BLANK_LINES = re.compile(r"\s*\n\s*")
+_TOKEN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def approximate_tokens(text: str) -> int:
+    """Word and punctuation count; a lower bound on what a subword tokenizer produces."""
+    return len(_TOKEN.findall(text or ""))
+
+
+class _TextExtractor(HTMLParser):
+    """Collects text content, dropping scripts, styles and tag-only elements such as pixels."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skipping:
+            self.parts.append(data)
+
+
+@dataclass
+class NormalizedText:
+    text: str
+    raw_chars: int
+    raw_tokens: int
+    tokens: int
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "version": NORMALIZER_VERSION,
+            "raw_chars": self.raw_chars,
+            "chars": len(self.text),
+            "raw_tokens": self.raw_tokens,
+            "tokens": self.tokens,
+        }
+
+
+class TextNormalizer:
+    """Markup stripping, entity decoding, boilerplate removal and whitespace collapsing."""
+
+    def __init__(self, boilerplate: Sequence[str] = DEFAULT_BOILERPLATE, strip_urls: bool = True) -> None:
+        self._boilerplate = [re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in boilerplate]
+        self.strip_urls = strip_urls
+
+    @classmethod
+    def from_settings(cls, settings) -> "TextNormalizer":
+        return cls(
+            boilerplate=list(DEFAULT_BOILERPLATE) + list(settings.boilerplate_patterns),
+            strip_urls=settings.strip_urls,
+        )
+
+    def clean(self, text: Optional[str]) -> str:
+        if not text:
+            return ""
+        if "<" in text and ">" in text:
+            extractor = _TextExtractor()
+            extractor.feed(text)
+            extractor.close()
+            text = "".join(extractor.parts)
+        # feeds double-escape often enough ("&amp;amp;") that one extra pass pays off
+        text = html.unescape(html.unescape(text))
+        if self.strip_urls:
+            text = _URL.sub(" ", text)
+        text = _INLINE_SPACE.sub(" ", text)
+        text = _BLANK_LINES.sub("\n", text).strip()
+        for pattern in self._boilerplate:
+            text = pattern.sub(" ", text)
+        text = _INLINE_SPACE.sub(" ", text)
+        return _BLANK_LINES.sub("\n", text).strip()
+
+    def normalize(self, text: Optional[str]) -> NormalizedText:
+        raw = text or ""
+        cleaned = self.clean(raw)
+        return NormalizedText(
+            text=cleaned,
+            raw_chars=len(raw),
+            raw_tokens=approximate_tokens(raw),
+            tokens=approximate_tokens(cleaned),
+        )
+
+
+def source_key(source_type: str, metadata: Optional[Dict[str, object]]) -> str:
+    """Label a row with its feed (RSS) or its source type (everything else)."""
+    metadata = metadata or {}
+    origin = metadata.get("feed_url") or metadata.get("query")
+    return f"{source_type}:{origin}" if origin else source_type
+
+
+def savings_report(rows: Iterable[Tuple[str, Optional[Dict[str, object]]]], budget: int = 512) -> Dict[str, object]:
+    """Aggregate stored normalization stats per source.
+
+    ``over_budget`` counts items whose approximate token count exceeds the
+    model's ``budget``, which is where markup actually cost scored content.
+    """
+    sources: Dict[str, Dict[str, float]] = {}
+    for source_type, metadata in rows:
+        entry = sources.setdefault(
+            source_key(source_type, metadata),
+            {"items": 0, "normalized": 0, "raw_tokens": 0, "tokens": 0, "over_budget_raw": 0, "over_budget": 0},
+        )
+        entry["items"] += 1
+        stats = (metadata or {}).get("normalization")
+        if not isinstance(stats, dict):
+            continue
+        entry["normalized"] += 1
+        entry["raw_tokens"] += stats.get("raw_tokens", 0)
+        entry["tokens"] += stats.get("tokens", 0)
+        entry["over_budget_raw"] += stats.get("raw_tokens", 0) > budget
+        entry["over_budget"] += stats.get("tokens", 0) > budget
+    report = []
+    for source, entry in sorted(sources.items(), key=lambda pair: -(pair[1]["raw_tokens"] - pair[1]["tokens"])):
+        saved = entry["raw_tokens"] - entry["tokens"]
+        report.append(
+            dict(
+                entry,
+                source=source,
+                saved_tokens=saved,
+                saved_share=round(saved / entry["raw_tokens"], 4) if entry["raw_tokens"] else 0.0,
+                mean_tokens_raw=round(entry["raw_tokens"] / entry["normalized"], 1) if entry["normalized"] else None,
+                mean_tokens=round(entry["tokens"] / entry["normalized"], 1) if entry["normalized"] else None,
+            )
+        )
+    return {"budget": budget, "sources": report}
+
+
+def load_source_stats() -> List[Tuple[str, Optional[Dict[str, object]]]]:
+    with SessionLocal() as session:
+        stmt = select(TextItemORM.source_type, TextItemORM.source_metadata)
+        return [(source_type, metadata) for source_type, metadata in session.execute(stmt).yield_per(1000)]
+
+
+def normalize_existing(normalizer: TextNormalizer, batch: int = 500) -> int:
+    """Normalize rows stored before this stage (or by an older version) in place.
+
+    Rows that were already scored keep their results; rescore them with a
+    model version bump if the cleaned text should count.
+    """
+    updated = 0
+    last_id = ""
+    while True:
+        with SessionLocal() as session:
+            rows = session.scalars(
+                select(TextItemORM).where(TextItemORM.id > last_id).order_by(TextItemORM.id).limit(batch)
+            ).all()
+            if not rows:
+                return updated
+            last_id = rows[-1].id
+            for row in rows:
+                metadata = dict(row.source_metadata or {})
+                previous = metadata.get("normalization")
+                if isinstance(previous, dict) and previous.get("version") == NORMALIZER_VERSION:
+                    continue
+                normalized = normalizer.normalize(row.body)
+                stats = normalized.stats()
+                if isinstance(previous, dict):
+                    # the stored body is already cleaned; keep the original raw sizes
+                    stats.update(raw_chars=previous.get("raw_chars", stats["raw_chars"]), raw_tokens=previous.get("raw_tokens", stats["raw_tokens"]))
+                metadata["normalization"] = stats
+                row.body = normalized.text
+                if row.title:
+                    row.title = normalizer.clean(row.title)[:512] or row.title
+                row.source_metadata = metadata
+                updated += 1
+            session.commit()
+        logger.info("Normalized %s text items so far", updated)
+
+
+if __name__ == "__main__":
+    from .config import get_settings
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--report", action="store_true", help="token savings per source from stored stats")
+    action.add_argument("--backfill", action="store_true", help="normalize rows stored before this stage")
+    parser.add_argument("--budget", type=int, default=512, help="model token budget for the over-budget counts")
+    parser.add_argument("--batch", type=int, default=500, help="rows per transaction when backfilling")
+    args = parser.parse_args()
+    if args.backfill:
+        count = normalize_existing(TextNormalizer.from_settings(get_settings()), batch=args.batch)
+        logger.info("Normalized %s text items", count)
+    else:
+        print(json.dumps(savings_report(load_source_stats(), budget=args.budget), indent=2))
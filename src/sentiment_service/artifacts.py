@@ -0,0 +1,232 @@
+"""Local model artifact store: pinned, checksummed safetensors that load without the hub.
+
+Usage::
+
+    python -m sentiment_service.artifacts prepare            # default model plus every routed model
+    python -m sentiment_service.artifacts prepare --model NAME --revision REV
+    python -m sentiment_service.artifacts verify
+    python -m sentiment_service.artifacts list
+
+``prepare`` downloads a model once and saves its weights as safetensors next
+to its tokenizer and config. A manifest records the resolved commit and the
+sha256 of every file. With ``SENTIMENT_ARTIFACT_DIR`` set, models load from
+the store with ``local_files_only`` and are checked against the manifest.
+On CPU their weights are then memory-mapped straight from the safetensors
+files, so every process on the host shares the same page-cache pages
+instead of holding a private copy.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import shutil
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import torch
+
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+class ArtifactError(RuntimeError):
+    """A prepared artifact is missing or does not match its manifest."""
+
+
+def artifact_dir(store: Path, model_name: str, revision: Optional[str]) -> Path:
+    """Location of the prepared model for a given name/revision."""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name.strip("/"))
+    return Path(store) / slug / (revision or "latest")
+
+
+def prepare(store: Path, model_name: str, revision: Optional[str] = None) -> Path:
+    """Download ``model_name`` at ``revision`` into the store as safetensors plus a manifest.
+
+    The artifact is written to a staging directory and renamed into place, so
+    a crashed prepare never leaves a half-written artifact behind.
+    """
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    target = artifact_dir(store, model_name, revision)
+    staging = target.with_name(f"{target.name}.partial")
+    shutil.rmtree(staging, ignore_errors=True)
+    kwargs = {"revision": revision} if revision else {}
+    started = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name, **kwargs)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, **kwargs)
+    try:
+        model.save_pretrained(staging, safe_serialization=True)
+    except TypeError:
+        # transformers releases that dropped the switch always write safetensors
+        model.save_pretrained(staging)
+    tokenizer.save_pretrained(staging)
+    if not list(staging.glob("*.safetensors")):
+        raise ArtifactError(f"{model_name} was not saved as safetensors")
+    manifest = {
+        "model_name": model_name,
+        "revision": revision,
+        "resolved_revision": getattr(model.config, "_commit_hash", None) or revision,
+        "created_at": time.time(),
+        "files": {
+            path.relative_to(staging).as_posix(): {"sha256": _sha256(path), "bytes": path.stat().st_size}
+            for path in sorted(staging.rglob("*"))
+            if path.is_file()
+        },
+    }
+    (staging / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    if target.exists():
+        shutil.rmtree(target)
+    staging.rename(target)
+    logger.info(
+        "Prepared %s@%s (%s) at %s in %.1fs",
+        model_name,
+        revision or "latest",
+        manifest["resolved_revision"] or "local",
+        target,
+        time.perf_counter() - started,
+    )
+    return target
+
+
+def read_manifest(path: Path) -> Dict[str, object]:
+    try:
+        return json.loads((path / MANIFEST).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise ArtifactError(
+            f"No prepared artifact at {path}; run `python -m sentiment_service.artifacts prepare` first"
+        ) from None
+
+
+def verify(path: Path) -> Dict[str, object]:
+    """Check every file in the artifact against its manifest checksum."""
+    manifest = read_manifest(path)
+    for name, expected in manifest["files"].items():
+        file = path / name
+        if not file.is_file():
+            raise ArtifactError(f"{file} listed in the manifest is missing")
+        if file.stat().st_size != expected["bytes"] or _sha256(file) != expected["sha256"]:
+            raise ArtifactError(f"{file} does not match its manifest checksum")
+    return manifest
+
+
+def locate(settings: Settings) -> Optional[Path]:
+    """Verified artifact for ``settings``, or ``None`` when the store is not in use."""
+    if settings.artifact_dir is None:
+        return None
+    path = artifact_dir(settings.artifact_dir, settings.model_name, settings.model_revision)
+    if settings.artifact_verify:
+        verify(path)
+    else:
+        read_manifest(path)
+    return path
+
+
+def map_weights(model: torch.nn.Module, path: Path) -> int:
+    """Point the model's CPU tensors at read-only mappings of the safetensors files.
+
+    Returns the number of tensors mapped. Pages are shared through the page
+    cache with every other process mapping the same files. Writes stay private
+    to the process (``MAP_PRIVATE``), but inference never writes.
+    """
+    state: Dict[str, torch.Tensor] = {}
+    for file in sorted(path.glob("*.safetensors")):
+        state.update(_mmap_safetensors(file))
+    if not state:
+        return 0
+    # strict=False: tied weights and non-persistent buffers are not in the file
+    result = model.load_state_dict(state, strict=False, assign=True)
+    if hasattr(model, "tie_weights"):
+        model.tie_weights()
+    return len(state) - len(result.unexpected_keys)
+
+
+def _mmap_safetensors(file: Path) -> Dict[str, torch.Tensor]:
+    # layout: little-endian u64 header length, JSON header, then the raw tensor bytes
+    with open(file, "rb") as handle:
+        (header_length,) = struct.unpack("<Q", handle.read(8))
+        header = json.loads(handle.read(header_length))
+    size = file.stat().st_size
+    storage = torch.UntypedStorage.from_file(str(file), shared=False, nbytes=size)
+    data = torch.empty(0, dtype=torch.uint8).set_(storage)
+    base = 8 + header_length
+    tensors: Dict[str, torch.Tensor] = {}
+    for name, entry in header.items():
+        if name == "__metadata__":
+            continue
+        start, end = entry["data_offsets"]
+        raw = data[base + start : base + end]
+        dtype = _SAFETENSORS_DTYPES[entry["dtype"]]
+        try:
+            tensors[name] = raw.view(dtype).reshape(entry["shape"])
+        except RuntimeError:
+            # misaligned for its dtype: fall back to a private copy of this one tensor
+            tensors[name] = raw.clone().view(dtype).reshape(entry["shape"])
+    return tensors
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _configured_models(settings: Settings) -> List[Settings]:
+    models = [settings]
+    for model in dict.fromkeys(settings.model_routes.values()):
+        routed = settings.for_route(model)
+        if routed is not settings:
+            models.append(routed)
+    return models
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("prepare", "verify", "list"))
+    parser.add_argument("--model", help="model name (defaults to the configured model and its routes)")
+    parser.add_argument("--revision", help="hub revision to pin")
+    parser.add_argument("--store", type=Path, help="artifact directory (defaults to SENTIMENT_ARTIFACT_DIR)")
+    args = parser.parse_args()
+    settings = get_settings()
+    store = args.store or settings.artifact_dir
+    if store is None:
+        parser.error("--store or SENTIMENT_ARTIFACT_DIR is required")
+    if args.model:
+        targets = [(args.model, args.revision)]
+    else:
+        targets = [(model.model_name, model.model_revision) for model in _configured_models(settings)]
+    if args.command == "prepare":
+        for name, revision in targets:
+            prepare(store, name, revision)
+    elif args.command == "verify":
+        for name, revision in targets:
+            manifest = verify(artifact_dir(store, name, revision))
+            print(f"{name}@{revision or 'latest'}: ok ({manifest['resolved_revision'] or 'local'}, {len(manifest['files'])} files)")
+    else:
+        for manifest_path in sorted(Path(store).glob(f"*/*/{MANIFEST}")):
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            size = sum(entry["bytes"] for entry in manifest["files"].values())
+            print(f"{manifest['model_name']}@{manifest['revision'] or 'latest'}\t{manifest['resolved_revision']}\t{size / 1e6:.1f} MB")
@@ -0,0 +1,211 @@
+"""Runtime batch-size controller driven by measured throughput and memory."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+_HISTORY = 50
+_INITIAL_FACTOR = 2.0
+_MIN_FACTOR = 1.125
+# a drop smaller than this is treated as noise rather than a worse size
+_TOLERANCE = 0.03
+
+
+def resident_memory_bytes() -> int:
+    """Current RSS from /proc where available, otherwise the peak RSS."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class BatchSample:
+    batch_size: int
+    items: int
+    tokens: int
+    seconds: float
+    rss_bytes: int
+    recorded_at: float
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.seconds if self.seconds else 0.0
+
+
+class BatchSizeController:
+    """Hill-climbs the batch size towards the best measured items/s.
+
+    Only full batches carry a signal, since a short batch just means the
+    queue ran dry. After each full batch the size moves one step (×/÷ the
+    current factor) in the current direction. When throughput drops, the
+    direction reverses and the factor shrinks. Once the factor reaches its
+    floor the controller holds the best size seen. Whenever resident memory
+    crosses the ceiling the size is halved immediately, whatever the
+    throughput.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        memory_ceiling_bytes: Optional[int] = None,
+        state_path: Optional[Path] = None,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.memory_ceiling_bytes = memory_ceiling_bytes
+        self.state_path = state_path
+        self.batch_size = min(max(initial, self.minimum), self.maximum)
+        self.history: Deque[BatchSample] = deque(maxlen=_HISTORY)
+        self.adjustments: Deque[Dict[str, object]] = deque(maxlen=_HISTORY)
+        self._per_size: Dict[int, Dict[str, float]] = {}
+        self._direction = 1
+        self._factor = _INITIAL_FACTOR
+        self._previous: Optional[tuple[int, float]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "BatchSizeController":
+        ceiling = settings.autotune_memory_ceiling_mb
+        return cls(
+            initial=settings.batch_limit,
+            minimum=settings.autotune_min_batch,
+            maximum=settings.autotune_max_batch,
+            memory_ceiling_bytes=int(ceiling * 1024 * 1024) if ceiling else None,
+            state_path=settings.autotune_state_path,
+        )
+
+    @property
+    def converged(self) -> bool:
+        return self._factor <= _MIN_FACTOR
+
+    def observe(self, items: int, tokens: int, seconds: float, batch_size: Optional[int] = None) -> int:
+        """Record one scored batch and return the batch size to use next."""
+        with self._lock:
+            sample = BatchSample(
+                batch_size=batch_size or self.batch_size,
+                items=items,
+                tokens=tokens,
+                seconds=seconds,
+                rss_bytes=resident_memory_bytes(),
+                recorded_at=time.time(),
+            )
+            self.history.append(sample)
+            self._accumulate(sample)
+            if self.memory_ceiling_bytes and sample.rss_bytes > self.memory_ceiling_bytes:
+                # memory pressure overrides throughput
+                self._direction = -1
+                self._move(max(self.minimum, self.batch_size // 2), "memory ceiling")
+            elif items >= sample.batch_size and sample.batch_size == self.batch_size and not self.converged:
+                self._climb(sample.items_per_second)
+            size = self.batch_size
+        self._persist()
+        return size
+
+    def _climb(self, throughput: float) -> None:
+        if self._previous is not None:
+            previous_size, previous_throughput = self._previous
+            if throughput < previous_throughput * (1 - _TOLERANCE):
+                self._direction = -self._direction
+                self._factor = max(_MIN_FACTOR, 1 + (self._factor - 1) / 2)
+        self._previous = (self.batch_size, throughput)
+        if self.converged:
+            self._move(self._best_size(), "converged")
+            return
+        step = self.batch_size * self._factor if self._direction > 0 else self.batch_size / self._factor
+        target = min(self.maximum, max(self.minimum, int(round(step))))
+        if target == self.batch_size:
+            # pinned against a bound: turn around on the next measurement
+            self._direction = -self._direction
+        self._move(target, "throughput")
+
+    def _move(self, size: int, reason: str) -> None:
+        if size == self.batch_size:
+            return
+        self.adjustments.append({"from": self.batch_size, "to": size, "reason": reason, "at": time.time()})
+        logger.info("Batch size %s -> %s (%s)", self.batch_size, size, reason)
+        self.batch_size = size
+
+    def _accumulate(self, sample: BatchSample) -> None:
+        stats = self._per_size.setdefault(sample.batch_size, {"batches": 0, "items": 0, "tokens": 0, "seconds": 0.0})
+        stats["batches"] += 1
+        stats["items"] += sample.items
+        stats["tokens"] += sample.tokens
+        stats["seconds"] += sample.seconds
+
+    def _best_size(self) -> int:
+        rated = {size: stats["items"] / stats["seconds"] for size, stats in self._per_size.items() if stats["seconds"]}
+        return max(rated, key=rated.get) if rated else self.batch_size
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "batch_size": self.batch_size,
+                "min_batch_size": self.minimum,
+                "max_batch_size": self.maximum,
+                "memory_ceiling_bytes": self.memory_ceiling_bytes,
+                "rss_bytes": resident_memory_bytes(),
+                "converged": self.converged,
+                "per_size": {
+                    str(size): {
+                        "batches": int(stats["batches"]),
+                        "items_per_second": round(stats["items"] / stats["seconds"], 2) if stats["seconds"] else 0.0,
+                        "tokens_per_second": round(stats["tokens"] / stats["seconds"], 2) if stats["seconds"] else 0.0,
+                        "mean_latency_ms": round(1000 * stats["seconds"] / stats["batches"], 2),
+                    }
+                    for size, stats in sorted(self._per_size.items())
+                },
+                "adjustments": list(self.adjustments),
+                "recent": [
+                    dict(
+                        asdict(sample),
+                        items_per_second=round(sample.items_per_second, 2),
+                        tokens_per_second=round(sample.tokens_per_second, 2),
+                    )
+                    for sample in self.history
+                ],
+            }
+
+    def _persist(self) -> None:
+        # workers run outside the API process; the state file lets the API show their controller
+        if self.state_path is None:
+            return
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.state_path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+            temporary.replace(self.state_path)
+        except OSError:
+            logger.exception("Could not write autotune state to %s", self.state_path)
+
+
+def build_controller(settings: Settings) -> Optional[BatchSizeController]:
+    return BatchSizeController.from_settings(settings) if settings.autotune_enabled else None
+
+
+def load_snapshot(path: Path) -> Optional[Dict[str, object]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
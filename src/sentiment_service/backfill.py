@@ -0,0 +1,175 @@
+"""Rescore history for a new model version without holding up live scoring.
+
+Usage::
+
+    python -m sentiment_service.backfill            # start or resume
+    python -m sentiment_service.backfill --status   # print progress and exit
+    python -m sentiment_service.backfill --reset    # start over from the newest item
+
+On first run the job freezes a cutoff at the newest ingested item and walks
+everything up to it, newest first, with keyset pagination on
+``(ingested_at, id)``. The cursor is committed after every page, so a crashed
+or stopped job resumes where it left off. While the backfill is unfinished,
+live workers only claim items ingested after the cutoff, so fresh content
+keeps flowing at full speed.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Dict, List, Optional
+
+from ingestion_service.models import TextItem
+
+from .config import Settings
+from .db import init_db
+from .repository import BackfillCheckpoint
+from .worker import ScoringRoute, SentimentWorker
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillJob:
+    def __init__(self, worker: SentimentWorker | None = None) -> None:
+        self.worker = worker or SentimentWorker()
+        self.settings = self.worker.settings
+        self.repository = self.worker.repository
+
+    def run(self, stop: threading.Event | None = None, reset: bool = False) -> BackfillCheckpoint:
+        stop = stop or threading.Event()
+        _lower_priority(self.settings.backfill_nice)
+        checkpoint = self.repository.start_backfill(self.settings.model_name, self.worker.model_version, reset=reset)
+        if checkpoint.finished_at is not None:
+            logger.info("Backfill for %s:%s already finished", checkpoint.model_name, checkpoint.model_version)
+            return checkpoint
+        logger.info(
+            "Backfilling %s items up to %s for %s:%s (resuming after %s)",
+            checkpoint.total,
+            checkpoint.cutoff,
+            checkpoint.model_name,
+            checkpoint.model_version,
+            checkpoint.cursor_id or "the start",
+        )
+        _warn_if_page_outlives_stale_window(self.settings)
+        started = time.monotonic()
+        scanned = 0
+        while not stop.is_set():
+            page = self.repository.fetch_backfill_page(checkpoint, self.settings.backfill_page_size)
+            if not page:
+                checkpoint = self.repository.advance_backfill(checkpoint, None, 0, 0)
+                logger.info("Backfill finished: %s items scanned, %s scored", checkpoint.scanned, checkpoint.scored)
+                break
+            stored = self._score_page(page)
+            checkpoint = self.repository.advance_backfill(checkpoint, page[-1], len(page), stored)
+            scanned += len(page)
+            elapsed = time.monotonic() - started
+            logger.info("Backfill %s", _format_progress(progress(checkpoint, scanned / elapsed if elapsed else None)))
+            self._throttle(scanned, started, stop)
+        return checkpoint
+
+    def _score_page(self, page: List[TextItem]) -> int:
+        groups: Dict[int, List[TextItem]] = {}
+        routes: Dict[int, ScoringRoute] = {}
+        for item in page:
+            route = self.worker.route_for(item.language)
+            groups.setdefault(id(route), []).append(item)
+            routes[id(route)] = route
+        stored = 0
+        for key, items in groups.items():
+            route = routes[key]
+            ids = [item.id for item in items]
+            # quarantined items are skipped exactly as the live queue skips them
+            done = self.repository.scored_item_ids(ids, route.model_name, route.model_version)
+            done |= self.repository.quarantined_item_ids(ids, route.model_name, route.model_version)
+            pending = [item for item in items if str(item.id) not in done]
+            if not pending:
+                continue
+            # the unique result key turns a race with a live worker into a no-op
+            predictions = self.worker.predict_items(pending, route=route)
+            stored += len(self.worker.store_predictions(pending, predictions, route))
+        return stored
+
+    def _throttle(self, scanned: int, started: float, stop: threading.Event) -> None:
+        rate = self.settings.backfill_max_items_per_second
+        if not rate:
+            return
+        ahead = scanned / rate - (time.monotonic() - started)
+        if ahead > 0:
+            stop.wait(ahead)
+
+
+def progress(checkpoint: BackfillCheckpoint, rate: Optional[float] = None) -> Dict[str, object]:
+    """Progress summary; ``rate`` defaults to the average since the backfill started."""
+    if rate is None:
+        elapsed = (checkpoint.updated_at - checkpoint.started_at).total_seconds()
+        rate = checkpoint.scanned / elapsed if elapsed > 0 else None
+    remaining = max(0, checkpoint.total - checkpoint.scanned)
+    return {
+        "model_name": checkpoint.model_name,
+        "model_version": checkpoint.model_version,
+        "cutoff": checkpoint.cutoff.isoformat(),
+        "total": checkpoint.total,
+        "scanned": checkpoint.scanned,
+        "scored": checkpoint.scored,
+        "percent": round(100 * checkpoint.scanned / checkpoint.total, 1) if checkpoint.total else 100.0,
+        "items_per_second": round(rate, 2) if rate else None,
+        "eta_seconds": None if checkpoint.finished_at or not rate else round(remaining / rate),
+        "finished_at": checkpoint.finished_at.isoformat() if checkpoint.finished_at else None,
+    }
+
+
+def _format_progress(report: Dict[str, object]) -> str:
+    eta = report["eta_seconds"]
+    return "{percent}% ({scanned}/{total} scanned, {scored} scored) at {rate} items/s, ETA {eta}".format(
+        percent=report["percent"],
+        scanned=report["scanned"],
+        total=report["total"],
+        scored=report["scored"],
+        rate=report["items_per_second"] or "?",
+        eta=time.strftime("%H:%M:%S", time.gmtime(eta)) if eta is not None else "?",
+    )
+
+
+def _warn_if_page_outlives_stale_window(settings: Settings) -> None:
+    # live workers take the backlog back once the checkpoint stops moving for this long
+    rate, stale = settings.backfill_max_items_per_second, settings.backfill_stale_seconds
+    if rate and stale and settings.backfill_page_size / rate > stale:
+        logger.warning(
+            "A %s-item page at %s items/s takes longer than BACKFILL_STALE_SECONDS (%ss); "
+            "live workers will treat this backfill as abandoned between pages",
+            settings.backfill_page_size,
+            rate,
+            stale,
+        )
+
+
+def _lower_priority(niceness: int) -> None:
+    # keep CPU for live scoring on the same host
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reset", action="store_true", help="discard the checkpoint and start from the newest item")
+    parser.add_argument("--status", action="store_true", help="print the checkpoint's progress and exit")
+    args = parser.parse_args()
+    init_db()
+    worker = SentimentWorker()
+    try:
+        if args.status:
+            checkpoint = worker.repository.get_backfill(worker.settings.model_name, worker.model_version)
+            print(json.dumps(progress(checkpoint) if checkpoint else None, indent=2))
+        else:
+            stop_event = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+            signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+            BackfillJob(worker).run(stop_event, reset=args.reset)
+    finally:
+        worker.close()
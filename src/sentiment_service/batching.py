@@ -0,0 +1,67 @@
+"""Length-bucketed batching so each forward pass pads only to its own maximum."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+
+@dataclass
+class PaddingStats:
+    """Token accounting for one scoring run.
+
+    ``padded_tokens`` is what the bucketed batches actually fed to the model;
+    ``naive_padded_tokens`` is what the same batches would have cost in arrival
+    order, which makes the saved compute visible.
+    """
+
+    real_tokens: int = 0
+    padded_tokens: int = 0
+    naive_padded_tokens: int = 0
+    batches: int = 0
+
+    @property
+    def efficiency(self) -> float:
+        return self.real_tokens / self.padded_tokens if self.padded_tokens else 1.0
+
+    @property
+    def naive_efficiency(self) -> float:
+        return self.real_tokens / self.naive_padded_tokens if self.naive_padded_tokens else 1.0
+
+    def record(self, lengths: Sequence[int], batch_size: int) -> None:
+        """Account for ``lengths`` scored as buckets of ``batch_size``."""
+        for bucket in plan_buckets(lengths, batch_size):
+            bucket_lengths = [lengths[index] for index in bucket]
+            self.real_tokens += sum(bucket_lengths)
+            self.padded_tokens += max(bucket_lengths) * len(bucket_lengths)
+            self.batches += 1
+        for start in range(0, len(lengths), batch_size):
+            naive = lengths[start : start + batch_size]
+            self.naive_padded_tokens += max(naive) * len(naive)
+
+    def merge(self, other: "PaddingStats") -> None:
+        self.real_tokens += other.real_tokens
+        self.padded_tokens += other.padded_tokens
+        self.naive_padded_tokens += other.naive_padded_tokens
+        self.batches += other.batches
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "real_tokens": self.real_tokens,
+            "padded_tokens": self.padded_tokens,
+            "naive_padded_tokens": self.naive_padded_tokens,
+            "efficiency": round(self.efficiency, 4),
+            "naive_efficiency": round(self.naive_efficiency, 4),
+        }
+
+
+def plan_buckets(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """Group indices into batches of similar token length.
+
+    Indices are sorted by length and cut into runs of ``batch_size`` so short
+    tweets never get padded to the size of a long article. Callers scatter the
+    results back by index, so the original order is preserved.
+    """
+    batch_size = max(1, batch_size)
+    order = sorted(range(len(lengths)), key=lambda index: lengths[index])
+    return [order[start : start + batch_size] for start in range(0, len(order), batch_size)]
@@ -0,0 +1,23 @@
+"""Offline inference throughput benchmarks against a stub model.
+
+Usage::
+
+    python -m sentiment_service.benchmarks                                  # torch, batch sizes 1/8/32
+    python -m sentiment_service.benchmarks --backends torch,onnx,pool --batch-sizes 8,32,64
+    python -m sentiment_service.benchmarks --output base.json               # save results
+    python -m sentiment_service.benchmarks --compare base.json              # run and diff against a saved file
+
+Each (backend, batch size) case loads a tiny randomly initialized BERT (see
+:mod:`.stub`) in a fresh process and scores a seeded synthetic corpus (see
+:mod:`.corpus`) through ``predict_batch``. The case reports items/s,
+tokens/s, p50/p99 batch latency and peak RSS. Nothing is downloaded and no
+database is needed. Results are JSON with the git commit and library
+versions, so runs on two branches can be compared. Settings such as
+``SENTIMENT_MAX_LENGTH``, ``SENTIMENT_CHUNKING`` and
+``SENTIMENT_THREADS_PER_PROCESS`` apply as they would in the worker.
+"""
+from .corpus import synthetic_corpus
+from .runner import BenchmarkCase, compare, run_case
+from .stub import StubConfig, build_stub_model
+
+__all__ = ["BenchmarkCase", "StubConfig", "build_stub_model", "compare", "run_case", "synthetic_corpus"]
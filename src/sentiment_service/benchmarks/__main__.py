@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List
+
+from ..config import get_settings
+from . import __doc__ as package_doc
+from .corpus import describe, synthetic_corpus
+from .runner import BACKENDS, BenchmarkCase, case_settings, compare, environment, run_case, run_isolated
+from .stub import StubConfig, build_stub_model
+
+logger = logging.getLogger("sentiment_service.benchmarks")
+
+DEFAULT_DIR = Path("data/benchmarks")
+
+
+def _sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",") if size]
+
+
+def _backends(value: str) -> List[str]:
+    backends = [backend for backend in value.split(",") if backend]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown backend(s) {', '.join(sorted(unknown))}; choose from {', '.join(BACKENDS)}")
+    return backends
+
+
+def _format_table(results: List[Dict[str, object]], changes: Dict[str, Dict[str, object]]) -> str:
+    header = f"{'case':<12} {'items/s':>9} {'tokens/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak MB':>8}"
+    lines = [header]
+    for result in results:
+        line = "{case:<12} {items_per_second:>9} {tokens_per_second:>10} {latency_p50_ms:>9} {latency_p99_ms:>9} {peak_rss_mb:>8}".format(
+            **result
+        )
+        change = changes.get(result["case"])
+        if change:
+            line += "   vs baseline: " + ", ".join(
+                f"{metric} {value:+.1f}%" for metric, value in change.items() if metric != "case" and value is not None
+            )
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=package_doc.splitlines()[0])
+    parser.add_argument("--backends", type=_backends, default=["torch"], help=f"comma-separated, from {', '.join(BACKENDS)}")
+    parser.add_argument("--batch-sizes", type=_sizes, default=[1, 8, 32], help="comma-separated batch sizes")
+    parser.add_argument("--items", type=int, default=512, help="synthetic texts scored per case")
+    parser.add_argument("--warmup-batches", type=int, default=2, help="untimed batches before each case")
+    parser.add_argument("--seed", type=int, default=0, help="corpus and weight seed")
+    parser.add_argument("--hidden-size", type=int, default=StubConfig.hidden_size)
+    parser.add_argument("--layers", type=int, default=StubConfig.layers)
+    parser.add_argument("--model-dir", type=Path, default=DEFAULT_DIR / "stub-model", help="where the stub model is kept")
+    parser.add_argument("--output", type=Path, help="results file (defaults to data/benchmarks/<branch>-<commit>-<time>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    stub = StubConfig(
+        hidden_size=args.hidden_size,
+        layers=args.layers,
+        heads=max(1, args.hidden_size // 64),
+        intermediate_size=args.hidden_size * 4,
+        max_positions=max(512, settings.max_length),
+        seed=args.seed,
+    )
+    model_path = build_stub_model(args.model_dir, stub).resolve()
+    texts = synthetic_corpus(args.items, seed=args.seed)
+    cases = [BenchmarkCase(backend, size) for backend in args.backends for size in args.batch_sizes]
+    if "onnx" in args.backends:
+        # export once up front so the first onnx case does not pay for it in load time and RSS
+        run_isolated(run_case, case_settings(settings, model_path, BenchmarkCase("onnx", 1)), BenchmarkCase("onnx", 1), texts[:1], 0)
+    results = []
+    for case in cases:
+        logger.info("Running %s", case.name)
+        results.append(run_isolated(run_case, case_settings(settings, model_path, case), case, texts, args.warmup_batches))
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": environment(),
+        "stub": asdict(stub),
+        "corpus": {"seed": args.seed, **describe(texts)},
+        "settings": {
+            "max_length": settings.max_length,
+            "chunking": settings.chunking,
+            "max_chunks": settings.max_chunks,
+            "threads_per_process": settings.threads_per_process,
+            "pool_processes": settings.pool_processes,
+            "onnx_quantize": settings.onnx_quantize,
+            "device": settings.device,
+        },
+        "results": results,
+    }
+    changes: Dict[str, Dict[str, object]] = {}
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        report["baseline"] = {"path": str(args.compare), "git_commit": baseline.get("environment", {}).get("git_commit")}
+        report["changes_percent"] = compare(report, baseline)
+        changes = {row["case"]: row for row in report["changes_percent"]}
+    output = args.output
+    if output is None:
+        env = report["environment"]
+        output = DEFAULT_DIR / "{}-{}-{}.json".format(
+            (env["git_branch"] or "nogit").replace("/", "-"),
+            (env["git_commit"] or "unknown")[:8],
+            time.strftime("%Y%m%dT%H%M%S"),
+        )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(_format_table(results, changes))
+    print(f"Results written to {output}")
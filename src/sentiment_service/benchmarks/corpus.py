@@ -0,0 +1,104 @@
+"""Synthetic texts shaped like the items the worker actually scores.
+
+Lengths follow a log-normal mix per kind of item: short tweets, news
+snippets and the occasional full article that runs past ``max_length``.
+Words are drawn Zipf-style from a fixed Indonesian/English vocabulary, and
+tweets carry mentions, hashtags and numbers the stub tokenizer has to split
+into pieces. The same seed always yields the same corpus.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+WORDS = (
+    "yang dan di ini itu dengan untuk tidak dari dalam akan pada juga ke karena tersebut bisa ada "
+    "mereka lebih sudah saya kami kita oleh harus masih hanya baru telah setelah namun tahun hari "
+    "pemerintah harga bahan pokok naik turun bulan minggu rakyat presiden menteri kebijakan subsidi "
+    "bbm listrik beras minyak goreng inflasi ekonomi pasar saham rupiah dolar bank kredit pajak "
+    "pelayanan publik rumah sakit sekolah jalan tol banjir macet kereta bandara pesawat penumpang "
+    "bagus buruk senang kecewa marah puas mahal murah cepat lambat baik jelek parah mantap keren "
+    "sangat sekali banget kurang terlalu cukup semakin tetap jangan tolong terima kasih mohon maaf "
+    "the and to of a in is that for it was on with as this but are not be have you they great bad "
+    "service price government people new good slow fast really very love hate best worst today "
+    "news report update says said minister market economy fuel rice oil traffic flood airport"
+).split()
+
+PUNCTUATION = (".", ",", "!", "?", "...")
+
+
+@dataclass(frozen=True)
+class LengthProfile:
+    """Word-count distribution for one kind of item."""
+
+    kind: str
+    share: float
+    median_words: int
+    sigma: float
+    max_words: int
+
+
+PROFILES = (
+    LengthProfile("tweet", 0.55, 18, 0.5, 70),
+    LengthProfile("snippet", 0.30, 45, 0.4, 160),
+    LengthProfile("article", 0.15, 320, 0.6, 2000),
+)
+
+
+def vocabulary() -> List[str]:
+    """Every word the corpus draws from, for building the stub tokenizer's vocabulary."""
+    return sorted(set(WORDS))
+
+
+def synthetic_corpus(items: int, seed: int = 0, profiles: Sequence[LengthProfile] = PROFILES) -> List[str]:
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+    ranks = np.arange(1, len(words) + 1, dtype=np.float64)
+    weights = ranks**-1.1
+    weights /= weights.sum()
+    shares = np.array([profile.share for profile in profiles])
+    kinds = rng.choice(len(profiles), size=items, p=shares / shares.sum())
+    texts = []
+    for kind in kinds:
+        profile = profiles[kind]
+        count = int(np.clip(rng.lognormal(np.log(profile.median_words), profile.sigma), 1, profile.max_words))
+        tokens = list(rng.choice(words, size=count, p=weights))
+        if profile.kind == "tweet":
+            _decorate_tweet(tokens, rng)
+        texts.append(_punctuate(tokens, rng))
+    return texts
+
+
+def describe(texts: Sequence[str]) -> Dict[str, object]:
+    counts = np.array([len(text.split()) for text in texts])
+    if not counts.size:
+        return {"items": 0}
+    return {
+        "items": int(counts.size),
+        "words_p50": float(np.percentile(counts, 50)),
+        "words_p90": float(np.percentile(counts, 90)),
+        "words_p99": float(np.percentile(counts, 99)),
+        "words_max": int(counts.max()),
+    }
+
+
+def _decorate_tweet(tokens: List[str], rng: np.random.Generator) -> None:
+    if rng.random() < 0.4:
+        tokens.insert(0, f"@user{rng.integers(1, 10_000)}")
+    if rng.random() < 0.3:
+        tokens.append(f"#{rng.choice(WORDS)}{rng.choice(WORDS)}")
+    if rng.random() < 0.2:
+        tokens.insert(int(rng.integers(0, len(tokens) + 1)), f"{rng.integers(1, 100)}rb")
+
+
+def _punctuate(tokens: List[str], rng: np.random.Generator) -> str:
+    # a sentence break every ~12 words keeps the text from being one run-on clause
+    out = []
+    for index, token in enumerate(tokens, 1):
+        if index % 12 == 0 or index == len(tokens):
+            token += PUNCTUATION[int(rng.integers(0, len(PUNCTUATION)))]
+        out.append(token)
+    out[0] = out[0].capitalize()
+    return " ".join(out)
@@ -0,0 +1,199 @@
+"""Time each (backend, batch size) case in its own process and compare runs."""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..autotune import resident_memory_bytes
+from ..batching import PaddingStats
+from ..config import Settings
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "pool")
+
+# (metric, higher is better) pairs compared between runs
+COMPARED_METRICS = (
+    ("items_per_second", True),
+    ("tokens_per_second", True),
+    ("latency_p50_ms", False),
+    ("latency_p99_ms", False),
+    ("peak_rss_mb", False),
+)
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    backend: str
+    batch_size: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.backend}/{self.batch_size}"
+
+
+def case_settings(base: Settings, model_path: Path, case: BenchmarkCase) -> Settings:
+    """``base`` pointed at the stub model, with the case's backend and batch size."""
+    return base.model_copy(
+        update={
+            "model_name": str(model_path),
+            "model_revision": None,
+            "model_version": "stub",
+            "artifact_dir": None,
+            "backend": "torch" if case.backend == "pool" else case.backend,
+            "inference_batch_size": case.batch_size,
+            "onnx_cache_dir": model_path / "onnx",
+            "inference_socket": None,
+        }
+    )
+
+
+def run_case(settings: Settings, case: BenchmarkCase, texts: Sequence[str], warmup_batches: int) -> Dict[str, object]:
+    """Load the model and feed ``texts`` through ``predict_batch`` in slices of the batch size.
+
+    Meant to run in a fresh process, so the peak RSS belongs to this case alone.
+    """
+    from ..model import SentimentModel
+    from ..pool import ScoringPool
+
+    rss_before = resident_memory_bytes()
+    started = time.perf_counter()
+    model = ScoringPool(settings) if case.backend == "pool" else SentimentModel.from_settings(settings)
+    batches = [list(texts[start : start + case.batch_size]) for start in range(0, len(texts), case.batch_size)]
+    for batch in batches[:warmup_batches]:
+        model.predict_batch(batch)
+    load_seconds = time.perf_counter() - started
+    stats = PaddingStats()
+    latencies = []
+    failed = 0
+    timed_started = time.perf_counter()
+    for batch in batches:
+        batch_started = time.perf_counter()
+        predictions = model.predict_batch(batch, padding_stats=stats)
+        latencies.append(time.perf_counter() - batch_started)
+        failed += sum(1 for prediction in predictions if not prediction.ok)
+    seconds = time.perf_counter() - timed_started
+    # read before the pool shuts down, while its processes are still there to ask
+    children = max((_peak_rss_bytes(str(child.pid)) for child in multiprocessing.active_children()), default=0)
+    if isinstance(model, ScoringPool):
+        model.close()
+    latency_ms = np.array(latencies) * 1000
+    return {
+        "case": case.name,
+        "backend": case.backend,
+        "batch_size": case.batch_size,
+        "items": len(texts),
+        "failed": failed,
+        "batches": len(batches),
+        "seconds": round(seconds, 4),
+        "load_seconds": round(load_seconds, 3),
+        "items_per_second": round(len(texts) / seconds, 2) if seconds else None,
+        "tokens_per_second": round(stats.real_tokens / seconds, 1) if seconds else None,
+        "real_tokens": stats.real_tokens,
+        "padding_efficiency": round(stats.efficiency, 4),
+        "latency_p50_ms": round(float(np.percentile(latency_ms, 50)), 3) if latencies else None,
+        "latency_p99_ms": round(float(np.percentile(latency_ms, 99)), 3) if latencies else None,
+        "latency_mean_ms": round(float(latency_ms.mean()), 3) if latencies else None,
+        "rss_before_load_mb": round(rss_before / 1e6, 1),
+        "peak_rss_mb": round(_peak_rss_bytes() / 1e6, 1),
+        # pool processes load their own copy of the model; the largest one is reported here
+        "peak_child_rss_mb": round(children / 1e6, 1) if children else None,
+    }
+
+
+def run_isolated(function: Callable[..., Dict[str, object]], *args) -> Dict[str, object]:
+    """Call ``function(*args)`` in a freshly spawned process and return its result."""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_call, args=(sender, function, args))
+    process.start()
+    sender.close()
+    try:
+        ok, result = receiver.recv()
+    except EOFError:
+        ok, result = False, f"benchmark process exited with code {process.exitcode}"
+    process.join()
+    if not ok:
+        raise RuntimeError(result)
+    return result
+
+
+def _call(sender, function, args) -> None:
+    try:
+        sender.send((True, function(*args)))
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Benchmark case failed")
+        sender.send((False, f"{type(exc).__name__}: {exc}"))
+    finally:
+        sender.close()
+
+
+def _peak_rss_bytes(pid: str = "self") -> int:
+    # VmHWM starts over at exec; ru_maxrss would carry the spawning parent's peak into the case
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if pid != "self":
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def environment() -> Dict[str, object]:
+    """Enough about the machine and checkout to tell two result files apart."""
+    import torch
+    import transformers
+
+    return {
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_branch": _git("rev-parse", "--abbrev-ref", "HEAD"),
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "transformers": transformers.__version__,
+        "platform": platform.platform(),
+        "cpus": multiprocessing.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        completed = subprocess.run(["git", *args], capture_output=True, text=True, timeout=10, check=True)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip()
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object]) -> List[Dict[str, object]]:
+    """Per-case change of each metric against ``baseline``, as a percentage (positive = better)."""
+    previous = {result["case"]: result for result in baseline.get("results", [])}
+    rows = []
+    for result in current.get("results", []):
+        before = previous.get(result["case"])
+        if before is None:
+            continue
+        row: Dict[str, object] = {"case": result["case"]}
+        for metric, higher_is_better in COMPARED_METRICS:
+            new, old = result.get(metric), before.get(metric)
+            if not new or not old:
+                row[metric] = None
+                continue
+            change = (new - old) / old * 100
+            row[metric] = round(change if higher_is_better else -change, 1)
+        rows.append(row)
+    return rows
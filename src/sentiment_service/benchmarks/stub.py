@@ -0,0 +1,80 @@
+"""A tiny, randomly initialized BERT classifier that needs no download.
+
+It is a ``BertForSequenceClassification`` with a WordPiece tokenizer built
+from the corpus vocabulary plus single-character pieces, the same classes
+the production IndoBERT checkpoint loads through. It goes through the same
+``SentimentModel`` code paths for tokenization, bucketing, chunking, the
+ONNX export and the scoring pool. Its scores are meaningless; only its
+speed matters. The weights are seeded, so the stub is identical on every
+machine.
+"""
+from __future__ import annotations
+
+import json
+import shutil
+import string
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict
+
+import torch
+
+from .corpus import vocabulary
+
+STUB_MANIFEST = "stub.json"
+
+_SPECIAL_TOKENS = ("[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]")
+
+
+@dataclass(frozen=True)
+class StubConfig:
+    hidden_size: int = 128
+    layers: int = 2
+    heads: int = 2
+    intermediate_size: int = 512
+    max_positions: int = 512
+    seed: int = 0
+
+
+def build_stub_model(path: Path, config: StubConfig = StubConfig()) -> Path:
+    """Write the stub model and tokenizer to ``path`` unless an identical one is already there."""
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    path = Path(path)
+    if stub_config(path) == asdict(config):
+        return path
+    staging = path.with_name(f"{path.name}.partial")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    vocab = list(_SPECIAL_TOKENS)
+    vocab += list(string.ascii_lowercase + string.digits + string.punctuation)
+    vocab += [f"##{char}" for char in string.ascii_lowercase + string.digits]
+    vocab += [word for word in vocabulary() if word not in vocab]
+    (staging / "vocab.txt").write_text("\n".join(vocab) + "\n", encoding="utf-8")
+    tokenizer = BertTokenizerFast(vocab_file=str(staging / "vocab.txt"), do_lower_case=True)
+    torch.manual_seed(config.seed)
+    model = BertForSequenceClassification(
+        BertConfig(
+            vocab_size=len(vocab),
+            hidden_size=config.hidden_size,
+            num_hidden_layers=config.layers,
+            num_attention_heads=config.heads,
+            intermediate_size=config.intermediate_size,
+            max_position_embeddings=config.max_positions,
+            num_labels=3,
+        )
+    )
+    model.save_pretrained(staging)
+    tokenizer.save_pretrained(staging)
+    (staging / STUB_MANIFEST).write_text(json.dumps(asdict(config), indent=2), encoding="utf-8")
+    if path.exists():
+        shutil.rmtree(path)
+    staging.rename(path)
+    return path
+
+
+def stub_config(path: Path) -> Dict[str, object] | None:
+    try:
+        return json.loads((Path(path) / STUB_MANIFEST).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,194 @@
+"""Content-hash inference cache shared by the worker and the API."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .batching import PaddingStats
+from .model import Prediction, SentimentModel
+from .repository import CachedScores, SentimentRepository
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for hashing: NFC with collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class InferenceCache:
+    """Two-tier score cache keyed by (text hash, model name, model version).
+
+    A bounded in-memory LRU sits in front of the ``inference_cache`` table.
+    ``model_version`` is the full cache version (model version plus scoring
+    configuration). When the cache is created, only rows from other
+    ``base_version``s of the model are purged. Processes that score the same
+    model version with different settings share the table without wiping
+    each other's rows, and a version bump still never serves stale scores.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        model_version: str,
+        max_entries: int = 10_000,
+        repository: Optional[SentimentRepository] = None,
+        base_version: Optional[str] = None,
+    ) -> None:
+        self.model_name = model_name
+        self.model_version = model_version
+        self.max_entries = max(0, max_entries)
+        self._repository = repository
+        self._entries: "OrderedDict[CacheKey, CachedScores]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        if self._repository is not None:
+            purged = self._repository.purge_cached_scores(model_name, keep_version=base_version or model_version)
+            if purged:
+                logger.info("Purged %s cached scores from older versions of %s", purged, model_name)
+
+    def predict_batch(
+        self,
+        model: SentimentModel,
+        texts: Sequence[str],
+        padding_stats: Optional[PaddingStats] = None,
+    ) -> List[Prediction]:
+        """Serve cached scores and run ``model`` only on unique misses."""
+        pending = lookup(self, texts)
+        scored = model.predict_batch(pending.texts(texts), padding_stats=padding_stats)
+        return complete(self, pending, scored)
+
+    def get_many(self, digests: set[str]) -> Dict[str, CachedScores]:
+        found: Dict[str, CachedScores] = {}
+        with self._lock:
+            for digest in digests:
+                key = self._key(digest)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[digest] = self._entries[key]
+            self.memory_hits += len(found)
+        missing = digests - found.keys()
+        if missing and self._repository is not None:
+            stored = self._repository.fetch_cached_scores(missing, self.model_name, self.model_version)
+            found.update(stored)
+            with self._lock:
+                self.db_hits += len(stored)
+                for digest, entry in stored.items():
+                    self._remember(digest, entry)
+        with self._lock:
+            self.misses += len(digests) - len(found)
+        return found
+
+    def put_many(self, scores_by_hash: Dict[str, CachedScores]) -> None:
+        if not scores_by_hash:
+            return
+        with self._lock:
+            for digest, entry in scores_by_hash.items():
+                self._remember(digest, entry)
+        if self._repository is not None:
+            self._repository.store_cached_scores(scores_by_hash, self.model_name, self.model_version)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "model_name": self.model_name,
+                "model_version": self.model_version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _key(self, digest: str) -> CacheKey:
+        return (digest, self.model_name, self.model_version)
+
+    def _remember(self, digest: str, entry: CachedScores) -> None:
+        if not self.max_entries:
+            return
+        key = self._key(digest)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+@dataclass
+class CacheLookup:
+    """Cache hits for a batch plus the unique texts that still need the model."""
+
+    predictions: List[Optional[Prediction]]
+    hashes: Dict[int, str] = field(default_factory=dict)
+    duplicates: Dict[str, List[int]] = field(default_factory=dict)
+    representatives: List[int] = field(default_factory=list)
+
+    def texts(self, texts: Sequence[str]) -> List[str]:
+        return [texts[index] for index in self.representatives]
+
+
+def lookup(cache: Optional[InferenceCache], texts: Sequence[str]) -> CacheLookup:
+    if cache is None:
+        return CacheLookup(predictions=[None] * len(texts), representatives=list(range(len(texts))))
+    result = CacheLookup(predictions=[None] * len(texts))
+    for index, text in enumerate(texts):
+        if text:
+            result.hashes[index] = text_hash(text)
+    cached = cache.get_many(set(result.hashes.values()))
+    for index, digest in result.hashes.items():
+        if digest in cached:
+            scores, annotations = cached[digest]
+            result.predictions[index] = Prediction(scores=dict(scores), annotations=dict(annotations))
+        else:
+            result.duplicates.setdefault(digest, []).append(index)
+    # empty texts still go through the model so the error stays identical
+    unhashed = [index for index in range(len(texts)) if index not in result.hashes]
+    result.representatives = [indices[0] for indices in result.duplicates.values()] + unhashed
+    return result
+
+
+def complete(cache: Optional[InferenceCache], pending: CacheLookup, scored: Sequence[Prediction]) -> List[Prediction]:
+    """Merge model output for ``pending.representatives`` back into the batch."""
+    predictions = list(pending.predictions)
+    fresh: Dict[str, CachedScores] = {}
+    for index, prediction in zip(pending.representatives, scored):
+        digest = pending.hashes.get(index)
+        if digest is None:
+            predictions[index] = prediction
+            continue
+        if prediction.ok:
+            fresh[digest] = (prediction.scores, prediction.annotations)
+        for duplicate in pending.duplicates[digest]:
+            predictions[duplicate] = Prediction(
+                scores=dict(prediction.scores),
+                error=prediction.error,
+                annotations=dict(prediction.annotations),
+            )
+    if cache is not None:
+        cache.put_many(fresh)
+    return [prediction or Prediction(error="Not scored") for prediction in predictions]
+
+
+def predict_with_cache(
+    model: SentimentModel,
+    texts: Sequence[str],
+    cache: Optional[InferenceCache],
+    padding_stats: Optional[PaddingStats] = None,
+) -> List[Prediction]:
+    if cache is None:
+        return model.predict_batch(texts, padding_stats=padding_stats)
+    return cache.predict_batch(model, texts, padding_stats=padding_stats)
@@ -0,0 +1,61 @@
+"""Sliding-window chunking and score aggregation for long texts."""
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+AGGREGATIONS = ("mean", "length_weighted", "max_negative")
+
+
+def split_windows(ids: Sequence[int], window: int, overlap: int, max_chunks: int) -> List[List[int]]:
+    """Cut ``ids`` into windows of ``window`` tokens sharing ``overlap`` tokens.
+
+    At most ``max_chunks`` windows are produced; anything beyond is dropped so
+    one huge document cannot dominate a batch.
+    """
+    window = max(1, window)
+    step = _step(window, overlap)
+    windows: List[List[int]] = []
+    start = 0
+    while len(windows) < max(1, max_chunks):
+        windows.append(list(ids[start : start + window]))
+        if start + window >= len(ids):
+            break
+        start += step
+    return windows
+
+
+def max_tokens(window: int, overlap: int, max_chunks: int) -> int:
+    """Number of leading tokens that ``split_windows`` can possibly use."""
+    window = max(1, window)
+    return window + _step(window, overlap) * (max(1, max_chunks) - 1)
+
+
+def _step(window: int, overlap: int) -> int:
+    # overlap beyond half a window would make consecutive windows nearly identical
+    return max(1, window - min(max(0, overlap), window // 2))
+
+
+def aggregate(
+    window_scores: Sequence[Dict[str, float]],
+    window_lengths: Sequence[int],
+    strategy: str = "length_weighted",
+) -> Dict[str, float]:
+    """Combine per-window label scores into one score dict for the document."""
+    if not window_scores:
+        return {}
+    if len(window_scores) == 1:
+        return dict(window_scores[0])
+    if strategy == "max_negative":
+        return dict(max(window_scores, key=lambda scores: scores.get("negative", 0.0)))
+    if strategy == "mean":
+        weights = [1.0] * len(window_scores)
+    elif strategy == "length_weighted":
+        weights = [float(length) for length in window_lengths]
+    else:
+        raise ValueError(f"Unsupported chunk aggregation: {strategy}")
+    total = sum(weights) or 1.0
+    combined: Dict[str, float] = {}
+    for scores, weight in zip(window_scores, weights):
+        for label, score in scores.items():
+            combined[label] = combined.get(label, 0.0) + score * weight / total
+    return combined
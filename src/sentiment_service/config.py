@@ -1,10 +1,15 @@
 """Configuration for the sentiment worker."""
+import hashlib
 from functools import lru_cache
+from pathlib import Path
 from typing import Dict, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# inference_cache.model_version is a String(64)
+_CACHE_VERSION_LENGTH = 64
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -18,8 +23,63 @@ class Settings(BaseSettings):
     model_name: str = "mdhugol/indonesia-bert-sentiment-classification"
     model_revision: Optional[str] = None
     model_version: Optional[str] = None
+    model_routes: Dict[str, str] = Field(default_factory=dict)
+    artifact_dir: Optional[Path] = None
+    artifact_verify: bool = True
+    model_memory_budget_mb: Optional[float] = None
+    model_idle_seconds: Optional[float] = None
+    swap_warmup_items: int = 64
+    swap_state_path: Optional[Path] = Path("data/model_swap.json")
+    swap_poll_seconds: float = 2.0
     batch_limit: int = 32
+    inference_batch_size: int = 16
+    max_length: int = 512
+    backend: str = "torch"
+    onnx_quantize: bool = True
+    onnx_cache_dir: Path = Path("data/onnx")
+    chunking: bool = False
+    chunk_overlap: int = 64
+    max_chunks: int = 8
+    chunk_aggregation: str = "length_weighted"
     pipeline_stage: str = "batch"
+    lease_seconds: int = 300
+    max_scoring_attempts: int = 3
+    explain_max_tokens: int = 16384
+    priority_scheduling: bool = True
+    priority_max_wait_seconds: Optional[float] = 3600.0
+    priority_aged_share: float = 0.25
+    priority_requested_boost: int = 1000
+    poll_interval_min: float = 1.0
+    poll_interval_max: float = 60.0
+    pipelined: bool = False
+    autotune_enabled: bool = False
+    autotune_min_batch: int = 4
+    autotune_max_batch: int = 256
+    autotune_memory_ceiling_mb: Optional[float] = None
+    autotune_state_path: Optional[Path] = Path("data/autotune.json")
+    profiling_enabled: bool = True
+    profiling_history: int = 100
+    profiling_state_path: Optional[Path] = Path("data/profile.json")
+    backfill_page_size: int = 256
+    evaluation_page_size: int = 512
+    backfill_max_items_per_second: Optional[float] = None
+    backfill_nice: int = 10
+    backfill_stale_seconds: Optional[float] = 900.0
+    pipeline_queue_size: int = 2
+    pool_processes: int = 1
+    threads_per_process: Optional[int] = None
+    cpu_affinity: bool = False
+    inference_socket: Optional[Path] = None
+    inference_timeout: float = 30.0
+    microbatch_max_size: int = 32
+    microbatch_max_wait_ms: float = 10.0
+    cache_enabled: bool = True
+    cache_max_entries: int = 10_000
+    cache_persistent: bool = True
+    cascade_enabled: bool = False
+    cascade_threshold: float = 0.9
+    cascade_max_words: int = 48
+    cascade_lexicon_path: Optional[Path] = None
     device: Optional[str] = None
     label_mapping: Dict[str, str] = Field(
         default_factory=lambda: {
@@ -35,6 +95,35 @@ class Settings(BaseSettings):
         }
     )
 
+    @property
+    def effective_model_version(self) -> str:
+        return self.model_version or self.model_revision or "latest"
+
+    def for_route(self, model: str) -> "Settings":
+        """Copy of these settings for a ``model_routes`` entry (``name`` or ``name@revision``)."""
+        name, _, revision = model.partition("@")
+        if name == self.model_name and (revision or None) in (None, self.model_revision):
+            return self
+        return self.model_copy(update={"model_name": name, "model_revision": revision or None, "model_version": None})
+
+    @property
+    def cache_version(self) -> str:
+        """Model version plus any setting that changes scores for the same text.
+
+        Backend, quantization and truncation length are always part of it, so
+        the torch and int8 ONNX backends never serve each other's scores.
+        """
+        backend = f"onnx-{'int8' if self.onnx_quantize else 'fp32'}" if self.backend == "onnx" else self.backend
+        variant = f"{backend}-len{self.max_length}"
+        if self.chunking:
+            variant += f"+chunks{self.max_chunks}-overlap{self.chunk_overlap}-{self.chunk_aggregation}"
+        version = f"{self.effective_model_version}+{variant}"
+        if len(version) > _CACHE_VERSION_LENGTH:
+            # long revisions plus chunking overflow the column; a digest keeps the variants apart
+            digest = hashlib.sha1(variant.encode("utf-8")).hexdigest()[:12]
+            version = f"{self.effective_model_version}+{digest}"
+        return version
+
 
 @lru_cache
 def get_settings() -> Settings:
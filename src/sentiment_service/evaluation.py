@@ -0,0 +1,227 @@
+"""Score the served model against the ground-truth labels already in the database.
+
+Usage::
+
+    python -m sentiment_service.evaluation            # evaluate every labeled item
+    python -m sentiment_service.evaluation --limit N  # stop after N labeled items
+    python -m sentiment_service.evaluation --latest   # print the latest stored run and exit
+
+The job walks labeled items (``TextItem.labels``, e.g. from the Twitter CSV
+import) by keyset on ``id``, so memory stays flat however many there are.
+Items that already have a stored result for the model reuse its label; only
+the rest go through batched inference, and nothing is written back to
+``sentiment_results``. Labels are kept as int8 codes per route and the
+confusion matrix is a single ``bincount``, from which accuracy, macro F1 and
+per-class precision/recall follow. Each route's run is stored in
+``evaluation_runs``; ``GET /sentiment/accuracy`` serves the latest one.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import uuid
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ingestion_service.models import TextItem
+
+from .db import init_db
+from .repository import EvaluationRun
+from .worker import ScoringRoute, SentimentWorker
+
+logger = logging.getLogger(__name__)
+
+LABELS = ("negative", "neutral", "positive")
+
+
+def ground_truth(labels: Optional[Sequence[str]]) -> Optional[str]:
+    """The first sentiment label among an item's labels, ignoring topic tags and ``unknown``."""
+    for label in labels or ():
+        if label in LABELS:
+            return label
+    return None
+
+
+def confusion_matrix(truth: np.ndarray, predicted: np.ndarray, classes: int) -> np.ndarray:
+    """Rows are true labels, columns predicted ones."""
+    pairs = truth.astype(np.int64) * classes + predicted.astype(np.int64)
+    return np.bincount(pairs, minlength=classes * classes).reshape(classes, classes)
+
+
+def class_metrics(matrix: np.ndarray, labels: Sequence[str]) -> Dict[str, object]:
+    """Accuracy, macro F1 and per-class precision/recall/F1/support from a confusion matrix."""
+    total = int(matrix.sum())
+    hits = np.diag(matrix).astype(np.float64)
+    predicted = matrix.sum(axis=0).astype(np.float64)
+    support = matrix.sum(axis=1).astype(np.float64)
+    precision = np.divide(hits, predicted, out=np.zeros_like(hits), where=predicted > 0)
+    recall = np.divide(hits, support, out=np.zeros_like(hits), where=support > 0)
+    both = precision + recall
+    f1 = np.divide(2 * precision * recall, both, out=np.zeros_like(hits), where=both > 0)
+    # macro F1 over the classes that occur in the ground truth; predicted-only labels would just add zeros
+    present = support > 0
+    return {
+        "accuracy": round(float(hits.sum() / total), 6) if total else None,
+        "macro_f1": round(float(f1[present].mean()), 6) if present.any() else None,
+        "per_class": {
+            label: {
+                "precision": round(float(precision[index]), 6),
+                "recall": round(float(recall[index]), 6),
+                "f1": round(float(f1[index]), 6),
+                "support": int(support[index]),
+            }
+            for index, label in enumerate(labels)
+        },
+    }
+
+
+class _Tally:
+    """Label codes for one route, grown in place as pages arrive."""
+
+    def __init__(self, route: ScoringRoute) -> None:
+        self.route = route
+        self.labels: List[str] = list(LABELS)
+        self.codes: Dict[str, int] = {label: index for index, label in enumerate(LABELS)}
+        self.truth: List[np.ndarray] = []
+        self.predicted: List[np.ndarray] = []
+        self.reused = 0
+        self.failed = 0
+
+    def add(self, truth: List[str], predicted: List[str]) -> None:
+        for label in predicted:
+            if label not in self.codes:
+                # a model whose label_mapping leaves extra labels still gets a square matrix
+                self.codes[label] = len(self.labels)
+                self.labels.append(label)
+        self.truth.append(np.fromiter((self.codes[label] for label in truth), dtype=np.int8, count=len(truth)))
+        self.predicted.append(np.fromiter((self.codes[label] for label in predicted), dtype=np.int8, count=len(predicted)))
+
+    @property
+    def items(self) -> int:
+        return sum(len(chunk) for chunk in self.truth)
+
+    def run(self, started_at: datetime) -> EvaluationRun:
+        classes = len(self.labels)
+        truth = np.concatenate(self.truth) if self.truth else np.zeros(0, dtype=np.int8)
+        predicted = np.concatenate(self.predicted) if self.predicted else np.zeros(0, dtype=np.int8)
+        matrix = confusion_matrix(truth, predicted, classes)
+        metrics = class_metrics(matrix, self.labels)
+        return EvaluationRun(
+            id=str(uuid.uuid4()),
+            model_name=self.route.model_name,
+            model_version=self.route.model_version,
+            started_at=started_at,
+            finished_at=datetime.utcnow(),
+            items=int(truth.size),
+            reused=self.reused,
+            failed=self.failed,
+            accuracy=metrics["accuracy"],
+            macro_f1=metrics["macro_f1"],
+            labels=self.labels,
+            per_class=metrics["per_class"],
+            confusion=matrix.tolist(),
+        )
+
+
+class EvaluationJob:
+    def __init__(self, worker: SentimentWorker | None = None) -> None:
+        self.worker = worker or SentimentWorker()
+        self.settings = self.worker.settings
+        self.repository = self.worker.repository
+
+    def run(self, limit: int | None = None) -> List[EvaluationRun]:
+        started_at = datetime.utcnow()
+        tallies: Dict[int, _Tally] = {}
+        after_id: Optional[str] = None
+        seen = 0
+        while limit is None or seen < limit:
+            page_size = self.settings.evaluation_page_size
+            if limit is not None:
+                page_size = min(page_size, limit - seen)
+            page = self.repository.fetch_labeled_page(after_id, page_size)
+            if not page:
+                break
+            after_id = page[-1][0]
+            seen += len(page)
+            self._evaluate_page(page, tallies)
+            logger.info("Evaluated %s labeled items", sum(tally.items for tally in tallies.values()))
+        runs = []
+        for tally in tallies.values():
+            run = tally.run(started_at)
+            self.repository.save_evaluation(run)
+            logger.info(
+                "Evaluation of %s:%s: accuracy %s, macro F1 %s over %s items (%s reused, %s failed)",
+                run.model_name,
+                run.model_version,
+                run.accuracy,
+                run.macro_f1,
+                run.items,
+                run.reused,
+                run.failed,
+            )
+            runs.append(run)
+        return runs
+
+    def _evaluate_page(self, page: List[Tuple[str, Optional[str], List[str]]], tallies: Dict[int, _Tally]) -> None:
+        groups: Dict[int, Dict[str, str]] = {}
+        for text_item_id, language, labels in page:
+            truth = ground_truth(labels)
+            if truth is None:
+                continue
+            route = self.worker.route_for(language)
+            if id(route) not in tallies:
+                tallies[id(route)] = _Tally(route)
+            groups.setdefault(id(route), {})[text_item_id] = truth
+        for key, truths in groups.items():
+            tally = tallies[key]
+            route = tally.route
+            predicted = self.repository.result_labels(truths, route.model_name, route.model_version)
+            tally.reused += len(predicted)
+            missing = [text_item_id for text_item_id in truths if text_item_id not in predicted]
+            if missing:
+                predicted.update(self._predict(self.repository.fetch_items(missing), route, tally))
+            ids = [text_item_id for text_item_id in truths if text_item_id in predicted]
+            tally.add([truths[text_item_id] for text_item_id in ids], [predicted[text_item_id] for text_item_id in ids])
+
+    def _predict(self, items: List[TextItem], route: ScoringRoute, tally: _Tally) -> Dict[str, str]:
+        labels: Dict[str, str] = {}
+        batch_size = route.batch_size
+        for start in range(0, len(items), batch_size):
+            batch = items[start : start + batch_size]
+            for item, prediction in zip(batch, self.worker.predict_items(batch, route=route)):
+                if prediction.ok:
+                    labels[str(item.id)] = max(prediction.scores, key=prediction.scores.get)
+                else:
+                    tally.failed += 1
+        return labels
+
+
+def report(run: Optional[EvaluationRun]) -> Optional[Dict[str, object]]:
+    if run is None:
+        return None
+    data = asdict(run)
+    data["started_at"] = run.started_at.isoformat()
+    data["finished_at"] = run.finished_at.isoformat()
+    return data
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, help="stop after this many labeled items")
+    parser.add_argument("--latest", action="store_true", help="print the latest stored run for the model and exit")
+    args = parser.parse_args()
+    init_db()
+    worker = SentimentWorker()
+    try:
+        if args.latest:
+            latest = worker.repository.latest_evaluation(worker.settings.model_name, worker.model_version)
+            print(json.dumps(report(latest), indent=2))
+        else:
+            print(json.dumps([report(run) for run in EvaluationJob(worker).run(limit=args.limit)], indent=2))
+    finally:
+        worker.close()
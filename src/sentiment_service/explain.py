@@ -0,0 +1,145 @@
+"""Occlusion explanations: which words pushed an item towards its label.
+
+Each explanation removes one span of words at a time and rescores the
+variants together with the original text in a single ``predict_batch`` call.
+A span's importance is how much the stored label's probability drops without
+it, so it lies in [-1, 1]; negative importance marks words that argued
+against the label. Results keep ``{text, importance}`` per span, as the
+result contract has it, and the spans' character offsets in the summary. The cost is about
+``(spans + 1) × tokens in the text``, so the per-request token budget decides
+how many words share a span: short texts get one span per word, and long ones
+get coarser spans rather than a bigger bill.
+"""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ingestion_service.text_normalizer import approximate_tokens
+
+from .config import Settings
+from .model import Prediction
+
+METHOD = "occlusion"
+
+_WORD = re.compile(r"\S+")
+
+
+class ExplanationError(ValueError):
+    """The item cannot be explained within the request's limits."""
+
+
+@dataclass
+class Explanation:
+    label: str
+    base_score: float
+    words_per_span: int
+    tokens: int
+    truncated: bool
+    spans: List[Dict[str, object]] = field(default_factory=list)
+
+    def attributions(self) -> List[Dict[str, object]]:
+        """The spans as the result's ``explanations``: ``text`` and ``importance`` only."""
+        return [{"text": span["text"], "importance": span["importance"]} for span in self.spans]
+
+    def summary(self) -> Dict[str, object]:
+        """Everything else, including the spans' offsets, kept in the result's annotations."""
+        return {
+            "method": METHOD,
+            "label": self.label,
+            "base_score": self.base_score,
+            "words_per_span": self.words_per_span,
+            "tokens": self.tokens,
+            "truncated": self.truncated,
+            "offsets": [[span["start"], span["end"]] for span in self.spans],
+        }
+
+
+def explain(model, text: str, label: str, max_tokens: int, settings: Settings) -> Explanation:
+    """Attribute ``label`` on ``text`` to spans of words by leave-one-out occlusion.
+
+    ``model`` is anything with ``predict_batch``, including the scoring pool
+    and the sidecar client.
+    """
+    words, truncated = _scored_words(text, settings)
+    if not words:
+        raise ExplanationError("Text has no words to explain")
+    text_tokens = _count_tokens(model, text)
+    affordable = max_tokens // max(1, text_tokens) - 1
+    if affordable < 1:
+        raise ExplanationError(f"A {text_tokens}-token text needs a budget of at least {2 * text_tokens} tokens")
+    words_per_span = math.ceil(len(words) / min(len(words), affordable))
+    spans = [words[start : start + words_per_span] for start in range(0, len(words), words_per_span)]
+    variants = [text] + [_without(text, span[0][0], span[-1][1]) for span in spans]
+    predictions = model.predict_batch(variants)
+    base = _score(predictions[0], label)
+    if base is None:
+        raise ExplanationError(predictions[0].error or f"Model returned no {label!r} score")
+    explanation = Explanation(
+        label=label,
+        base_score=round(base, 6),
+        words_per_span=words_per_span,
+        tokens=text_tokens * len(variants),
+        truncated=truncated,
+    )
+    for span, prediction in zip(spans, predictions[1:]):
+        start, end = span[0][0], span[-1][1]
+        occluded = _score(prediction, label)
+        explanation.spans.append(
+            {
+                "start": start,
+                "end": end,
+                "text": text[start:end],
+                # an empty variant (the whole text was this span) carries the full score
+                "importance": round(base - (occluded if occluded is not None else 0.0), 6),
+            }
+        )
+    return explanation
+
+
+def _scored_words(text: str, settings: Settings) -> Tuple[List[Tuple[int, int]], bool]:
+    # words past what the model reads cannot move its score, so they are not worth a variant
+    limit = settings.max_length * (settings.max_chunks if settings.chunking else 1)
+    words: List[Tuple[int, int]] = []
+    tokens = 0
+    for match in _WORD.finditer(text or ""):
+        tokens += approximate_tokens(match.group())
+        if tokens > limit:
+            return words, True
+        words.append(match.span())
+    return words, False
+
+
+def _count_tokens(model, text: str) -> int:
+    encode = getattr(model, "encode", None)
+    if encode is not None:
+        return len(encode([text])[0])
+    # pool and sidecar clients have no tokenizer here; word/punctuation count is a close lower bound
+    return approximate_tokens(text) + 2
+
+
+def _without(text: str, start: int, end: int) -> str:
+    return f"{text[:start].rstrip()} {text[end:].lstrip()}".strip()
+
+
+def _score(prediction: Prediction, label: str) -> Optional[float]:
+    if not prediction.ok:
+        return None
+    return prediction.scores.get(label)
+
+
+def stored_spans(explanations: Sequence[Dict[str, object]], summary: Dict[str, object]) -> List[Dict[str, object]]:
+    """A result's stored ``explanations`` joined back with the offsets kept in its summary."""
+    offsets = summary.get("offsets") or []
+    return [
+        {"start": start, "end": end, "text": span["text"], "importance": span["importance"]}
+        for span, (start, end) in zip(explanations, offsets)
+    ]
+
+
+def top_spans(spans: Sequence[Dict[str, object]], limit: int) -> List[Dict[str, object]]:
+    """The ``limit`` spans with the largest absolute importance, in text order."""
+    ranked = sorted(spans, key=lambda span: -abs(float(span["importance"])))[:limit]
+    return sorted(ranked, key=lambda span: span["start"])
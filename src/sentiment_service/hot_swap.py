@@ -0,0 +1,238 @@
+"""Zero-downtime model swaps for long-running API, worker and sidecar processes.
+
+A swap loads the target model on a background thread and warms it with a
+batch of recently ingested texts. Only then does it swap the process-wide
+settings. Callers look the model up per batch, so new batches go to the new
+instance, while batches already holding the old one finish on it. The old
+instance is then dropped from the registry and its memory is released once
+the last in-flight reference goes away.
+
+A swap requested through the API is also published to ``SWAP_STATE_PATH``.
+Every API process follows that file, so a swap reaches all uvicorn workers,
+including ones started after it.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+import weakref
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .config import Settings, get_settings
+from .db import SessionLocal
+from .registry import model_key, registry
+from .repository import SentimentRepository
+
+logger = logging.getLogger(__name__)
+
+_FALLBACK_WARMUP = ("warm up", "Harga bahan pokok naik lagi bulan ini.", "The service was great and fast.")
+
+
+class SwapInProgress(RuntimeError):
+    """Another swap is still loading or warming."""
+
+
+@dataclass
+class SwapStatus:
+    state: str = "idle"
+    current: str = ""
+    target: Optional[str] = None
+    requested_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+    warmup_items: int = 0
+    error: Optional[str] = None
+
+
+def describe(settings: Settings) -> str:
+    return f"{settings.model_name}:{settings.effective_model_version}"
+
+
+class ModelSwapper:
+    """Holds the settings this process scores with and swaps them without downtime."""
+
+    def __init__(self, settings: Optional[Settings] = None, local: bool = False) -> None:
+        self._settings = settings
+        # local: always load the model in this process, even when an inference socket is configured
+        self.local = local
+        self._subscribers: List[weakref.WeakMethod | Callable[[Settings], None]] = []
+        self._status = SwapStatus()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._follower: Optional[threading.Thread] = None
+        # id of the last published swap this process has applied or published itself
+        self._applied: Optional[str] = None
+
+    @property
+    def settings(self) -> Settings:
+        if self._settings is None:
+            self._settings = get_settings()
+        return self._settings
+
+    def subscribe(self, callback: Callable[[Settings], None]) -> None:
+        """Call ``callback(new_settings)`` after each swap; bound methods are held weakly."""
+        reference = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else callback
+        with self._lock:
+            self._subscribers.append(reference)
+
+    def status(self) -> dict:
+        with self._lock:
+            status = asdict(self._status)
+        status["current"] = describe(self.settings)
+        return status
+
+    def request(self, target: Settings) -> dict:
+        """Start swapping to ``target``; raises :class:`SwapInProgress` if one is running."""
+        if self.local:
+            target = target.model_copy(update={"inference_socket": None})
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                raise SwapInProgress(f"Already swapping to {self._status.target}")
+            self._status = SwapStatus(state="loading", target=describe(target), requested_at=time.time())
+            self._thread = threading.Thread(target=self._swap, args=(target,), name="sentiment-model-swap", daemon=True)
+        self._thread.start()
+        return self.status()
+
+    def publish(self, changes: Dict[str, object]) -> dict:
+        """Swap this process to ``changes`` and publish them for the processes following ``SWAP_STATE_PATH``."""
+        status = self.request(self.settings.model_copy(update=changes))
+        path = self.settings.swap_state_path
+        if path is not None:
+            record = {"id": uuid.uuid4().hex, "requested_at": time.time(), "changes": changes}
+            self._applied = record["id"]
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                temporary = path.with_suffix(".tmp")
+                temporary.write_text(json.dumps(record), encoding="utf-8")
+                temporary.replace(path)
+            except OSError:
+                logger.exception("Could not publish the model swap to %s", path)
+        return status
+
+    def follow(self) -> None:
+        """Apply swaps other processes publish to ``SWAP_STATE_PATH``, polling every ``SWAP_POLL_SECONDS``."""
+        if self.settings.swap_state_path is None:
+            return
+        with self._lock:
+            if self._follower is not None:
+                return
+            self._follower = threading.Thread(target=self._follow, name="sentiment-model-follow", daemon=True)
+        self._follower.start()
+
+    def reload(self) -> Optional[dict]:
+        """Swap to whatever the environment and ``.env`` configure now (the SIGHUP handler)."""
+        try:
+            return self.request(Settings())
+        except SwapInProgress as exc:
+            logger.warning("Ignoring reload: %s", exc)
+        except ValueError:
+            logger.exception("Ignoring reload: the new configuration is invalid")
+        return None
+
+    def wait(self, timeout: Optional[float] = None) -> dict:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.status()
+
+    def _swap(self, target: Settings) -> None:
+        previous = self.settings
+        try:
+            started = time.perf_counter()
+            model = self._load(target)
+            loaded = time.perf_counter()
+            self._update(state="warming", load_seconds=round(loaded - started, 3))
+            texts = self._warmup_texts(target)
+            if not target.inference_socket:
+                for start in range(0, len(texts), target.inference_batch_size):
+                    model.predict_batch(texts[start : start + target.inference_batch_size])
+                registry.install(target, model)
+            del model
+            self._update(warmup_seconds=round(time.perf_counter() - loaded, 3), warmup_items=len(texts))
+            self._settings = target
+            for callback in self._callbacks():
+                callback(target)
+            if model_key(previous) != model_key(target):
+                registry.discard(previous)
+            self._update(state="swapped", finished_at=time.time())
+            logger.info("Swapped sentiment model %s -> %s", describe(previous), describe(target))
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("Swapping to %s failed; still serving %s", describe(target), describe(previous))
+            self._update(state="failed", error=str(exc), finished_at=time.time())
+
+    def _follow(self) -> None:
+        while True:
+            try:
+                self._apply_published()
+            except Exception:  # noqa: BLE001
+                logger.exception("Could not apply the published model swap")
+            time.sleep(self.settings.swap_poll_seconds)
+
+    def _apply_published(self) -> None:
+        path = self.settings.swap_state_path
+        record = _load_published(path) if path is not None else None
+        if record is None or record.get("id") == self._applied:
+            return
+        target = self.settings.model_copy(update=record.get("changes") or {})
+        if model_key(target) != model_key(self.settings) or describe(target) != describe(self.settings):
+            try:
+                self.request(target)
+            except SwapInProgress:
+                return  # picked up again on the next poll
+            logger.info("Following published model swap to %s", describe(target))
+        self._applied = record["id"]
+
+    def _load(self, target: Settings):
+        if target.inference_socket:
+            from .sidecar import InferenceClient
+
+            # the sidecar swaps on its own (SIGHUP); only follow once it serves the target
+            client = InferenceClient.from_settings(target)
+            client.info()
+            client.predict_batch(["warm up"])
+            client.close()
+            return client
+        return registry.load(target)
+
+    def _warmup_texts(self, target: Settings) -> List[str]:
+        try:
+            texts = SentimentRepository(SessionLocal).recent_texts(target.swap_warmup_items)
+        except Exception:  # noqa: BLE001
+            logger.warning("Could not read warm-up texts; using built-in samples", exc_info=True)
+            texts = []
+        return texts or list(_FALLBACK_WARMUP)
+
+    def _callbacks(self) -> List[Callable[[Settings], None]]:
+        with self._lock:
+            alive = []
+            for reference in self._subscribers:
+                callback = reference() if isinstance(reference, weakref.WeakMethod) else reference
+                if callback is not None:
+                    alive.append(callback)
+            self._subscribers = [
+                reference
+                for reference in self._subscribers
+                if not isinstance(reference, weakref.WeakMethod) or reference() is not None
+            ]
+        return alive
+
+    def _update(self, **changes) -> None:
+        with self._lock:
+            for name, value in changes.items():
+                setattr(self._status, name, value)
+
+
+def _load_published(path: Path) -> Optional[Dict[str, object]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+swapper = ModelSwapper()
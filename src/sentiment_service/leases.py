@@ -0,0 +1,75 @@
+"""Keep scoring leases alive while a batch is being worked on."""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from typing import Iterable
+from uuid import uuid4
+
+from .repository import SentimentRepository
+
+logger = logging.getLogger(__name__)
+
+
+def make_worker_id() -> str:
+    """Identifier that is unique per worker instance across hosts."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class LeaseKeeper:
+    """Background thread that renews a worker's leases until the block exits.
+
+    Leases are renewed every third of their lifetime, so a slow batch keeps
+    its items while a crashed worker's leases simply run out and the items
+    return to the queue.
+    """
+
+    def __init__(
+        self,
+        repository: SentimentRepository,
+        text_item_ids: Iterable[str],
+        model_name: str,
+        model_version: str,
+        worker_id: str,
+        lease_seconds: int,
+    ) -> None:
+        self._repository = repository
+        self._ids = [str(text_item_id) for text_item_id in text_item_ids]
+        self._model_name = model_name
+        self._model_version = model_version
+        self._worker_id = worker_id
+        self._lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._renew_loop, name="sentiment-lease-keeper", daemon=True)
+
+    def __enter__(self) -> "LeaseKeeper":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _renew_loop(self) -> None:
+        interval = max(1.0, self._lease_seconds / 3)
+        while not self._stop.wait(interval):
+            try:
+                renewed = self._repository.renew_leases(
+                    self._ids,
+                    self._model_name,
+                    self._model_version,
+                    self._worker_id,
+                    self._lease_seconds,
+                )
+                logger.debug("Renewed %s leases for %s", renewed, self._worker_id)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to renew scoring leases")
@@ -0,0 +1,258 @@
+"""Lexicon scorer that settles clear-cut short texts before the transformer.
+
+Usage::
+
+    python -m sentiment_service.lexicon --limit 512 --thresholds 0.8 0.9 0.95
+
+The report scores recent items with both the lexicon and the full model and
+lists, per threshold, the share of items the cascade would settle and how
+often those labels agree with the model.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from ingestion_service.orm import TextItemORM
+
+from .config import Settings, get_settings
+from .db import SessionLocal
+from .model import Prediction
+
+LABELS = ("negative", "neutral", "positive")
+
+LEXICONS: Dict[str, Dict[str, float]] = {
+    "id": {
+        "bagus": 2.0, "baik": 1.5, "senang": 2.0, "suka": 1.5, "hebat": 2.0, "mantap": 2.0,
+        "puas": 2.0, "sukses": 2.0, "berhasil": 1.5, "keren": 2.0, "cinta": 2.0, "indah": 1.5,
+        "nyaman": 1.5, "ramah": 1.5, "lancar": 1.5, "untung": 1.5, "meningkat": 1.0, "naik": 0.5,
+        "positif": 1.5, "aman": 1.0, "murah": 1.0, "cepat": 1.0, "mendukung": 1.0, "bangga": 2.0,
+        "buruk": -2.0, "jelek": -2.0, "kecewa": -2.0, "marah": -2.0, "benci": -2.5, "sedih": -2.0,
+        "gagal": -2.0, "rugi": -1.5, "parah": -2.0, "bohong": -2.0, "hancur": -2.0, "rusak": -2.0,
+        "korupsi": -2.0, "macet": -1.5, "lambat": -1.5, "lelet": -1.5, "payah": -2.0, "kesal": -2.0,
+        "bencana": -2.0, "krisis": -1.5, "takut": -1.5, "negatif": -1.5, "mahal": -1.0,
+        "menurun": -1.0, "turun": -0.5, "tewas": -2.0, "penipuan": -2.5,
+    },
+    "en": {
+        "good": 1.5, "great": 2.0, "excellent": 2.5, "love": 2.0, "happy": 2.0, "amazing": 2.5,
+        "best": 2.0, "awesome": 2.5, "nice": 1.5, "fantastic": 2.5, "success": 2.0, "win": 1.5,
+        "improve": 1.0, "growth": 1.0, "positive": 1.5, "like": 1.0, "recommend": 1.5, "strong": 1.0,
+        "thanks": 1.0, "proud": 2.0,
+        "bad": -2.0, "terrible": -2.5, "awful": -2.5, "hate": -2.5, "worst": -2.5, "poor": -1.5,
+        "sad": -2.0, "angry": -2.0, "fail": -2.0, "failed": -2.0, "crisis": -1.5, "loss": -1.5,
+        "decline": -1.0, "corruption": -2.0, "disappointed": -2.0, "broken": -2.0, "scam": -2.5,
+        "slow": -1.0, "negative": -1.5, "problem": -1.5, "killed": -2.0, "fraud": -2.5,
+    },
+}
+
+NEGATORS: Dict[str, frozenset] = {
+    "id": frozenset({"tidak", "tak", "bukan", "belum", "jangan", "gak", "nggak", "ga", "enggak", "kurang"}),
+    "en": frozenset({"not", "no", "never", "don't", "dont", "isn't", "wasn't", "without", "hardly", "nor"}),
+}
+
+# a negated term flips and is damped: "not bad" is milder than "good"
+_NEGATION_FACTOR = -0.8
+_NEUTRAL_PRIOR = 1.0
+_TOKEN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?", re.UNICODE)
+
+
+class LexiconScorer:
+    """Weighted term lexicon with short-range negation, scored a batch at a time.
+
+    Term lookup is a dict hit per token; polarity sums, negation and the
+    softmax over (negative, neutral, positive) run as numpy operations over
+    the whole batch. A neutral prior keeps texts with little or mixed
+    evidence below any useful confidence threshold.
+    """
+
+    def __init__(
+        self,
+        lexicons: Dict[str, Dict[str, float]],
+        negators: Dict[str, frozenset],
+    ) -> None:
+        self._lexicons = {language: dict(terms) for language, terms in lexicons.items()}
+        self._negators = {language: frozenset(words) for language, words in negators.items()}
+        # unknown languages fall back to every lexicon at once
+        self._lexicons[""] = {term: weight for terms in lexicons.values() for term, weight in terms.items()}
+        self._negators[""] = frozenset().union(*negators.values()) if negators else frozenset()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "LexiconScorer":
+        lexicons = {language: dict(terms) for language, terms in LEXICONS.items()}
+        if settings.cascade_lexicon_path:
+            for language, term, weight in _read_lexicon(settings.cascade_lexicon_path):
+                terms = lexicons.setdefault(language, {})
+                if weight:
+                    terms[term] = weight
+                else:
+                    terms.pop(term, None)
+        return cls(lexicons, NEGATORS)
+
+    def score(self, texts: Sequence[str], languages: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(probabilities, word_counts)``; probabilities follow :data:`LABELS`."""
+        owners: List[int] = []
+        weights: List[float] = []
+        negators: List[bool] = []
+        for index, (text, language) in enumerate(zip(texts, languages)):
+            key = language if language in self._lexicons else ""
+            lexicon, negation_words = self._lexicons[key], self._negators[key]
+            for token in _TOKEN.findall((text or "").lower()):
+                owners.append(index)
+                weights.append(lexicon.get(token, 0.0))
+                negators.append(token in negation_words)
+        count = len(texts)
+        owner = np.asarray(owners, dtype=np.int64)
+        weight = np.asarray(weights, dtype=np.float64)
+        negator = np.asarray(negators, dtype=bool)
+
+        # a term is negated when one of the two tokens before it, in the same text, is a negator
+        negated = np.zeros(len(owner), dtype=bool)
+        for distance in (1, 2):
+            if len(owner) > distance:
+                same_text = owner[distance:] == owner[:-distance]
+                negated[distance:] |= negator[:-distance] & same_text
+        signed = np.where(negated, weight * _NEGATION_FACTOR, weight)
+
+        positive = np.bincount(owner, weights=np.clip(signed, 0, None), minlength=count)
+        negative = np.bincount(owner, weights=np.clip(-signed, 0, None), minlength=count)
+        words = np.bincount(owner, minlength=count)
+        net = positive - negative
+        logits = np.stack([-net, np.full(count, _NEUTRAL_PRIOR), net], axis=1)
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities, words
+
+
+@dataclass
+class CascadeSplit:
+    """Items settled by the lexicon plus the indices that still need the model."""
+
+    predictions: List[Optional[Prediction]]
+    confidences: List[float] = field(default_factory=list)
+    remaining: List[int] = field(default_factory=list)
+
+    def texts(self, texts: Sequence[str]) -> List[str]:
+        return [texts[index] for index in self.remaining]
+
+
+class LexiconCascade:
+    """First stage that answers for short texts the lexicon is confident about."""
+
+    def __init__(self, scorer: LexiconScorer, threshold: float, max_words: int) -> None:
+        self.scorer = scorer
+        self.threshold = threshold
+        self.max_words = max_words
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "LexiconCascade":
+        return cls(LexiconScorer.from_settings(settings), settings.cascade_threshold, settings.cascade_max_words)
+
+    def split(self, texts: Sequence[str], languages: Sequence[Optional[str]]) -> CascadeSplit:
+        probabilities, words = self.scorer.score(texts, languages)
+        confidences = probabilities.max(axis=1)
+        result = CascadeSplit(predictions=[None] * len(texts), confidences=[float(value) for value in confidences])
+        confident = (confidences >= self.threshold) & (words > 0) & (words <= self.max_words)
+        for index, row in enumerate(probabilities):
+            if confident[index]:
+                result.predictions[index] = Prediction(
+                    scores={label: float(value) for label, value in zip(LABELS, row)},
+                    annotations={"cascade_stage": "lexicon", "lexicon_confidence": round(float(confidences[index]), 4)},
+                )
+            else:
+                result.remaining.append(index)
+        return result
+
+
+def settle(cascade: Optional[LexiconCascade], texts: Sequence[str], languages: Sequence[Optional[str]]) -> CascadeSplit:
+    if cascade is None:
+        return CascadeSplit(predictions=[None] * len(texts), remaining=list(range(len(texts))))
+    return cascade.split(texts, languages)
+
+
+def merge_settled(pending: CascadeSplit, scored: Sequence[Prediction]) -> List[Prediction]:
+    """Fill the model's predictions for ``pending.remaining`` back into the batch."""
+    predictions = list(pending.predictions)
+    for index, prediction in zip(pending.remaining, scored):
+        if pending.confidences and prediction.ok:
+            annotations = dict(prediction.annotations)
+            annotations.update(cascade_stage="model", lexicon_confidence=round(pending.confidences[index], 4))
+            prediction = Prediction(scores=prediction.scores, error=prediction.error, annotations=annotations)
+        predictions[index] = prediction
+    return [prediction or Prediction(error="Not scored") for prediction in predictions]
+
+
+def build_cascade(settings: Settings) -> Optional[LexiconCascade]:
+    return LexiconCascade.from_settings(settings) if settings.cascade_enabled else None
+
+
+def _read_lexicon(path: Path) -> List[Tuple[str, str, float]]:
+    """Rows of ``language<TAB>term<TAB>weight``; a zero weight removes a built-in term."""
+    with open(path, encoding="utf-8", newline="") as handle:
+        return [
+            (row[0].strip(), row[1].strip().lower(), float(row[2]))
+            for row in csv.reader(handle, delimiter="\t")
+            if len(row) >= 3 and not row[0].startswith("#")
+        ]
+
+
+def sample_items(limit: int) -> List[Tuple[str, str]]:
+    with SessionLocal() as session:
+        stmt = (
+            select(TextItemORM.body, TextItemORM.language)
+            .order_by(TextItemORM.ingested_at.desc())
+            .limit(limit)
+        )
+        return [(body, language) for body, language in session.execute(stmt).all() if body]
+
+
+def cascade_report(
+    items: Sequence[Tuple[str, str]],
+    settings: Settings,
+    thresholds: Sequence[float],
+) -> Dict[str, object]:
+    from .registry import get_model
+
+    texts = [text for text, _ in items]
+    languages = [language for _, language in items]
+    probabilities, words = LexiconScorer.from_settings(settings).score(texts, languages)
+    reference = get_model(settings).predict_batch(texts)
+    lexicon_labels = [LABELS[column] for column in probabilities.argmax(axis=1)]
+    confidences = probabilities.max(axis=1)
+    rows = []
+    for threshold in thresholds:
+        settled = agreed = 0
+        for index, prediction in enumerate(reference):
+            eligible = confidences[index] >= threshold and 0 < words[index] <= settings.cascade_max_words
+            if not (eligible and prediction.ok):
+                continue
+            settled += 1
+            agreed += lexicon_labels[index] == max(prediction.scores, key=prediction.scores.get)
+        rows.append(
+            {
+                "threshold": threshold,
+                "short_circuit_share": round(settled / len(texts), 4) if texts else None,
+                "agreement_with_model": round(agreed / settled, 4) if settled else None,
+            }
+        )
+    return {"items": len(texts), "max_words": settings.cascade_max_words, "thresholds": rows}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=512, help="number of recent text items to score")
+    parser.add_argument("--thresholds", type=float, nargs="+", help="confidence thresholds to compare")
+    args = parser.parse_args()
+    settings = get_settings()
+    report = cascade_report(sample_items(args.limit), settings, args.thresholds or [settings.cascade_threshold])
+    print(json.dumps(report, indent=2))
@@ -1,9 +1,32 @@
 """Wrapper around a Hugging Face sentiment model."""
 from __future__ import annotations
 
-from typing import Dict, Optional
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from transformers import pipeline
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+from . import artifacts
+from . import chunking as chunking_module
+from . import onnx_backend
+from .batching import PaddingStats, plan_buckets
+from .config import Settings
+from .profiling import profiler
+
+
+@dataclass
+class Prediction:
+    """Outcome of scoring a single text inside a batch."""
+
+    scores: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+    annotations: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and bool(self.scores)
 
 
 class SentimentModel:
@@ -13,32 +36,262 @@ class SentimentModel:
         revision: Optional[str] = None,
         device: Optional[str] = None,
         label_mapping: Optional[Dict[str, str]] = None,
+        max_length: int = 512,
+        batch_size: int = 16,
+        backend: str = "torch",
+        onnx_cache_dir: Optional[Path] = None,
+        onnx_quantize: bool = True,
+        intra_op_threads: Optional[int] = None,
+        chunking: bool = False,
+        chunk_overlap: int = 64,
+        max_chunks: int = 8,
+        chunk_aggregation: str = "length_weighted",
+        artifact_path: Optional[Path] = None,
     ) -> None:
-        kwargs = {
-            "task": "text-classification",
-            "model": model_name,
-            "tokenizer": model_name,
-            "return_all_scores": True,
-        }
-        if revision:
+        kwargs = {}
+        source = model_name
+        if artifact_path is not None:
+            # a prepared artifact never touches the hub
+            source, kwargs = str(artifact_path), {"local_files_only": True}
+        elif revision:
             kwargs["revision"] = revision
-        # transformers accepts either torch device id (int) or str like "cpu"
-        if device is not None:
-            kwargs["device"] = device
-        self._classifier = pipeline(**kwargs)
+        self.artifact_path = artifact_path
+        self._tokenizer = AutoTokenizer.from_pretrained(source, **kwargs)
+        self._device = _resolve_device(device)
+        self._model = None
+        self._onnx = None
+        self.backend = backend
+        if backend == "onnx":
+            path = onnx_backend.artifact_path(onnx_cache_dir or Path("data/onnx"), model_name, revision, onnx_quantize)
+            if not path.exists():
+                # the torch weights are only needed once, to produce the cached artifact
+                torch_model = AutoModelForSequenceClassification.from_pretrained(source, **kwargs)
+                onnx_backend.export_model(torch_model, path, quantize=onnx_quantize)
+                del torch_model
+            self._onnx = onnx_backend.OnnxClassifier(path, intra_op_threads=intra_op_threads)
+            config = AutoConfig.from_pretrained(source, **kwargs)
+        elif backend == "torch":
+            self._model = AutoModelForSequenceClassification.from_pretrained(source, **kwargs)
+            if artifact_path is not None and self._device.type == "cpu":
+                artifacts.map_weights(self._model, artifact_path)
+            self._model.to(self._device)
+            self._model.eval()
+            config = self._model.config
+        else:
+            raise ValueError(f"Unsupported sentiment backend: {backend}")
+        self._id2label = dict(config.id2label)
         self._label_mapping = {k.lower(): v for k, v in (label_mapping or {}).items()}
+        self.max_length = max_length
+        self.batch_size = max(1, batch_size)
+        if chunk_aggregation not in chunking_module.AGGREGATIONS:
+            raise ValueError(f"Unsupported chunk aggregation: {chunk_aggregation}")
+        self.chunking = chunking
+        self.chunk_overlap = chunk_overlap
+        self.max_chunks = max(1, max_chunks)
+        self.chunk_aggregation = chunk_aggregation
+        self._affixes = _special_affixes(self._tokenizer)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SentimentModel":
+        return cls(
+            model_name=settings.model_name,
+            revision=settings.model_revision,
+            device=settings.device,
+            label_mapping=settings.label_mapping,
+            max_length=settings.max_length,
+            batch_size=settings.inference_batch_size,
+            backend=settings.backend,
+            onnx_cache_dir=settings.onnx_cache_dir,
+            onnx_quantize=settings.onnx_quantize,
+            intra_op_threads=settings.threads_per_process,
+            chunking=settings.chunking,
+            chunk_overlap=settings.chunk_overlap,
+            max_chunks=settings.max_chunks,
+            chunk_aggregation=settings.chunk_aggregation,
+            artifact_path=artifacts.locate(settings),
+        )
+
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the weights, used for the registry's memory budget."""
+        if self._onnx is not None:
+            return self._onnx.path.stat().st_size
+        tensors = list(self._model.parameters()) + list(self._model.buffers())
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
 
     def predict(self, text: str) -> Dict[str, float]:
         """Return normalized scores keyed by canonical labels."""
-        if not text:
-            raise ValueError("Text is required for sentiment scoring")
-        raw_output = self._classifier(
-            text,
-            truncation=True,
-            max_length=512,
-            padding=True,
+        prediction = self.predict_batch([text])[0]
+        if prediction.error:
+            raise ValueError(prediction.error)
+        return prediction.scores
+
+    def predict_batch(
+        self,
+        texts: Sequence[str],
+        padding_stats: Optional[PaddingStats] = None,
+    ) -> List[Prediction]:
+        """Score many texts with as few forward passes as possible.
+
+        Results line up with ``texts``; failures are reported per item instead
+        of aborting the whole batch.
+        """
+        return self.score_windows(self.tokenize(texts), padding_stats=padding_stats)
+
+    def tokenize(self, texts: Sequence[str]) -> List[List[List[int]] | Prediction]:
+        """Turn each text into model-ready token windows.
+
+        Without chunking every text is a single window truncated to
+        ``max_length``. Texts that cannot be tokenized get a failed
+        ``Prediction`` in their slot instead.
+        """
+        tokenized: List[List[List[int]] | Prediction] = []
+        indices: List[int] = []
+        for index, text in enumerate(texts):
+            if not text:
+                tokenized.append(Prediction(error="Text is required for sentiment scoring"))
+            else:
+                tokenized.append(Prediction(error="Not scored"))
+                indices.append(index)
+        with profiler.stage("tokenize"):
+            windowed = self._windows_isolated([texts[index] for index in indices])
+        for index, windows in zip(indices, windowed):
+            tokenized[index] = windows
+        profiler.record_tokens(
+            [sum(len(ids) for ids in windows) for windows in windowed if not isinstance(windows, Prediction)]
         )
-        scores = _flatten_scores(raw_output)
+        return tokenized
+
+    def score_windows(
+        self,
+        tokenized: Sequence[List[List[int]] | Prediction],
+        padding_stats: Optional[PaddingStats] = None,
+    ) -> List[Prediction]:
+        """Score the output of :meth:`tokenize`.
+
+        Windows from every text share length buckets that are padded only to
+        their own maximum; window scores are then aggregated back per text.
+        """
+        windows: List[List[int]] = []
+        owners: List[int] = []
+        for index, item_windows in enumerate(tokenized):
+            if isinstance(item_windows, Prediction):
+                continue
+            windows.extend(item_windows)
+            owners.extend([index] * len(item_windows))
+        lengths = [len(ids) for ids in windows]
+        if padding_stats is not None:
+            padding_stats.record(lengths, self.batch_size)
+        window_scores: List[Dict[str, float] | Prediction] = [{} for _ in windows]
+        for bucket in plan_buckets(lengths, self.batch_size):
+            bucket_lengths = [lengths[position] for position in bucket]
+            profiler.record_padding(sum(bucket_lengths), max(bucket_lengths) * len(bucket_lengths))
+            try:
+                bucket_scores = self._score_ids([windows[position] for position in bucket])
+            except (RuntimeError, ValueError):
+                # Retry one by one so a single bad input does not fail its neighbours.
+                bucket_scores = [self._score_isolated(windows[position]) for position in bucket]
+            for position, scores in zip(bucket, bucket_scores):
+                window_scores[position] = scores
+
+        with profiler.stage("postprocess"):
+            return self._aggregate(tokenized, owners, lengths, window_scores)
+
+    def _aggregate(
+        self,
+        tokenized: Sequence[List[List[int]] | Prediction],
+        owners: List[int],
+        lengths: List[int],
+        window_scores: List[Dict[str, float] | Prediction],
+    ) -> List[Prediction]:
+        positions_by_owner: Dict[int, List[int]] = {}
+        for position, owner in enumerate(owners):
+            positions_by_owner.setdefault(owner, []).append(position)
+        predictions: List[Prediction] = []
+        for index, item_windows in enumerate(tokenized):
+            if isinstance(item_windows, Prediction):
+                predictions.append(item_windows)
+                continue
+            positions = positions_by_owner.get(index, [])
+            scored = [position for position in positions if isinstance(window_scores[position], dict) and window_scores[position]]
+            if not scored:
+                failures = [window_scores[position] for position in positions if isinstance(window_scores[position], Prediction)]
+                predictions.append(failures[0] if failures else Prediction(error="No scores returned"))
+                continue
+            scores = chunking_module.aggregate(
+                [window_scores[position] for position in scored],
+                [lengths[position] for position in scored],
+                self.chunk_aggregation,
+            )
+            annotations: Dict[str, object] = {"chunks": len(positions)} if self.chunking else {}
+            predictions.append(Prediction(scores=scores, annotations=annotations))
+        return predictions
+
+    def encode(self, texts: Sequence[str]) -> List[List[int]]:
+        """Tokenize ``texts`` into unpadded input ids truncated to ``max_length``."""
+        encoded = self._tokenizer(list(texts), truncation=True, max_length=self.max_length)
+        return encoded["input_ids"]
+
+    def _windows(self, texts: Sequence[str]) -> List[List[List[int]]]:
+        if not self.chunking:
+            return [[ids] for ids in self.encode(texts)]
+        prefix, suffix = self._affixes
+        body_length = self.max_length - len(prefix) - len(suffix)
+        limit = chunking_module.max_tokens(body_length, self.chunk_overlap, self.max_chunks)
+        # never tokenize more of a document than the chunk cap can use
+        encoded = self._tokenizer(list(texts), add_special_tokens=False, truncation=True, max_length=limit)
+        return [
+            [
+                prefix + window + suffix
+                for window in chunking_module.split_windows(ids, body_length, self.chunk_overlap, self.max_chunks)
+            ]
+            for ids in encoded["input_ids"]
+        ]
+
+    def _windows_isolated(self, texts: List[str]) -> List[List[List[int]] | Prediction]:
+        if not texts:
+            return []
+        try:
+            return list(self._windows(texts))
+        except (TypeError, ValueError):
+            pass
+        windows: List[List[List[int]] | Prediction] = []
+        for text in texts:
+            try:
+                windows.append(self._windows([text])[0])
+            except (TypeError, ValueError) as exc:
+                windows.append(Prediction(error=str(exc)))
+        return windows
+
+    def _score_isolated(self, ids: List[int]) -> Dict[str, float] | Prediction:
+        try:
+            return self._score_ids([ids])[0]
+        except (RuntimeError, ValueError) as exc:
+            return Prediction(error=str(exc))
+
+    def _score_ids(self, batch_ids: List[List[int]]) -> List[Dict[str, float]]:
+        # padding=True pads to the longest member of this bucket only
+        if self._onnx is not None:
+            with profiler.stage("collate"):
+                encoded = self._tokenizer.pad({"input_ids": batch_ids}, padding=True, return_tensors="np")
+            with profiler.stage("forward"):
+                probabilities = self._onnx.predict_proba(encoded)
+        else:
+            with profiler.stage("collate"):
+                encoded = self._tokenizer.pad({"input_ids": batch_ids}, padding=True, return_tensors="pt").to(self._device)
+            # the copy back to the CPU waits for the device, so it belongs to the forward pass
+            with profiler.stage("forward"), torch.inference_mode():
+                logits = self._model(**encoded).logits
+                probabilities = torch.softmax(logits.float(), dim=-1).cpu().tolist()
+        with profiler.stage("postprocess"):
+            return [self._normalize(_flatten_scores(self._entries(row))) for row in probabilities]
+
+    def _entries(self, probabilities: List[float]) -> List[Dict[str, object]]:
+        return [
+            {"label": self._id2label.get(index, f"LABEL_{index}"), "score": score}
+            for index, score in enumerate(probabilities)
+        ]
+
+    def _normalize(self, scores: Dict[str, float]) -> Dict[str, float]:
         normalized: Dict[str, float] = {}
         for label, score in scores.items():
             canonical = self._label_mapping.get(label.lower(), label.lower())
@@ -46,6 +299,26 @@ class SentimentModel:
         return normalized
 
 
+def _special_affixes(tokenizer) -> Tuple[List[int], List[int]]:
+    """Special token ids the tokenizer wraps around a single sequence."""
+    bare = tokenizer("a", add_special_tokens=False)["input_ids"]
+    wrapped = tokenizer("a")["input_ids"]
+    for start in range(len(wrapped) - len(bare) + 1):
+        if wrapped[start : start + len(bare)] == bare:
+            return wrapped[:start], wrapped[start + len(bare) :]
+    return [], []
+
+
+def _resolve_device(device: Optional[str]) -> torch.device:
+    if device is None or device == "":
+        return torch.device("cpu")
+    # keep accepting the pipeline-style integer device ids ("0" → cuda:0, "-1" → cpu)
+    if str(device).lstrip("-").isdigit():
+        index = int(device)
+        return torch.device("cpu") if index < 0 else torch.device(f"cuda:{index}")
+    return torch.device(device)
+
+
 def _flatten_scores(raw_output: object) -> Dict[str, float]:
     """Normalize pipeline outputs into a simple label→score dict."""
     if isinstance(raw_output, list):
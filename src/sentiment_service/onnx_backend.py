@@ -0,0 +1,96 @@
+"""ONNX Runtime backend with optional dynamic int8 quantization."""
+from __future__ import annotations
+
+import inspect
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+_INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+
+def artifact_path(
+    cache_dir: Path,
+    model_name: str,
+    revision: Optional[str],
+    quantize: bool,
+) -> Path:
+    """Location of the exported model for a given name/revision/precision."""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name.strip("/"))
+    suffix = "int8" if quantize else "fp32"
+    return Path(cache_dir) / slug / (revision or "latest") / f"model.{suffix}.onnx"
+
+
+def export_model(torch_model: torch.nn.Module, path: Path, quantize: bool) -> Path:
+    """Export ``torch_model`` to ``path`` once, quantizing weights to int8 if asked."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    input_names = [name for name in _INPUT_NAMES if name in _forward_arguments(torch_model)]
+    sample = {name: torch.ones((1, 8), dtype=torch.long) for name in input_names}
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    fp32_path = path.with_name("model.fp32.onnx")
+    if not fp32_path.exists():
+        logger.info("Exporting %s to ONNX at %s", type(torch_model).__name__, fp32_path)
+        torch_model.eval()
+        kwargs = {
+            "input_names": input_names,
+            "output_names": ["logits"],
+            "dynamic_axes": dynamic_axes,
+            "opset_version": 17,
+        }
+        with torch.inference_mode():
+            try:
+                torch.onnx.export(torch_model, (sample,), str(fp32_path), dynamo=False, **kwargs)
+            except TypeError:
+                # torch < 2.5 has no ``dynamo`` switch and always uses the TorchScript exporter
+                torch.onnx.export(torch_model, (sample,), str(fp32_path), **kwargs)
+    if quantize and not path.exists():
+        quantization = _require("onnxruntime.quantization")
+        logger.info("Quantizing %s to int8 at %s", fp32_path, path)
+        quantization.quantize_dynamic(str(fp32_path), str(path), weight_type=quantization.QuantType.QInt8)
+    return path
+
+
+class OnnxClassifier:
+    """Runs an exported sequence-classification graph and returns probabilities."""
+
+    def __init__(self, path: Path, intra_op_threads: Optional[int] = None) -> None:
+        ort = _require("onnxruntime")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.path = Path(path)
+        self._session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self._input_names = [node.name for node in self._session.get_inputs()]
+
+    def predict_proba(self, encoded: Dict[str, np.ndarray]) -> List[List[float]]:
+        feeds = {}
+        for name in self._input_names:
+            if name in encoded:
+                feeds[name] = np.asarray(encoded[name], dtype=np.int64)
+            else:
+                feeds[name] = np.zeros_like(np.asarray(encoded["input_ids"], dtype=np.int64))
+        logits = self._session.run(["logits"], feeds)[0].astype(np.float32)
+        logits -= logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return (exp / exp.sum(axis=-1, keepdims=True)).tolist()
+
+
+def _forward_arguments(torch_model: torch.nn.Module) -> set[str]:
+    return set(inspect.signature(torch_model.forward).parameters)
+
+
+def _require(module: str):
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError as exc:  # pragma: no cover - depends on optional extras
+        raise RuntimeError(
+            "The onnx backend needs the optional dependencies: pip install -e '.[onnx]'"
+        ) from exc
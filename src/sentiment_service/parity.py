@@ -0,0 +1,79 @@
+"""Compare the ONNX backend against torch on real texts.
+
+Usage::
+
+    python -m sentiment_service.parity --limit 256
+
+Reports label agreement, score deltas and throughput for both backends so the
+accuracy cost of int8 quantization can be weighed against the speed-up.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from typing import Dict, List, Sequence
+
+from sqlalchemy import select
+
+from ingestion_service.orm import TextItemORM
+
+from .config import Settings, get_settings
+from .db import SessionLocal
+from .model import SentimentModel
+
+
+def sample_texts(limit: int) -> List[str]:
+    with SessionLocal() as session:
+        stmt = select(TextItemORM.body).order_by(TextItemORM.ingested_at.desc()).limit(limit)
+        return [body for body in session.scalars(stmt).all() if body]
+
+
+def compare_backends(texts: Sequence[str], settings: Settings) -> Dict[str, object]:
+    torch_model = SentimentModel.from_settings(settings.model_copy(update={"backend": "torch"}))
+    onnx_model = SentimentModel.from_settings(settings.model_copy(update={"backend": "onnx"}))
+    reference, torch_seconds = _timed(torch_model, texts)
+    candidate, onnx_seconds = _timed(onnx_model, texts)
+
+    compared = agreed = 0
+    max_delta = total_delta = 0.0
+    for expected, actual in zip(reference, candidate):
+        if not (expected.ok and actual.ok):
+            continue
+        compared += 1
+        agreed += _top(expected.scores) == _top(actual.scores)
+        deltas = [abs(expected.scores[label] - actual.scores.get(label, 0.0)) for label in expected.scores]
+        max_delta = max(max_delta, *deltas)
+        total_delta += sum(deltas) / len(deltas)
+    return {
+        "items": len(texts),
+        "compared": compared,
+        "quantized": settings.onnx_quantize,
+        "label_agreement": round(agreed / compared, 4) if compared else None,
+        "mean_abs_score_delta": round(total_delta / compared, 6) if compared else None,
+        "max_abs_score_delta": round(max_delta, 6),
+        "torch_items_per_s": round(len(texts) / torch_seconds, 2) if torch_seconds else None,
+        "onnx_items_per_s": round(len(texts) / onnx_seconds, 2) if onnx_seconds else None,
+        "speedup": round(torch_seconds / onnx_seconds, 2) if onnx_seconds else None,
+    }
+
+
+def _timed(model: SentimentModel, texts: Sequence[str]):
+    model.predict_batch(texts[: model.batch_size])  # warm-up
+    started = time.perf_counter()
+    predictions = model.predict_batch(texts)
+    return predictions, time.perf_counter() - started
+
+
+def _top(scores: Dict[str, float]) -> str:
+    return max(scores, key=scores.get)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=256, help="number of recent text items to compare")
+    args = parser.parse_args()
+    report = compare_backends(sample_texts(args.limit), get_settings())
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,294 @@
+"""Staged scoring pipeline that overlaps DB reads, tokenization, inference and writes."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from ingestion_service.models import TextItem
+
+from .batching import PaddingStats
+from .cache import CacheLookup, complete, lookup
+from .leases import LeaseKeeper
+from .lexicon import CascadeSplit, merge_settled
+from .model import Prediction, SentimentModel
+from .pool import ScoringPool
+from .profiling import RunProfile, profiler
+from .registry import registry
+from .sidecar import InferenceClient
+from .worker import ScoringRoute, SentimentWorker
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_REPORT_SECONDS = 60.0
+
+
+@dataclass
+class WorkBatch:
+    items: List[TextItem]
+    keeper: LeaseKeeper
+    route: ScoringRoute
+    batch_size: int = 0
+    seconds: float = 0.0
+    tokens: int = 0
+    model: Optional[SentimentModel | ScoringPool | InferenceClient] = None
+    settled: Optional[CascadeSplit] = None
+    pending: Optional[CacheLookup] = None
+    tokenized: Optional[list] = None
+    scored: Optional[List[Prediction]] = None
+
+    @property
+    def texts(self) -> List[str]:
+        return [item.body for item in self.items]
+
+
+@dataclass
+class StageTimer:
+    """Wall time a stage spent working, waiting for input and blocked on output."""
+
+    name: str
+    busy: float = 0.0
+    idle: float = 0.0
+    blocked: float = 0.0
+    batches: int = 0
+    items: int = 0
+
+    def as_dict(self, elapsed: float) -> Dict[str, float]:
+        elapsed = elapsed or 1.0
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "busy_seconds": round(self.busy, 3),
+            "utilization": round(self.busy / elapsed, 3),
+            "idle": round(self.idle / elapsed, 3),
+            "blocked": round(self.blocked / elapsed, 3),
+        }
+
+
+class _Stage(threading.Thread):
+    def __init__(
+        self,
+        timer: StageTimer,
+        handler: Callable[[WorkBatch], Optional[WorkBatch]],
+        inbox: "queue.Queue",
+        outbox: Optional["queue.Queue"],
+        on_error: Callable[[WorkBatch], None],
+    ) -> None:
+        super().__init__(name=f"sentiment-{timer.name}", daemon=True)
+        self.timer = timer
+        self._handler = handler
+        self._inbox = inbox
+        self._outbox = outbox
+        self._on_error = on_error
+
+    def run(self) -> None:
+        while True:
+            waited = time.perf_counter()
+            batch = self._inbox.get()
+            self.timer.idle += time.perf_counter() - waited
+            if batch is _DONE:
+                break
+            started = time.perf_counter()
+            try:
+                result = self._handler(batch)
+            except Exception:  # noqa: BLE001
+                logger.exception("Pipeline stage %s failed on a batch of %s items", self.timer.name, len(batch.items))
+                self._on_error(batch)
+                continue
+            finally:
+                elapsed = time.perf_counter() - started
+                self.timer.busy += elapsed
+                batch.seconds += elapsed
+            self.timer.batches += 1
+            self.timer.items += len(batch.items)
+            if self._outbox is not None and result is not None:
+                # a full queue blocks here, which is what throttles upstream stages
+                blocked = time.perf_counter()
+                self._outbox.put(result)
+                self.timer.blocked += time.perf_counter() - blocked
+        if self._outbox is not None:
+            self._outbox.put(_DONE)
+
+
+class ScoringPipeline:
+    """Runs a worker's claim → tokenize → forward → write steps as concurrent stages.
+
+    Each stage owns a thread and hands batches downstream through bounded
+    queues of ``pipeline_queue_size``, so the next batch is being claimed and
+    tokenized while the current one is in the model and the previous one is
+    being written. When a queue fills up the stage feeding it blocks, which
+    caps the number of leased-but-unscored items. On shutdown the claimer
+    stops first and every batch already claimed is drained through to the
+    writer before :meth:`run` returns.
+    """
+
+    def __init__(self, worker: SentimentWorker) -> None:
+        self.worker = worker
+        self.settings = worker.settings
+        self.padding_stats = PaddingStats()
+        self.stored = 0
+        self.timers = {name: StageTimer(name) for name in ("fetch", "tokenize", "forward", "write")}
+        self._profile: Optional[RunProfile] = None
+        self._lock = threading.Lock()
+
+    def run(self, stop: Optional[threading.Event] = None, until_empty: bool = True) -> int:
+        """Score until no work is left (or until ``stop`` is set when polling).
+
+        Returns the number of results stored.
+        """
+        stop = stop or threading.Event()
+        size = max(1, self.settings.pipeline_queue_size)
+        to_tokenize: "queue.Queue" = queue.Queue(maxsize=size)
+        to_forward: "queue.Queue" = queue.Queue(maxsize=size)
+        to_write: "queue.Queue" = queue.Queue(maxsize=size)
+        stages = [
+            _Stage(self.timers["tokenize"], self._tokenize, to_tokenize, to_forward, self._abandon),
+            _Stage(self.timers["forward"], self._forward, to_forward, to_write, self._abandon),
+            _Stage(self.timers["write"], self._write, to_write, None, self._abandon),
+        ]
+        for stage in stages:
+            stage.start()
+        started = time.perf_counter()
+        self._profile = profiler.start_run("pipeline")
+        try:
+            self._fetch_loop(stop, until_empty, to_tokenize, started)
+        finally:
+            to_tokenize.put(_DONE)
+            for stage in stages:
+                stage.join()
+            self.report(time.perf_counter() - started)
+            profiler.finish_run(self._profile)
+            self.worker.log_run_stats(self.padding_stats)
+        return self.stored
+
+    def _fetch_loop(self, stop: threading.Event, until_empty: bool, outbox: "queue.Queue", started: float) -> None:
+        timer = self.timers["fetch"]
+        interval = self.settings.poll_interval_min
+        last_stored = 0
+        last_report = started
+        seen: set[str] = set()
+        while not stop.is_set():
+            registry.evict_idle(self.settings.model_idle_seconds)
+            claimed_total = 0
+            full = False
+            for route in self.worker.routes:
+                items = self._claim(route, until_empty, seen)
+                if not items:
+                    continue
+                claimed_total += len(items)
+                full = full or len(items) >= self.worker.last_claim_limit
+                timer.batches += 1
+                timer.items += len(items)
+                keeper = self.worker.lease_keeper(items, route)
+                keeper.start()
+                blocked = time.perf_counter()
+                outbox.put(WorkBatch(items=items, keeper=keeper, route=route, batch_size=self.worker.last_claim_limit))
+                timer.blocked += time.perf_counter() - blocked
+            if not claimed_total and until_empty:
+                break
+            if time.perf_counter() - last_report >= _REPORT_SECONDS:
+                self.report(time.perf_counter() - started)
+                # a long-running pipeline emits one run profile per report interval
+                profiler.finish_run(self._profile)
+                self._profile = profiler.start_run("pipeline")
+                last_report = time.perf_counter()
+            if full or (claimed_total and until_empty):
+                continue
+            # poll more slowly while nothing new is getting stored
+            with self._lock:
+                stored = self.stored
+            if stored > last_stored:
+                interval = self.settings.poll_interval_min
+            else:
+                interval = min(interval * 2, self.settings.poll_interval_max)
+            last_stored = stored
+            waited = time.perf_counter()
+            stop.wait(interval)
+            timer.idle += time.perf_counter() - waited
+
+    def _claim(self, route: ScoringRoute, until_empty: bool, seen: set[str]) -> List[TextItem]:
+        timer = self.timers["fetch"]
+        claimed = time.perf_counter()
+        try:
+            items = self.worker.claim(route=route)
+        except Exception:  # noqa: BLE001
+            logger.exception("Claiming pending items for %s failed", route.model_name)
+            items = []
+        if until_empty:
+            items = self._first_claims(items, seen, route)
+        timer.busy += time.perf_counter() - claimed
+        return items
+
+    def _first_claims(self, items: List[TextItem], seen: set[str], route: ScoringRoute) -> List[TextItem]:
+        # a one-shot run must not loop on an item that already failed once
+        repeats = [item for item in items if str(item.id) in seen]
+        if repeats:
+            self.worker.release_unstored(repeats, [], route)
+        fresh = [item for item in items if str(item.id) not in seen]
+        seen.update(str(item.id) for item in fresh)
+        return fresh
+
+    def _tokenize(self, batch: WorkBatch) -> WorkBatch:
+        batch.settled = self.worker.settle(batch.texts, batch.items)
+        texts = batch.settled.texts(batch.texts)
+        batch.pending = lookup(batch.route.cache, texts)
+        misses = batch.pending.texts(texts)
+        # keep one model instance for the whole batch even if the registry evicts it meanwhile
+        batch.model = self.worker.model_for(batch.route)
+        if isinstance(batch.model, SentimentModel):
+            batch.tokenized = batch.model.tokenize(misses)
+        else:
+            # the scoring pool and the sidecar tokenize on their side
+            batch.tokenized = misses
+        return batch
+
+    def _forward(self, batch: WorkBatch) -> WorkBatch:
+        stats = PaddingStats()
+        if isinstance(batch.model, SentimentModel):
+            batch.scored = batch.model.score_windows(batch.tokenized, padding_stats=stats)
+        else:
+            batch.scored = batch.model.predict_batch(batch.tokenized, padding_stats=stats)
+        batch.model = None
+        batch.tokens = stats.real_tokens
+        with self._lock:
+            self.padding_stats.merge(stats)
+        return batch
+
+    def _write(self, batch: WorkBatch) -> None:
+        # compute time only (tokenize + forward), matching the serial worker's measurement
+        self.worker.observe_batch(len(batch.items), batch.tokens, batch.seconds, batch.batch_size)
+        predictions = merge_settled(batch.settled, complete(batch.route.cache, batch.pending, batch.scored))
+        stored_results = []
+        try:
+            stored_results = self.worker.store_predictions(batch.items, predictions, batch.route)
+        finally:
+            batch.keeper.stop()
+            self.worker.release_unstored(batch.items, stored_results, batch.route)
+        with self._lock:
+            self.stored += len(stored_results)
+        logger.info("Stored %s of %s items from pipelined batch", len(stored_results), len(batch.items))
+
+    def _abandon(self, batch: WorkBatch) -> None:
+        batch.keeper.stop()
+        try:
+            self.worker.release_unstored(batch.items, [], batch.route)
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to release leases for an abandoned batch")
+
+    def report(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        utilization = {name: timer.as_dict(elapsed) for name, timer in self.timers.items()}
+        bottleneck = max(utilization, key=lambda name: utilization[name]["utilization"])
+        logger.info(
+            "Pipeline utilization over %.1fs (bottleneck: %s): %s",
+            elapsed,
+            bottleneck,
+            ", ".join(
+                f"{name} busy {stats['utilization']:.0%} idle {stats['idle']:.0%} blocked {stats['blocked']:.0%}"
+                for name, stats in utilization.items()
+            ),
+        )
+        return utilization
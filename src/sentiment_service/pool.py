@@ -0,0 +1,119 @@
+"""Multi-process scoring pool for CPU-bound nodes."""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import torch
+
+from .batching import PaddingStats
+from .config import Settings
+from .model import Prediction, SentimentModel
+from .profiling import profiler
+
+logger = logging.getLogger(__name__)
+
+_process_model: Optional[SentimentModel] = None
+
+
+def configure_process(threads: Optional[int], cpus: Optional[Sequence[int]] = None) -> None:
+    """Apply the intra-op thread count and optional CPU pinning to this process."""
+    if threads:
+        torch.set_num_threads(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, set(cpus))
+
+
+def cpu_slice(rank: int, processes: int, threads: Optional[int]) -> List[int]:
+    """CPUs reserved for worker ``rank`` when pinning is enabled."""
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    width = threads or max(1, len(available) // max(1, processes))
+    return [available[(rank * width + offset) % len(available)] for offset in range(width)]
+
+
+class ScoringPool:
+    """Spreads ``predict_batch`` calls over K processes, each with its own model.
+
+    The parent only partitions texts and gathers results, so every item is
+    scored by exactly one child. The pool exposes the same ``predict_batch``
+    interface as :class:`SentimentModel` and can stand in for it.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.processes = max(1, settings.pool_processes)
+        self.batch_size = settings.inference_batch_size
+        context = multiprocessing.get_context("spawn")
+        ranks = context.Queue()
+        for rank in range(self.processes):
+            ranks.put(rank)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=context,
+            initializer=_init_process,
+            initargs=(settings, ranks),
+        )
+        logger.info(
+            "Started scoring pool with %s processes (%s threads each, pinning %s)",
+            self.processes,
+            settings.threads_per_process or "default",
+            "on" if settings.cpu_affinity else "off",
+        )
+
+    def predict_batch(
+        self,
+        texts: Sequence[str],
+        padding_stats: Optional[PaddingStats] = None,
+    ) -> List[Prediction]:
+        with profiler.stage("pool"):
+            return self._predict_shards(texts, padding_stats)
+
+    def _predict_shards(self, texts: Sequence[str], padding_stats: Optional[PaddingStats]) -> List[Prediction]:
+        shards = _balanced_shards(texts, self.processes)
+        futures = [
+            self._executor.submit(_score_shard, [texts[index] for index in shard])
+            for shard in shards
+            if shard
+        ]
+        predictions: List[Optional[Prediction]] = [None] * len(texts)
+        for shard, future in zip([shard for shard in shards if shard], futures):
+            shard_predictions, shard_stats = future.result()
+            for index, prediction in zip(shard, shard_predictions):
+                predictions[index] = prediction
+            # stage timings stay in the child processes; padding is reported back with the shard
+            profiler.record_padding(shard_stats.real_tokens, shard_stats.padded_tokens)
+            if padding_stats is not None:
+                padding_stats.merge(shard_stats)
+        return [prediction or Prediction(error="Not scored") for prediction in predictions]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _balanced_shards(texts: Sequence[str], processes: int) -> List[List[int]]:
+    # longest-first greedy assignment keeps the token load per process even
+    shards: List[List[int]] = [[] for _ in range(processes)]
+    loads = [0] * processes
+    for index in sorted(range(len(texts)), key=lambda position: len(texts[position] or ""), reverse=True):
+        target = loads.index(min(loads))
+        shards[target].append(index)
+        loads[target] += len(texts[index] or "") + 1
+    for shard in shards:
+        shard.sort()
+    return shards
+
+
+def _init_process(settings: Settings, ranks) -> None:
+    global _process_model
+    rank = ranks.get()
+    cpus = cpu_slice(rank, settings.pool_processes, settings.threads_per_process) if settings.cpu_affinity else None
+    configure_process(settings.threads_per_process, cpus)
+    _process_model = SentimentModel.from_settings(settings)
+    logging.getLogger(__name__).info("Pool process %s ready (pid=%s, cpus=%s)", rank, os.getpid(), cpus or "any")
+
+
+def _score_shard(texts: List[str]) -> Tuple[List[Prediction], PaddingStats]:
+    stats = PaddingStats()
+    return _process_model.predict_batch(texts, padding_stats=stats), stats
@@ -0,0 +1,265 @@
+"""Always-on stage profiling for the scoring path.
+
+Each stage (claim, lexicon, tokenize, collate, forward, postprocess, write)
+is timed with two ``perf_counter`` calls and lands in a fixed-bucket
+histogram, so recording costs a bisect and a few additions under a lock per
+batch. That is cheap enough to leave on in production. A scoring run opens a
+:class:`RunProfile`; when it finishes, the run's summary is logged as one JSON
+line, kept in a ring buffer for the API and written to a state file so the
+API can show workers that run in other processes.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence
+
+from .config import Settings
+
+logger = logging.getLogger(__name__)
+
+# upper bounds; one overflow bucket follows the last
+DURATION_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+class Histogram:
+    """Counts per fixed bucket plus exact count, sum and maximum."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "maximum")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (the maximum for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.bounds[index], self.maximum) if index < len(self.bounds) else self.maximum
+        return self.maximum
+
+    def as_dict(self) -> Dict[str, object]:
+        labels = [f"le_{bound}" for bound in self.bounds] + ["overflow"]
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 3),
+            "p90": round(self.quantile(0.9), 3),
+            "p99": round(self.quantile(0.99), 3),
+            "max": round(self.maximum, 3),
+            "buckets": {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+class RunProfile:
+    """Stage timings and token accounting for one scoring run (or the process lifetime)."""
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.elapsed = 0.0
+        self.stages: Dict[str, Histogram] = {}
+        self.tokens_per_item = Histogram(TOKEN_BUCKETS)
+        self.items = 0
+        self.stored = 0
+        self.real_tokens = 0
+        self.padded_tokens = 0
+
+    def add_stage(self, name: str, milliseconds: float) -> None:
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = Histogram(DURATION_BUCKETS_MS)
+        histogram.observe(milliseconds)
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+        self.elapsed = time.perf_counter() - self._started
+
+    def summary(self) -> Dict[str, object]:
+        elapsed = self.elapsed if self.finished_at is not None else time.perf_counter() - self._started
+        staged_ms = sum(histogram.total for histogram in self.stages.values()) or 1.0
+        return {
+            "label": self.label,
+            "started_at": self.started_at,
+            "elapsed_seconds": round(elapsed, 4),
+            "items": self.items,
+            "stored": self.stored,
+            "items_per_second": round(self.items / elapsed, 2) if elapsed else 0.0,
+            "real_tokens": self.real_tokens,
+            "padded_tokens": self.padded_tokens,
+            "padding_overhead": round(self.padded_tokens / self.real_tokens - 1, 4) if self.real_tokens else 0.0,
+            "tokens_per_item": self.tokens_per_item.as_dict(),
+            "stages": {
+                name: dict(histogram.as_dict(), share=round(histogram.total / staged_ms, 4))
+                for name, histogram in sorted(self.stages.items(), key=lambda entry: -entry[1].total)
+            },
+        }
+
+
+class _StageTimer:
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> "_StageTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.record(self.name, time.perf_counter() - self.started)
+
+
+class _NullTimer:
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """Process-wide collector feeding the lifetime totals and every open run.
+
+    Observations are attributed to all runs open at the time, so two runs
+    overlapping in one process (an API-triggered run next to the
+    micro-batcher, say) share their model-level timings.
+    """
+
+    def __init__(self, enabled: bool = True, history: int = 100, state_path: Optional[Path] = None) -> None:
+        self.enabled = enabled
+        self.state_path = state_path
+        self.totals = RunProfile("process")
+        self.history: Deque[Dict[str, object]] = deque(maxlen=max(1, history))
+        self._open: List[RunProfile] = []
+        self._lock = threading.Lock()
+
+    def configure(self, settings: Settings) -> None:
+        with self._lock:
+            self.enabled = settings.profiling_enabled
+            self.state_path = settings.profiling_state_path
+            if self.history.maxlen != settings.profiling_history:
+                self.history = deque(self.history, maxlen=max(1, settings.profiling_history))
+
+    def stage(self, name: str):
+        """Context manager timing one stage: ``with profiler.stage("forward"): ...``."""
+        return _StageTimer(self, name) if self.enabled else _NULL_TIMER
+
+    def record(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.totals.add_stage(name, milliseconds)
+            for run in self._open:
+                run.add_stage(name, milliseconds)
+
+    def record_tokens(self, tokens_per_item: Sequence[int]) -> None:
+        if not self.enabled or not tokens_per_item:
+            return
+        with self._lock:
+            for profile in [self.totals, *self._open]:
+                for tokens in tokens_per_item:
+                    profile.tokens_per_item.observe(tokens)
+
+    def record_padding(self, real_tokens: int, padded_tokens: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            for profile in [self.totals, *self._open]:
+                profile.real_tokens += real_tokens
+                profile.padded_tokens += padded_tokens
+
+    def record_items(self, items: int, stored: int) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            for profile in [self.totals, *self._open]:
+                profile.items += items
+                profile.stored += stored
+
+    def start_run(self, label: str = "run") -> Optional[RunProfile]:
+        if not self.enabled:
+            return None
+        run = RunProfile(label)
+        with self._lock:
+            self._open.append(run)
+        return run
+
+    def finish_run(self, run: Optional[RunProfile]) -> Optional[Dict[str, object]]:
+        """Close ``run``, log its summary as one JSON line and keep it for the API."""
+        if run is None:
+            return None
+        with self._lock:
+            if run in self._open:
+                self._open.remove(run)
+        run.finish()
+        summary = run.summary()
+        if not run.items:
+            # idle polls would otherwise flood the log and push real runs out of the buffer
+            return summary
+        logger.info(json.dumps({"event": "sentiment_run_profile", **summary}, separators=(",", ":")))
+        with self._lock:
+            self.history.append(summary)
+        self._persist()
+        return summary
+
+    def snapshot(self, runs: Optional[int] = None) -> Dict[str, object]:
+        with self._lock:
+            history = list(self.history)
+            totals = self.totals.summary()
+        return {
+            "enabled": self.enabled,
+            "totals": totals,
+            "runs": history[-runs:] if runs else history,
+        }
+
+    def _persist(self) -> None:
+        # same reasoning as the autotune state: workers run outside the API process
+        if self.state_path is None:
+            return
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.state_path.with_suffix(".tmp")
+            temporary.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+            temporary.replace(self.state_path)
+        except OSError:
+            logger.exception("Could not write profiling state to %s", self.state_path)
+
+
+profiler = Profiler()
+
+
+def load_profile(path: Path) -> Optional[Dict[str, object]]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,195 @@
+"""Process-wide registry so each model configuration is loaded once."""
+from __future__ import annotations
+
+import gc
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional, Tuple
+
+import torch
+
+from .config import Settings
+from .model import SentimentModel
+from .pool import configure_process
+
+logger = logging.getLogger(__name__)
+
+# Settings that change how a SentimentModel is built or what it returns.
+MODEL_FIELDS = (
+    "model_name",
+    "model_revision",
+    "artifact_dir",
+    "device",
+    "label_mapping",
+    "max_length",
+    "inference_batch_size",
+    "backend",
+    "onnx_quantize",
+    "onnx_cache_dir",
+    "threads_per_process",
+    "chunking",
+    "chunk_overlap",
+    "max_chunks",
+    "chunk_aggregation",
+)
+
+ModelKey = Tuple[Hashable, ...]
+
+
+def model_key(settings: Settings) -> ModelKey:
+    key = []
+    for name in MODEL_FIELDS:
+        value = getattr(settings, name)
+        if isinstance(value, dict):
+            value = tuple(sorted(value.items()))
+        key.append(value)
+    return tuple(key)
+
+
+@dataclass
+class _Entry:
+    model: SentimentModel
+    size: int
+    last_used: float
+
+
+class ModelRegistry:
+    """LRU of loaded models bounded by a memory budget and an idle timeout.
+
+    ``model_memory_budget_mb`` and ``model_idle_seconds`` are read from the
+    settings passed to :meth:`get`. After every lookup, models idle for
+    longer than the timeout are dropped, then the least recently used ones
+    until the total fits the budget. The model just requested is never
+    evicted, so a single model larger than the budget still works. Callers
+    should not hold on to models between batches, or evicted weights cannot
+    be freed.
+    """
+
+    def __init__(self) -> None:
+        self._models: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, settings: Settings) -> SentimentModel:
+        key = model_key(settings)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                logger.info("Loading sentiment model %s (%s backend)", settings.model_name, settings.backend)
+                configure_process(settings.threads_per_process)
+                model = _load(settings)
+                entry = _Entry(model=model, size=model.memory_bytes(), last_used=time.monotonic())
+                self._models[key] = entry
+            entry.last_used = time.monotonic()
+            self._models.move_to_end(key)
+            self._evict(settings, keep=key)
+            return entry.model
+
+    def load(self, settings: Settings) -> SentimentModel:
+        """Load and warm a model without registering it, e.g. ahead of a hot swap."""
+        configure_process(settings.threads_per_process)
+        return _load(settings)
+
+    def install(self, settings: Settings, model: SentimentModel) -> None:
+        """Register an already loaded model so :meth:`get` returns it from now on."""
+        key = model_key(settings)
+        with self._lock:
+            self._models[key] = _Entry(model=model, size=model.memory_bytes(), last_used=time.monotonic())
+            self._evict(settings, keep=key)
+
+    def peek(self, settings: Settings) -> Optional[SentimentModel]:
+        """The loaded model for ``settings``, if any, without loading or touching it."""
+        with self._lock:
+            entry = self._models.get(model_key(settings))
+        return entry.model if entry is not None else None
+
+    def discard(self, settings: Settings) -> bool:
+        """Forget the model for ``settings``; callers still holding it finish on their reference."""
+        with self._lock:
+            entry = self._models.pop(model_key(settings), None)
+        if entry is None:
+            return False
+        del entry
+        _release_memory()
+        return True
+
+    def evict_idle(self, idle_seconds: Optional[float]) -> int:
+        """Drop models unused for ``idle_seconds``; returns how many were unloaded."""
+        if not idle_seconds:
+            return 0
+        with self._lock:
+            return self._evict_idle(idle_seconds, keep=None)
+
+    def loaded(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size for entry in self._models.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+        _release_memory()
+
+    def _evict(self, settings: Settings, keep: ModelKey) -> None:
+        evicted = self._evict_idle(settings.model_idle_seconds, keep) if settings.model_idle_seconds else 0
+        if settings.model_memory_budget_mb:
+            budget = settings.model_memory_budget_mb * 1024 * 1024
+            total = sum(entry.size for entry in self._models.values())
+            for key in list(self._models):
+                if total <= budget:
+                    break
+                if key == keep:
+                    continue
+                entry = self._models.pop(key)
+                total -= entry.size
+                evicted += 1
+                logger.info("Unloaded %s to stay within the %s MB model budget", key[0], settings.model_memory_budget_mb)
+        if evicted:
+            _release_memory()
+
+    def _evict_idle(self, idle_seconds: float, keep: Optional[ModelKey]) -> int:
+        cutoff = time.monotonic() - idle_seconds
+        idle = [key for key, entry in self._models.items() if key != keep and entry.last_used < cutoff]
+        for key in idle:
+            del self._models[key]
+            logger.info("Unloaded %s after %.0fs idle", key[0], idle_seconds)
+        if idle and keep is None:
+            _release_memory()
+        return len(idle)
+
+
+def _load(settings: Settings) -> SentimentModel:
+    """Load a model and report its time to first prediction (load plus one warm-up pass)."""
+    started = time.perf_counter()
+    model = SentimentModel.from_settings(settings)
+    loaded = time.perf_counter()
+    model.predict_batch(["warm up"])
+    ready = time.perf_counter()
+    logger.info(
+        "Sentiment model %s ready: first prediction after %.2fs (load %.2fs, warm-up %.2fs, from %s)",
+        settings.model_name,
+        ready - started,
+        loaded - started,
+        ready - loaded,
+        model.artifact_path or "hub cache",
+    )
+    return model
+
+
+def _release_memory() -> None:
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+registry = ModelRegistry()
+
+
+def get_model(settings: Settings) -> SentimentModel:
+    """Return the shared model for ``settings``, loading it on first use."""
+    return registry.get(settings)
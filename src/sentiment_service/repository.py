@@ -1,13 +1,75 @@
 """Helpers to read pending text items and persist sentiment results."""
 from __future__ import annotations
 
-from typing import List
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-from sqlalchemy import exists, select
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Select, String, and_, cast, delete, exists, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker
 
 from ingestion_service.models import SentimentResult, TextItem
-from ingestion_service.orm import SentimentResultORM, TextItemORM
+from ingestion_service.orm import (
+    BackfillCheckpointORM,
+    EvaluationRunORM,
+    InferenceCacheORM,
+    ScoringAttemptORM,
+    ScoringLeaseORM,
+    SentimentResultORM,
+    TextItemORM,
+)
+
+CachedScores = Tuple[Dict[str, float], Dict[str, object]]
+LanguageFilter = Optional[Tuple[Optional[Sequence[str]], Sequence[str]]]
+
+_CLAIM_ATTEMPTS = 3
+_RESULT_KEY = ("text_item_id", "model_name", "model_version")
+
+
+@dataclass
+class BackfillCheckpoint:
+    model_name: str
+    model_version: str
+    cutoff: datetime
+    cursor_ingested_at: Optional[datetime]
+    cursor_id: Optional[str]
+    total: int
+    scanned: int
+    scored: int
+    started_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime]
+
+
+@dataclass
+class ScoringAttempt:
+    text_item_id: str
+    model_name: str
+    model_version: str
+    attempts: int
+    last_error: Optional[str]
+    first_failed_at: datetime
+    last_failed_at: datetime
+    quarantined_at: Optional[datetime]
+
+
+@dataclass
+class EvaluationRun:
+    id: str
+    model_name: str
+    model_version: str
+    started_at: datetime
+    finished_at: datetime
+    items: int
+    reused: int
+    failed: int
+    accuracy: Optional[float]
+    macro_f1: Optional[float]
+    labels: List[str]
+    per_class: Dict[str, Dict[str, float]]
+    confusion: List[List[int]]
 
 
 class SentimentRepository:
@@ -19,25 +81,710 @@ class SentimentRepository:
         model_name: str,
         model_version: str,
         limit: int,
+        languages: LanguageFilter = None,
+        newer_than: Optional[datetime] = None,
+        prioritized: bool = True,
     ) -> List[TextItem]:
+        with self._session_factory() as session:
+            stmt = _pending_query(model_name, model_version, datetime.utcnow(), languages, newer_than)
+            stmt = _queue_order(stmt, prioritized).limit(limit)
+            return [orm_item.to_model() for orm_item in session.scalars(stmt).all()]
+
+    def claim_pending_items(
+        self,
+        model_name: str,
+        model_version: str,
+        limit: int,
+        worker_id: str,
+        lease_seconds: int,
+        languages: LanguageFilter = None,
+        newer_than: Optional[datetime] = None,
+        prioritized: bool = True,
+        aged_before: Optional[datetime] = None,
+        aged_share: float = 0.0,
+    ) -> List[TextItem]:
+        """Atomically lease up to ``limit`` pending items to ``worker_id``.
+
+        On Postgres the candidate rows are locked with ``FOR UPDATE SKIP
+        LOCKED`` so concurrent claimers pick disjoint items. Everywhere the
+        lease row itself is the arbiter: expired leases are taken over with a
+        conditional update and fresh ones are inserted with conflicts ignored,
+        so only the worker whose row landed owns the item. SQLite serializes
+        those writes, which makes the same protocol safe there.
+
+        ``languages`` restricts the claim to items routed to this model and
+        ``newer_than`` to items ingested after a running backfill's cutoff;
+        see :func:`_pending_query`.
+
+        ``prioritized`` takes the highest ``priority`` first, newest first
+        within a priority, instead of oldest first. As a starvation guard,
+        up to ``aged_share`` of the batch is reserved for the oldest items
+        ingested before ``aged_before``, so low-priority work still drains
+        under a steady stream of fresh items.
+        """
+        items: List[TextItem] = []
+        for _ in range(_CLAIM_ATTEMPTS):
+            claimed, contended = self._claim_once(
+                model_name,
+                model_version,
+                limit - len(items),
+                worker_id,
+                lease_seconds,
+                languages,
+                newer_than,
+                prioritized,
+                aged_before,
+                aged_share,
+            )
+            items.extend(claimed)
+            # only go again when another worker beat us to some candidates
+            if not contended or len(items) >= limit:
+                break
+        return items
+
+    def _claim_once(
+        self,
+        model_name: str,
+        model_version: str,
+        limit: int,
+        worker_id: str,
+        lease_seconds: int,
+        languages: LanguageFilter = None,
+        newer_than: Optional[datetime] = None,
+        prioritized: bool = True,
+        aged_before: Optional[datetime] = None,
+        aged_share: float = 0.0,
+    ) -> Tuple[List[TextItem], bool]:
+        now = datetime.utcnow()
+        leased_until = now + timedelta(seconds=lease_seconds)
+        with self._session_factory() as session:
+            postgres = session.get_bind().dialect.name == "postgresql"
+
+            def fetch(stmt: Select) -> List[TextItemORM]:
+                if postgres:
+                    stmt = stmt.with_for_update(skip_locked=True, of=TextItemORM)
+                return list(session.scalars(stmt).all())
+
+            candidates: List[TextItemORM] = []
+            if prioritized and aged_before is not None and aged_share > 0:
+                candidates = fetch(
+                    _pending_query(model_name, model_version, now, languages, newer_than)
+                    .where(TextItemORM.ingested_at <= aged_before)
+                    .order_by(TextItemORM.ingested_at.asc())
+                    .limit(min(limit, math.ceil(limit * aged_share)))
+                )
+            if len(candidates) < limit:
+                stmt = _queue_order(_pending_query(model_name, model_version, now, languages, newer_than), prioritized)
+                if candidates:
+                    stmt = stmt.where(TextItemORM.id.not_in([candidate.id for candidate in candidates]))
+                candidates.extend(fetch(stmt.limit(limit - len(candidates))))
+            if not candidates:
+                session.commit()
+                return [], False
+            ids = [candidate.id for candidate in candidates]
+            session.execute(
+                update(ScoringLeaseORM)
+                .where(ScoringLeaseORM.text_item_id.in_(ids))
+                .where(ScoringLeaseORM.model_name == model_name)
+                .where(ScoringLeaseORM.model_version == model_version)
+                .where(ScoringLeaseORM.leased_until <= now)
+                .values(worker_id=worker_id, claimed_at=now, leased_until=leased_until)
+            )
+            _insert_ignore(
+                session,
+                ScoringLeaseORM,
+                [
+                    {
+                        "text_item_id": text_item_id,
+                        "model_name": model_name,
+                        "model_version": model_version,
+                        "worker_id": worker_id,
+                        "claimed_at": now,
+                        "leased_until": leased_until,
+                    }
+                    for text_item_id in ids
+                ],
+            )
+            owned = set(
+                session.scalars(
+                    select(ScoringLeaseORM.text_item_id)
+                    .where(ScoringLeaseORM.text_item_id.in_(ids))
+                    .where(ScoringLeaseORM.model_name == model_name)
+                    .where(ScoringLeaseORM.model_version == model_version)
+                    .where(ScoringLeaseORM.worker_id == worker_id)
+                )
+            )
+            items = [candidate.to_model() for candidate in candidates if candidate.id in owned]
+            session.commit()
+            return items, len(items) < len(candidates)
+
+    def renew_leases(
+        self,
+        text_item_ids: Iterable[str],
+        model_name: str,
+        model_version: str,
+        worker_id: str,
+        lease_seconds: int,
+    ) -> int:
+        ids = [str(text_item_id) for text_item_id in text_item_ids]
+        if not ids:
+            return 0
+        with self._session_factory() as session:
+            result = session.execute(
+                update(ScoringLeaseORM)
+                .where(ScoringLeaseORM.text_item_id.in_(ids))
+                .where(ScoringLeaseORM.model_name == model_name)
+                .where(ScoringLeaseORM.model_version == model_version)
+                .where(ScoringLeaseORM.worker_id == worker_id)
+                .values(leased_until=datetime.utcnow() + timedelta(seconds=lease_seconds))
+            )
+            session.commit()
+            return result.rowcount or 0
+
+    def release_leases(
+        self,
+        text_item_ids: Iterable[str],
+        model_name: str,
+        model_version: str,
+        worker_id: str,
+    ) -> None:
+        ids = [str(text_item_id) for text_item_id in text_item_ids]
+        if not ids:
+            return
+        with self._session_factory() as session:
+            session.execute(
+                delete(ScoringLeaseORM)
+                .where(ScoringLeaseORM.text_item_id.in_(ids))
+                .where(ScoringLeaseORM.model_name == model_name)
+                .where(ScoringLeaseORM.model_version == model_version)
+                .where(ScoringLeaseORM.worker_id == worker_id)
+            )
+            session.commit()
+
+    def save_result(self, result: SentimentResult) -> SentimentResult:
+        """Persist one result, or return the row that already exists for its item and model."""
+        stored = self.save_results([result])
+        if stored:
+            return stored[0]
+        with self._session_factory() as session:
+            existing = session.scalar(
+                select(SentimentResultORM)
+                .where(SentimentResultORM.text_item_id == str(result.text_item_id))
+                .where(SentimentResultORM.model_name == result.model_name)
+                .where(SentimentResultORM.model_version == result.model_version)
+            )
+            return existing.to_model()
+
+    def save_results(self, results: Sequence[SentimentResult]) -> List[SentimentResult]:
+        """Write a batch of results in one transaction and return the ones that were new.
+
+        The batch goes out as a single executemany (multi-row ``VALUES`` on
+        Postgres) that skips rows colliding with an existing result for the
+        same item and model, so retries and racing workers are no-ops rather
+        than duplicates. The matching leases are deleted in the same commit.
+        """
+        if not results:
+            return []
+        rows = [_result_row(result) for result in results]
+        ids = [row["id"] for row in rows]
+        with self._session_factory() as session:
+            _insert_ignore(session, SentimentResultORM, rows, key_columns=_RESULT_KEY)
+            # writing the result completes the lease, whoever held it, and clears earlier failures
+            for (model_name, model_version), item_ids in _group_by_model(results).items():
+                for orm_class in (ScoringLeaseORM, ScoringAttemptORM):
+                    session.execute(
+                        delete(orm_class)
+                        .where(orm_class.text_item_id.in_(item_ids))
+                        .where(orm_class.model_name == model_name)
+                        .where(orm_class.model_version == model_version)
+                    )
+            inserted = set(session.scalars(select(SentimentResultORM.id).where(SentimentResultORM.id.in_(ids))))
+            session.commit()
+        return [result for result, row in zip(results, rows) if row["id"] in inserted]
+
+    def get_result(self, text_item_id: str, model_name: str, model_version: str) -> Optional[SentimentResult]:
+        with self._session_factory() as session:
+            result = session.scalar(
+                select(SentimentResultORM)
+                .where(SentimentResultORM.text_item_id == str(text_item_id))
+                .where(SentimentResultORM.model_name == model_name)
+                .where(SentimentResultORM.model_version == model_version)
+            )
+            return result.to_model() if result is not None else None
+
+    def save_explanation(
+        self,
+        result_id: str,
+        spans: List[Dict[str, object]],
+        summary: Dict[str, object],
+    ) -> SentimentResult:
+        """Store an explanation unless one is already there; returns the stored result either way.
+
+        ``spans`` are the ``{text, importance}`` attributions of the result
+        contract; the summary, with their offsets, goes under
+        ``annotations["explanation"]``.
+        """
+        with self._session_factory() as session:
+            result = session.get(SentimentResultORM, str(result_id), with_for_update=True)
+            if result.explanations is None:
+                result.explanations = spans
+                result.annotations = {**(result.annotations or {}), "explanation": summary}
+            session.commit()
+            return result.to_model()
+
+    def boost_priority(self, text_item_ids: Iterable[str], priority: int) -> int:
+        """Raise the items to at least ``priority`` so workers claim them next."""
+        ids = [str(text_item_id) for text_item_id in text_item_ids]
+        if not ids:
+            return 0
+        with self._session_factory() as session:
+            result = session.execute(
+                update(TextItemORM)
+                .where(TextItemORM.id.in_(ids))
+                .where(TextItemORM.priority < priority)
+                .values(priority=priority)
+            )
+            session.commit()
+            return result.rowcount or 0
+
+    def record_failures(
+        self,
+        errors: Dict[str, str],
+        model_name: str,
+        model_version: str,
+        max_attempts: int,
+    ) -> List[str]:
+        """Count a failed attempt per item; returns the ids that reached ``max_attempts`` now.
+
+        Those items are quarantined: :func:`_pending_query` skips them until
+        :meth:`requeue_quarantined` clears their attempts.
+        """
+        if not errors:
+            return []
+        now = datetime.utcnow()
+        quarantined = []
+        with self._session_factory() as session:
+            existing = {
+                attempt.text_item_id: attempt
+                for attempt in session.scalars(
+                    select(ScoringAttemptORM)
+                    .where(ScoringAttemptORM.text_item_id.in_(list(errors)))
+                    .where(ScoringAttemptORM.model_name == model_name)
+                    .where(ScoringAttemptORM.model_version == model_version)
+                )
+            }
+            for text_item_id, error in errors.items():
+                attempt = existing.get(text_item_id)
+                if attempt is None:
+                    attempt = ScoringAttemptORM(
+                        text_item_id=text_item_id,
+                        model_name=model_name,
+                        model_version=model_version,
+                        attempts=0,
+                        first_failed_at=now,
+                    )
+                    session.add(attempt)
+                attempt.attempts += 1
+                attempt.last_error = error[:2000]
+                attempt.last_failed_at = now
+                if attempt.quarantined_at is None and attempt.attempts >= max_attempts:
+                    attempt.quarantined_at = now
+                    quarantined.append(text_item_id)
+            session.commit()
+        return quarantined
+
+    def quarantined_items(
+        self,
+        model_name: str,
+        model_version: str,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Tuple[int, List[ScoringAttempt]]:
+        """Total quarantined items for this model and one page of them, most recent first."""
+        condition = and_(
+            ScoringAttemptORM.model_name == model_name,
+            ScoringAttemptORM.model_version == model_version,
+            ScoringAttemptORM.quarantined_at.is_not(None),
+        )
+        with self._session_factory() as session:
+            total = session.scalar(select(func.count()).select_from(ScoringAttemptORM).where(condition))
+            rows = session.scalars(
+                select(ScoringAttemptORM)
+                .where(condition)
+                .order_by(ScoringAttemptORM.quarantined_at.desc(), ScoringAttemptORM.text_item_id)
+                .limit(limit)
+                .offset(offset)
+            ).all()
+            return total or 0, [_attempt(row) for row in rows]
+
+    def requeue_quarantined(
+        self,
+        model_name: str,
+        model_version: str,
+        text_item_ids: Optional[Iterable[str]] = None,
+    ) -> int:
+        """Return quarantined items (all, or just ``text_item_ids``) to the queue with fresh attempts."""
+        stmt = (
+            delete(ScoringAttemptORM)
+            .where(ScoringAttemptORM.model_name == model_name)
+            .where(ScoringAttemptORM.model_version == model_version)
+            .where(ScoringAttemptORM.quarantined_at.is_not(None))
+        )
+        if text_item_ids is not None:
+            stmt = stmt.where(ScoringAttemptORM.text_item_id.in_([str(text_item_id) for text_item_id in text_item_ids]))
+        with self._session_factory() as session:
+            result = session.execute(stmt)
+            session.commit()
+            return result.rowcount or 0
+
+    def recent_texts(self, limit: int) -> List[str]:
+        """Bodies of the most recently ingested items, as representative warm-up input."""
+        with self._session_factory() as session:
+            stmt = select(TextItemORM.body).order_by(TextItemORM.ingested_at.desc()).limit(limit)
+            return [body for body in session.scalars(stmt) if body]
+
+    def fetch_cached_scores(
+        self,
+        text_hashes: Iterable[str],
+        model_name: str,
+        model_version: str,
+    ) -> Dict[str, CachedScores]:
+        hashes = list(text_hashes)
+        if not hashes:
+            return {}
+        with self._session_factory() as session:
+            stmt = (
+                select(InferenceCacheORM.text_hash, InferenceCacheORM.scores_by_label, InferenceCacheORM.annotations)
+                .where(InferenceCacheORM.text_hash.in_(hashes))
+                .where(InferenceCacheORM.model_name == model_name)
+                .where(InferenceCacheORM.model_version == model_version)
+            )
+            return {
+                text_hash: (scores, annotations or {})
+                for text_hash, scores, annotations in session.execute(stmt)
+            }
+
+    def store_cached_scores(
+        self,
+        scores_by_hash: Dict[str, CachedScores],
+        model_name: str,
+        model_version: str,
+    ) -> None:
+        if not scores_by_hash:
+            return
+        rows = [
+            {
+                "text_hash": text_hash,
+                "model_name": model_name,
+                "model_version": model_version,
+                "scores_by_label": scores,
+                "annotations": annotations or None,
+                "created_at": datetime.utcnow(),
+            }
+            for text_hash, (scores, annotations) in scores_by_hash.items()
+        ]
+        with self._session_factory() as session:
+            _insert_ignore(session, InferenceCacheORM, rows)
+            session.commit()
+
+    def purge_cached_scores(self, model_name: str, keep_version: str) -> int:
+        """Drop cache rows written by other versions of ``model_name``.
+
+        Rows for any configuration of ``keep_version`` (``keep_version+...``,
+        see ``Settings.cache_version``) are kept, so processes serving the same
+        model with different backends or chunking never purge each other.
+        """
+        with self._session_factory() as session:
+            result = session.execute(
+                delete(InferenceCacheORM)
+                .where(InferenceCacheORM.model_name == model_name)
+                .where(InferenceCacheORM.model_version != keep_version)
+                .where(~InferenceCacheORM.model_version.startswith(f"{keep_version}+", autoescape=True))
+            )
+            session.commit()
+            return result.rowcount or 0
+
+    def start_backfill(self, model_name: str, model_version: str, reset: bool = False) -> BackfillCheckpoint:
+        """Return the checkpoint for this model version, creating it on first run.
+
+        The cutoff is frozen at the newest ingested item, so everything that
+        arrives afterwards stays with the live workers.
+        """
+        with self._session_factory() as session:
+            checkpoint = session.get(BackfillCheckpointORM, (model_name, model_version))
+            if checkpoint is not None and not reset:
+                return _checkpoint(checkpoint)
+            now = datetime.utcnow()
+            cutoff = session.scalar(select(func.max(TextItemORM.ingested_at))) or now
+            total = session.scalar(select(func.count()).select_from(TextItemORM).where(TextItemORM.ingested_at <= cutoff))
+            if checkpoint is None:
+                checkpoint = BackfillCheckpointORM(model_name=model_name, model_version=model_version)
+                session.add(checkpoint)
+            checkpoint.cutoff = cutoff
+            checkpoint.cursor_ingested_at = None
+            checkpoint.cursor_id = None
+            checkpoint.total = total or 0
+            checkpoint.scanned = 0
+            checkpoint.scored = 0
+            checkpoint.started_at = now
+            checkpoint.updated_at = now
+            checkpoint.finished_at = None
+            session.commit()
+            return _checkpoint(checkpoint)
+
+    def get_backfill(self, model_name: str, model_version: str) -> Optional[BackfillCheckpoint]:
+        with self._session_factory() as session:
+            checkpoint = session.get(BackfillCheckpointORM, (model_name, model_version))
+            return _checkpoint(checkpoint) if checkpoint is not None else None
+
+    def active_backfill_cutoff(
+        self,
+        model_name: str,
+        model_version: str,
+        stale_before: Optional[datetime] = None,
+    ) -> Optional[datetime]:
+        """Cutoff of an unfinished backfill, below which live workers step aside.
+
+        A checkpoint not advanced since ``stale_before`` belongs to a crashed or
+        abandoned backfill and is ignored, so the older backlog goes back to
+        the live workers until the job resumes.
+        """
         with self._session_factory() as session:
             stmt = (
-                select(TextItemORM)
-                .where(
-                    ~exists()
-                    .where(SentimentResultORM.text_item_id == TextItemORM.id)
+                select(BackfillCheckpointORM.cutoff)
+                .where(BackfillCheckpointORM.model_name == model_name)
+                .where(BackfillCheckpointORM.model_version == model_version)
+                .where(BackfillCheckpointORM.finished_at.is_(None))
+            )
+            if stale_before is not None:
+                stmt = stmt.where(BackfillCheckpointORM.updated_at >= stale_before)
+            return session.scalar(stmt)
+
+    def fetch_backfill_page(self, checkpoint: BackfillCheckpoint, limit: int) -> List[TextItem]:
+        """Next page below the checkpoint cursor, newest first, by keyset on (ingested_at, id)."""
+        with self._session_factory() as session:
+            stmt = select(TextItemORM).where(TextItemORM.ingested_at <= checkpoint.cutoff)
+            if checkpoint.cursor_ingested_at is not None:
+                stmt = stmt.where(
+                    or_(
+                        TextItemORM.ingested_at < checkpoint.cursor_ingested_at,
+                        and_(
+                            TextItemORM.ingested_at == checkpoint.cursor_ingested_at,
+                            TextItemORM.id < checkpoint.cursor_id,
+                        ),
+                    )
+                )
+            stmt = stmt.order_by(TextItemORM.ingested_at.desc(), TextItemORM.id.desc()).limit(limit)
+            return [orm_item.to_model() for orm_item in session.scalars(stmt).all()]
+
+    def fetch_labeled_page(self, after_id: Optional[str], limit: int) -> List[Tuple[str, str, List[str]]]:
+        """Next ``(id, language, labels)`` page of items carrying labels, by keyset on ``id``.
+
+        Bodies are not loaded here; most labeled items already have a result.
+        """
+        with self._session_factory() as session:
+            # JSON nulls are stored as the literal 'null', which IS NOT NULL alone would let through
+            stmt = (
+                select(TextItemORM.id, TextItemORM.language, TextItemORM.labels)
+                .where(TextItemORM.labels.is_not(None))
+                .where(cast(TextItemORM.labels, String) != "null")
+            )
+            if after_id is not None:
+                stmt = stmt.where(TextItemORM.id > after_id)
+            rows = session.execute(stmt.order_by(TextItemORM.id).limit(limit)).all()
+            return [(text_item_id, language, labels) for text_item_id, language, labels in rows]
+
+    def fetch_items(self, text_item_ids: Iterable[str]) -> List[TextItem]:
+        ids = [str(text_item_id) for text_item_id in text_item_ids]
+        if not ids:
+            return []
+        with self._session_factory() as session:
+            rows = session.scalars(select(TextItemORM).where(TextItemORM.id.in_(ids))).all()
+            return [row.to_model() for row in rows]
+
+    def result_labels(self, text_item_ids: Iterable[str], model_name: str, model_version: str) -> Dict[str, str]:
+        """Stored label per item for this model, for the items that have one."""
+        ids = [str(text_item_id) for text_item_id in text_item_ids]
+        if not ids:
+            return {}
+        with self._session_factory() as session:
+            rows = session.execute(
+                select(SentimentResultORM.text_item_id, SentimentResultORM.label)
+                .where(SentimentResultORM.text_item_id.in_(ids))
+                .where(SentimentResultORM.model_name == model_name)
+                .where(SentimentResultORM.model_version == model_version)
+            )
+            return {text_item_id: label for text_item_id, label in rows}
+
+    def save_evaluation(self, run: EvaluationRun) -> None:
+        with self._session_factory() as session:
+            session.add(EvaluationRunORM(**vars(run)))
+            session.commit()
+
+    def latest_evaluation(self, model_name: str, model_version: str) -> Optional[EvaluationRun]:
+        with self._session_factory() as session:
+            run = session.scalar(
+                select(EvaluationRunORM)
+                .where(EvaluationRunORM.model_name == model_name)
+                .where(EvaluationRunORM.model_version == model_version)
+                .order_by(EvaluationRunORM.finished_at.desc())
+                .limit(1)
+            )
+            if run is None:
+                return None
+            return EvaluationRun(**{column.key: getattr(run, column.key) for column in EvaluationRunORM.__table__.columns})
+
+    def scored_item_ids(self, text_item_ids: Iterable[str], model_name: str, model_version: str) -> set[str]:
+        ids = [str(text_item_id) for text_item_id in text_item_ids]
+        if not ids:
+            return set()
+        with self._session_factory() as session:
+            return set(
+                session.scalars(
+                    select(SentimentResultORM.text_item_id)
+                    .where(SentimentResultORM.text_item_id.in_(ids))
                     .where(SentimentResultORM.model_name == model_name)
                     .where(SentimentResultORM.model_version == model_version)
                 )
-                .order_by(TextItemORM.ingested_at.asc())
-                .limit(limit)
             )
-            return [orm_item.to_model() for orm_item in session.scalars(stmt).all()]
 
-    def save_result(self, result: SentimentResult) -> SentimentResult:
+    def quarantined_item_ids(self, text_item_ids: Iterable[str], model_name: str, model_version: str) -> set[str]:
+        ids = [str(text_item_id) for text_item_id in text_item_ids]
+        if not ids:
+            return set()
         with self._session_factory() as session:
-            orm_result = SentimentResultORM.from_model(result)
-            session.add(orm_result)
+            return set(
+                session.scalars(
+                    select(ScoringAttemptORM.text_item_id)
+                    .where(ScoringAttemptORM.text_item_id.in_(ids))
+                    .where(ScoringAttemptORM.model_name == model_name)
+                    .where(ScoringAttemptORM.model_version == model_version)
+                    .where(ScoringAttemptORM.quarantined_at.is_not(None))
+                )
+            )
+
+    def advance_backfill(
+        self,
+        checkpoint: BackfillCheckpoint,
+        last_item: Optional[TextItem],
+        scanned: int,
+        scored: int,
+    ) -> BackfillCheckpoint:
+        """Move the cursor past ``last_item``; a page without items finishes the backfill."""
+        with self._session_factory() as session:
+            orm_checkpoint = session.get(BackfillCheckpointORM, (checkpoint.model_name, checkpoint.model_version))
+            now = datetime.utcnow()
+            if last_item is None:
+                orm_checkpoint.finished_at = now
+            else:
+                orm_checkpoint.cursor_ingested_at = last_item.ingested_at
+                orm_checkpoint.cursor_id = str(last_item.id)
+            orm_checkpoint.scanned += scanned
+            orm_checkpoint.scored += scored
+            orm_checkpoint.updated_at = now
             session.commit()
-            session.refresh(orm_result)
-            return orm_result.to_model()
+            return _checkpoint(orm_checkpoint)
+
+
+def _checkpoint(orm_checkpoint: BackfillCheckpointORM) -> BackfillCheckpoint:
+    return BackfillCheckpoint(
+        **{column.key: getattr(orm_checkpoint, column.key) for column in BackfillCheckpointORM.__table__.columns}
+    )
+
+
+def _attempt(orm_attempt: ScoringAttemptORM) -> ScoringAttempt:
+    return ScoringAttempt(
+        **{column.key: getattr(orm_attempt, column.key) for column in ScoringAttemptORM.__table__.columns}
+    )
+
+
+def _pending_query(
+    model_name: str,
+    model_version: str,
+    now: datetime,
+    languages: LanguageFilter = None,
+    newer_than: Optional[datetime] = None,
+) -> Select:
+    """Items without a result for this model that nobody holds a live lease on.
+
+    Items quarantined for this model after repeated failures are skipped.
+
+    ``languages`` is ``(include, exclude)``: only items in ``include`` (when
+    given) and none in ``exclude``. ``newer_than`` leaves older items to the
+    backfill job.
+    """
+    stmt = select(TextItemORM)
+    if newer_than is not None:
+        stmt = stmt.where(TextItemORM.ingested_at > newer_than)
+    if languages is not None:
+        include, exclude = languages
+        if include is not None:
+            stmt = stmt.where(TextItemORM.language.in_(list(include)))
+        if exclude:
+            stmt = stmt.where(TextItemORM.language.not_in(list(exclude)))
+    return (
+        stmt
+        .where(
+            ~exists()
+            .where(SentimentResultORM.text_item_id == TextItemORM.id)
+            .where(SentimentResultORM.model_name == model_name)
+            .where(SentimentResultORM.model_version == model_version)
+        )
+        .where(
+            ~exists()
+            .where(ScoringLeaseORM.text_item_id == TextItemORM.id)
+            .where(ScoringLeaseORM.model_name == model_name)
+            .where(ScoringLeaseORM.model_version == model_version)
+            .where(ScoringLeaseORM.leased_until > now)
+        )
+        .where(
+            ~exists()
+            .where(ScoringAttemptORM.text_item_id == TextItemORM.id)
+            .where(ScoringAttemptORM.model_name == model_name)
+            .where(ScoringAttemptORM.model_version == model_version)
+            .where(ScoringAttemptORM.quarantined_at.is_not(None))
+        )
+    )
+
+
+def _queue_order(stmt: Select, prioritized: bool) -> Select:
+    """Highest priority and newest first (served by ``ix_text_items_priority_ingested_at``), or plain FIFO."""
+    if prioritized:
+        return stmt.order_by(TextItemORM.priority.desc(), TextItemORM.ingested_at.desc())
+    return stmt.order_by(TextItemORM.ingested_at.asc())
+
+
+def _insert_ignore(
+    session: Session,
+    orm_class: type,
+    rows: List[dict],
+    key_columns: Sequence[str] | None = None,
+) -> None:
+    """Insert ``rows`` skipping any that collide with an existing unique key.
+
+    ``key_columns`` names the unique key checked by the generic fallback and
+    defaults to the primary key.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        session.execute(postgresql.insert(orm_class).on_conflict_do_nothing(), rows)
+    elif dialect == "sqlite":
+        session.execute(sqlite.insert(orm_class).on_conflict_do_nothing(), rows)
+    else:
+        keys = key_columns or [column.key for column in orm_class.__table__.primary_key.columns]
+        for row in rows:
+            with session.begin_nested():
+                if session.scalar(select(orm_class).filter_by(**{key: row[key] for key in keys})) is None:
+                    session.add(orm_class(**row))
+
+
+def _result_row(result: SentimentResult) -> dict:
+    orm_result = SentimentResultORM.from_model(result)
+    return {column.key: getattr(orm_result, column.key) for column in SentimentResultORM.__table__.columns}
+
+
+def _group_by_model(results: Sequence[SentimentResult]) -> Dict[Tuple[str, str], List[str]]:
+    grouped: Dict[Tuple[str, str], List[str]] = {}
+    for result in results:
+        grouped.setdefault((result.model_name, result.model_version), []).append(str(result.text_item_id))
+    return grouped
@@ -0,0 +1,441 @@
+"""Inference sidecar: one process owns the model and serves predictions over a Unix socket.
+
+Usage::
+
+    python -m sentiment_service.sidecar --socket /run/sentiment/inference.sock
+
+With ``SENTIMENT_INFERENCE_SOCKET`` set, the API's ``get_sentiment_model``
+and the worker's default route use :class:`InferenceClient` instead of
+loading their own copy of the model. Any number of uvicorn workers can then
+share one set of weights. Requests from all clients are coalesced into
+batched forward passes, bounded by ``microbatch_max_size`` and
+``microbatch_max_wait_ms``.
+
+Framing: every message is a ``!BI`` header (message type, payload length)
+followed by the payload. A predict request carries a text count, then each
+text as a length-prefixed UTF-8 string. A predictions response carries the
+``name:cache_version`` of the model that scored the batch, the label table once,
+then one record per text: a status byte, then either one float64 per label
+plus length-prefixed annotation JSON, or a length-prefixed error message.
+
+SIGHUP makes the sidecar load the model now configured in the environment
+and swap it in without dropping requests (see :mod:`.hot_swap`). Clients
+reject predictions from a model other than the one they expect, so reload
+the sidecar before its clients.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+import socket
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .batching import PaddingStats
+from .config import Settings, get_settings
+from .hot_swap import ModelSwapper
+from .model import Prediction
+from .profiling import profiler
+
+logger = logging.getLogger(__name__)
+
+PREDICT = 1
+INFO = 2
+PREDICTIONS = 3
+INFO_REPLY = 4
+ERROR = 5
+
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+_HEADER = struct.Struct("!BI")
+_U32 = struct.Struct("!I")
+_U8 = struct.Struct("!B")
+
+
+class SidecarError(RuntimeError):
+    """The sidecar rejected a request or answered with something unexpected."""
+
+
+def encode_texts(texts: Sequence[str]) -> bytes:
+    parts = [_U32.pack(len(texts))]
+    for text in texts:
+        data = (text or "").encode("utf-8")
+        parts.append(_U32.pack(len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def decode_texts(payload: bytes) -> List[str]:
+    (count,), offset = _U32.unpack_from(payload), _U32.size
+    texts = []
+    for _ in range(count):
+        (length,) = _U32.unpack_from(payload, offset)
+        offset += _U32.size
+        texts.append(payload[offset : offset + length].decode("utf-8"))
+        offset += length
+    return texts
+
+
+def encode_predictions(predictions: Sequence[Prediction], model: str = "") -> bytes:
+    labels: List[str] = []
+    for prediction in predictions:
+        for label in prediction.scores:
+            if label not in labels:
+                labels.append(label)
+    served = model.encode("utf-8")
+    parts = [_U32.pack(len(served)) + served, _U8.pack(len(labels))]
+    for label in labels:
+        data = label.encode("utf-8")
+        parts.append(_U8.pack(len(data)) + data)
+    scores = struct.Struct(f"!{len(labels)}d")
+    parts.append(_U32.pack(len(predictions)))
+    for prediction in predictions:
+        if prediction.error is None:
+            annotations = json.dumps(prediction.annotations).encode("utf-8") if prediction.annotations else b""
+            # labels a prediction lacks travel as NaN and are dropped again on decode
+            parts.append(_U8.pack(0))
+            parts.append(scores.pack(*(prediction.scores.get(label, math.nan) for label in labels)))
+            parts.append(_U32.pack(len(annotations)) + annotations)
+        else:
+            error = prediction.error.encode("utf-8")
+            parts.append(_U8.pack(1))
+            parts.append(_U32.pack(len(error)) + error)
+    return b"".join(parts)
+
+
+def served_model(settings: Settings) -> str:
+    """``name:cache_version`` of the model ``settings`` score with, named in every reply."""
+    return f"{settings.model_name}:{settings.cache_version}"
+
+
+def decode_predictions(payload: bytes) -> Tuple[str, List[Prediction]]:
+    """Return the ``name:cache_version`` of the model that scored the batch and its predictions."""
+    (served_length,) = _U32.unpack_from(payload)
+    offset = _U32.size + served_length
+    model = payload[_U32.size : offset].decode("utf-8")
+    (label_count,) = _U8.unpack_from(payload, offset)
+    offset += _U8.size
+    labels = []
+    for _ in range(label_count):
+        (length,) = _U8.unpack_from(payload, offset)
+        offset += _U8.size
+        labels.append(payload[offset : offset + length].decode("utf-8"))
+        offset += length
+    scores = struct.Struct(f"!{label_count}d")
+    (count,) = _U32.unpack_from(payload, offset)
+    offset += _U32.size
+    predictions = []
+    for _ in range(count):
+        (status,) = _U8.unpack_from(payload, offset)
+        offset += _U8.size
+        if status == 0:
+            values = scores.unpack_from(payload, offset)
+            offset += scores.size
+            (length,) = _U32.unpack_from(payload, offset)
+            offset += _U32.size
+            annotations = json.loads(payload[offset : offset + length]) if length else {}
+            offset += length
+            predictions.append(
+                Prediction(
+                    scores={label: value for label, value in zip(labels, values) if not math.isnan(value)},
+                    annotations=annotations,
+                )
+            )
+        else:
+            (length,) = _U32.unpack_from(payload, offset)
+            offset += _U32.size
+            predictions.append(Prediction(error=payload[offset : offset + length].decode("utf-8")))
+            offset += length
+    return model, predictions
+
+
+def _frame(message_type: int, payload: bytes) -> bytes:
+    return _HEADER.pack(message_type, len(payload)) + payload
+
+
+class InferenceServer:
+    """Owns one model and answers framed requests from any number of clients.
+
+    A single consumer coalesces queued requests into one ``predict_batch``
+    call, so concurrent API workers share forward passes the same way the
+    in-process micro-batcher does for concurrent requests.
+    """
+
+    def __init__(self, settings: Settings, path: Path) -> None:
+        # the sidecar shares its clients' environment; it must always load the model itself
+        self.swapper = ModelSwapper(settings, local=True)
+        self.path = Path(path)
+        self.max_batch_size = max(1, settings.microbatch_max_size)
+        self.max_wait = max(0.0, settings.microbatch_max_wait_ms) / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sidecar-predict")
+        self._queue: Optional[asyncio.Queue] = None
+        self._writers: set = set()
+        self.requests = 0
+        self.batches = 0
+        self.items = 0
+
+    @property
+    def settings(self) -> Settings:
+        return self.swapper.settings
+
+    def info(self) -> Dict[str, object]:
+        return {
+            "model_name": self.settings.model_name,
+            "model_version": self.settings.effective_model_version,
+            "cache_version": self.settings.cache_version,
+            "pid": os.getpid(),
+            "requests": self.requests,
+            "batches": self.batches,
+            "items": self.items,
+            "swap": self.swapper.status(),
+        }
+
+    def run(self) -> None:
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        from .registry import get_model
+
+        loop = asyncio.get_running_loop()
+        # the registry loads and warms the model before we bind, so clients never connect to a cold server
+        await loop.run_in_executor(self._executor, get_model, self.settings)
+        stop = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        loop.add_signal_handler(signal.SIGHUP, self.swapper.reload)
+        self._queue = asyncio.Queue()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()
+        server = await asyncio.start_unix_server(self._handle, path=str(self.path))
+        os.chmod(self.path, 0o660)
+        consumer = asyncio.create_task(self._consume(), name="sidecar-batcher")
+        logger.info("Inference sidecar serving %s on %s", self.settings.model_name, self.path)
+        try:
+            await stop.wait()
+        finally:
+            server.close()
+            # idle keep-alive connections would otherwise hold wait_closed() open
+            for writer in list(self._writers):
+                writer.close()
+            await server.wait_closed()
+            consumer.cancel()
+            self._executor.shutdown(wait=True)
+            if self.path.exists():
+                self.path.unlink()
+            logger.info("Inference sidecar stopped after %s requests in %s batches", self.requests, self.batches)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    header = await reader.readexactly(_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    return
+                message_type, length = _HEADER.unpack(header)
+                if length > MAX_FRAME_BYTES:
+                    writer.write(_frame(ERROR, b"Frame too large"))
+                    await writer.drain()
+                    return
+                payload = await reader.readexactly(length)
+                writer.write(await self._dispatch(message_type, payload))
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            return
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, message_type: int, payload: bytes) -> bytes:
+        if message_type == INFO:
+            return _frame(INFO_REPLY, json.dumps(self.info()).encode("utf-8"))
+        if message_type != PREDICT:
+            return _frame(ERROR, f"Unknown message type {message_type}".encode("utf-8"))
+        try:
+            texts = decode_texts(payload)
+        except (struct.error, UnicodeDecodeError) as exc:
+            return _frame(ERROR, f"Malformed request: {exc}".encode("utf-8"))
+        self.requests += 1
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        try:
+            model, predictions = await future
+        except Exception as exc:  # noqa: BLE001
+            return _frame(ERROR, str(exc).encode("utf-8"))
+        return _frame(PREDICTIONS, encode_predictions(predictions, model))
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+                size += len(batch[-1][0])
+            texts = [text for request, _ in batch for text in request]
+            self.batches += 1
+            self.items += len(texts)
+            settings = self.settings
+            try:
+                predictions = await loop.run_in_executor(self._executor, self._predict, settings, texts)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Sidecar batch of %s texts failed", len(texts))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            offset = 0
+            for request, future in batch:
+                if not future.done():
+                    future.set_result((served_model(settings), predictions[offset : offset + len(request)]))
+                offset += len(request)
+
+    @staticmethod
+    def _predict(settings: Settings, texts: List[str]) -> List[Prediction]:
+        from .registry import get_model
+
+        # looked up per batch: after a hot swap the next batch goes to the new model
+        return get_model(settings).predict_batch(texts)
+
+
+class InferenceClient:
+    """Drop-in for :class:`SentimentModel` that forwards scoring to the sidecar.
+
+    Each thread keeps its own connection. A dropped connection is reopened
+    once per call, which is safe because scoring is idempotent. On first
+    connect the client checks that the sidecar serves the model it was
+    configured for, down to the cache version (backend, quantization and
+    truncation length). Every reply names the model and cache version that
+    scored it, so results are never stored under the wrong version, even
+    across a sidecar hot swap.
+    Padding statistics stay in the sidecar.
+    """
+
+    def __init__(self, path: Path, model_name: str, model_version: str, cache_version: str, timeout: float = 30.0) -> None:
+        self.path = Path(path)
+        self.model_name = model_name
+        self.model_version = model_version
+        self.cache_version = cache_version
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "InferenceClient":
+        return cls(
+            settings.inference_socket,
+            settings.model_name,
+            settings.effective_model_version,
+            settings.cache_version,
+            timeout=settings.inference_timeout,
+        )
+
+    def predict(self, text: str) -> Dict[str, float]:
+        prediction = self.predict_batch([text])[0]
+        if prediction.error:
+            raise ValueError(prediction.error)
+        return prediction.scores
+
+    def predict_batch(
+        self,
+        texts: Sequence[str],
+        padding_stats: Optional[PaddingStats] = None,
+    ) -> List[Prediction]:
+        if not texts:
+            return []
+        with profiler.stage("sidecar"):
+            message_type, payload = self._call(PREDICT, encode_texts(texts))
+        if message_type != PREDICTIONS:
+            raise SidecarError(f"Unexpected sidecar reply type {message_type}")
+        served, predictions = decode_predictions(payload)
+        expected = f"{self.model_name}:{self.cache_version}"
+        if served != expected:
+            raise SidecarError(f"Sidecar at {self.path} scored with {served}, expected {expected}")
+        return predictions
+
+    def info(self) -> Dict[str, object]:
+        message_type, payload = self._call(INFO, b"")
+        if message_type != INFO_REPLY:
+            raise SidecarError(f"Unexpected sidecar reply type {message_type}")
+        return json.loads(payload)
+
+    def close(self) -> None:
+        connection = getattr(self._local, "socket", None)
+        if connection is not None:
+            connection.close()
+            self._local.socket = None
+
+    def _call(self, message_type: int, payload: bytes) -> Tuple[int, bytes]:
+        for attempt in (1, 2):
+            try:
+                connection = self._connection()
+                connection.sendall(_frame(message_type, payload))
+                reply_type, length = _HEADER.unpack(_read_exactly(connection, _HEADER.size))
+                reply = _read_exactly(connection, length)
+                break
+            except OSError:
+                self.close()
+                if attempt == 2:
+                    raise
+        if reply_type == ERROR:
+            raise SidecarError(reply.decode("utf-8", "replace"))
+        return reply_type, reply
+
+    def _connection(self) -> socket.socket:
+        connection = getattr(self._local, "socket", None)
+        if connection is None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.timeout)
+            connection.connect(str(self.path))
+            self._local.socket = connection
+            self._check_model(connection)
+        return connection
+
+    def _check_model(self, connection: socket.socket) -> None:
+        connection.sendall(_frame(INFO, b""))
+        reply_type, length = _HEADER.unpack(_read_exactly(connection, _HEADER.size))
+        served = json.loads(_read_exactly(connection, length)) if reply_type == INFO_REPLY else {}
+        if (served.get("model_name"), served.get("cache_version")) != (self.model_name, self.cache_version):
+            self.close()
+            raise SidecarError(
+                f"Sidecar at {self.path} serves {served.get('model_name')}:{served.get('cache_version')}, "
+                f"expected {self.model_name}:{self.cache_version}"
+            )
+
+
+def _read_exactly(connection: socket.socket, length: int) -> bytes:
+    chunks = []
+    while length:
+        chunk = connection.recv(min(length, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Sidecar closed the connection")
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b"".join(chunks)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", type=Path, help="socket path (defaults to SENTIMENT_INFERENCE_SOCKET)")
+    args = parser.parse_args()
+    settings = get_settings()
+    path = args.socket or settings.inference_socket
+    if path is None:
+        parser.error("--socket or SENTIMENT_INFERENCE_SOCKET is required")
+    InferenceServer(settings, path).run()
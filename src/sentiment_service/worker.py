@@ -1,73 +1,434 @@
 """Batch worker that scores TextItems with an IndoBERT model."""
 from __future__ import annotations
 
+import argparse
 import logging
-from datetime import datetime
-from typing import List
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID
 
-from ingestion_service.models import SentimentResult
+from ingestion_service.models import SentimentResult, TextItem
 
-from .config import Settings, get_settings
+from .autotune import build_controller
+from .batching import PaddingStats
+from .cache import InferenceCache, predict_with_cache
+from .config import Settings
 from .db import SessionLocal, init_db
-from .model import SentimentModel
-from .repository import SentimentRepository
+from .hot_swap import swapper
+from .leases import LeaseKeeper, make_worker_id
+from .lexicon import CascadeSplit, build_cascade, merge_settled, settle
+from .model import Prediction, SentimentModel
+from .pool import ScoringPool
+from .profiling import profiler
+from .registry import get_model, registry
+from .repository import LanguageFilter, SentimentRepository
+from .sidecar import InferenceClient
 
 logger = logging.getLogger(__name__)
 
+# a replaced scoring pool or sidecar client keeps serving batches that already hold it for this long
+_POOL_RETIRE_SECONDS = 60.0
+
+
+@dataclass
+class ScoringRoute:
+    """A model and the item languages it is responsible for.
+
+    ``languages`` of ``None`` marks the default route, which takes every
+    language not routed elsewhere (listed in ``exclude_languages``).
+
+    ``model`` binds the route to one instance: the scoring pool or sidecar
+    client of the default route, or, once a hot swap retires the route, the
+    model it was serving. Batches that captured a route before a swap so
+    finish on the old instance, which is freed with the last of them.
+    Unbound routes look their model up in the registry per batch.
+    """
+
+    settings: Settings
+    languages: Optional[List[str]] = None
+    exclude_languages: List[str] = field(default_factory=list)
+    cache: Optional[InferenceCache] = None
+    model: SentimentModel | ScoringPool | InferenceClient | None = None
+    retired: bool = False
+
+    @property
+    def model_name(self) -> str:
+        return self.settings.model_name
+
+    @property
+    def batch_size(self) -> int:
+        """Items per batch for this route's model; only the worker's claim size is autotuned."""
+        return self.settings.batch_limit
+
+    @property
+    def model_version(self) -> str:
+        return self.settings.effective_model_version
+
+    @property
+    def language_filter(self) -> LanguageFilter:
+        if self.languages is None and not self.exclude_languages:
+            return None
+        return self.languages, self.exclude_languages
+
 
 class SentimentWorker:
     def __init__(self, settings: Settings | None = None):
-        self.settings = settings or get_settings()
+        self.settings = settings or swapper.settings
+        if settings is None:
+            # a worker on the process's own configuration follows its hot swaps
+            swapper.subscribe(self.apply_settings)
         self.repository = SentimentRepository(SessionLocal)
-        self.model = SentimentModel(
-            model_name=self.settings.model_name,
-            revision=self.settings.model_revision,
-            device=self.settings.device,
-            label_mapping=self.settings.label_mapping,
-        )
-        self.model_version = (
-            self.settings.model_version
-            or self.settings.model_revision
-            or "latest"
-        )
+        self._remote = InferenceClient.from_settings(self.settings) if self.settings.inference_socket else None
+        self._pool = ScoringPool(self.settings) if self.settings.pool_processes > 1 and self._remote is None else None
+        self.routes = build_routes(self.settings, self.repository)
+        self.default_route = self.routes[0]
+        self.default_route.model = self._remote or self._pool
+        self.cascade = build_cascade(self.settings)
+        self.autotuner = build_controller(self.settings)
+        profiler.configure(self.settings)
+        self.last_padding_stats: PaddingStats | None = None
+        self.last_pending_count = 0
+        self.last_claim_limit = self.batch_size
+        self.last_run_full = False
+        self.worker_id = make_worker_id()
 
-    def run(self) -> List[SentimentResult]:
-        pending_items = self.repository.fetch_pending_items(
-            model_name=self.settings.model_name,
-            model_version=self.model_version,
-            limit=self.settings.batch_limit,
-        )
-        if not pending_items:
-            logger.info("No pending text items for model %s:%s", self.settings.model_name, self.model_version)
-            return []
-        logger.info("Scoring %s text items using %s:%s", len(pending_items), self.settings.model_name, self.model_version)
+    @property
+    def model(self) -> SentimentModel | ScoringPool | InferenceClient:
+        return self.model_for(self.default_route)
+
+    @property
+    def batch_size(self) -> int:
+        """Items claimed per batch: the autotuned size when enabled, else ``batch_limit``."""
+        return self.autotuner.batch_size if self.autotuner is not None else self.settings.batch_limit
+
+    @property
+    def model_version(self) -> str:
+        return self.default_route.model_version
+
+    @property
+    def cache(self) -> InferenceCache | None:
+        return self.default_route.cache
+
+    def model_for(self, route: ScoringRoute) -> SentimentModel | ScoringPool | InferenceClient:
+        """Model for ``route``: its bound instance, else the registry's so idle ones can be unloaded.
+
+        The default route is bound to the inference sidecar or the scoring
+        pool when one is configured.
+        """
+        if route.model is not None:
+            return route.model
+        if route.retired:
+            # retired before its model was ever loaded: load a private copy that goes away with the route
+            logger.warning("Loading retired model %s:%s for an in-flight batch", route.model_name, route.model_version)
+            route.model = registry.load(route.settings)
+            return route.model
+        return get_model(route.settings)
+
+    def route_for(self, language: str | None) -> ScoringRoute:
+        for route in self.routes[1:]:
+            if (language or "").lower() in route.languages:
+                return route
+        return self.default_route
+
+    def apply_settings(self, settings: Settings) -> None:
+        """Switch to ``settings`` after a hot swap.
+
+        Routes, caches and any pool or sidecar client are rebuilt before the
+        switch. Batches already holding the old ones finish on them.
+        """
+        remote = InferenceClient.from_settings(settings) if settings.inference_socket else None
+        pool = None
+        if remote is None and settings.pool_processes > 1:
+            pool = ScoringPool(settings)
+            # one text per process makes every child load its model before traffic arrives
+            pool.predict_batch(["warm up"] * pool.processes)
+        routes = build_routes(settings, self.repository)
+        routes[0].model = remote or pool
+        for old_route in self.routes:
+            # pin the instance now: the swap discards the old model from the registry right after this
+            old_route.model = old_route.model or registry.peek(old_route.settings)
+            old_route.retired = True
+        retired = [old for old in (self._pool, self._remote) if old is not None]
+        self.settings, self._remote, self._pool = settings, remote, pool
+        self.routes, self.default_route = routes, routes[0]
+        for old in retired:
+            threading.Timer(_POOL_RETIRE_SECONDS, old.close).start()
+
+    def run(self, limit: int | None = None) -> List[SentimentResult]:
+        registry.evict_idle(self.settings.model_idle_seconds)
+        run_profile = profiler.start_run("run")
+        try:
+            return self._run_routes(limit)
+        finally:
+            profiler.finish_run(run_profile)
+
+    def _run_routes(self, limit: int | None) -> List[SentimentResult]:
         stored_results: List[SentimentResult] = []
-        for item in pending_items:
-            try:
-                scores = self.model.predict(item.body)
-            except ValueError as exc:
-                logger.warning("Skipping item %s: %s", item.id, exc)
+        claimed = 0
+        full = False
+        for route in self.routes:
+            pending_items = self.claim(limit, route)
+            claimed = max(claimed, len(pending_items))
+            full = full or len(pending_items) >= self.last_claim_limit
+            if not pending_items:
+                logger.info("No pending text items for model %s:%s", route.model_name, route.model_version)
                 continue
-            if not scores:
-                logger.warning("No scores returned for item %s", item.id)
+            logger.info("Scoring %s text items using %s:%s", len(pending_items), route.model_name, route.model_version)
+            route_results: List[SentimentResult] = []
+            try:
+                with self.lease_keeper(pending_items, route):
+                    route_results = self._score_items(pending_items, route)
+            finally:
+                self.release_unstored(pending_items, route_results, route)
+            stored_results.extend(route_results)
+        self.last_pending_count = claimed
+        self.last_run_full = full
+        return stored_results
+
+    def claim(self, limit: int | None = None, route: ScoringRoute | None = None) -> List[TextItem]:
+        route = route or self.default_route
+        # while a backfill rescoring history is running, live workers only take newer items
+        stale_before = None
+        if self.settings.backfill_stale_seconds:
+            stale_before = datetime.utcnow() - timedelta(seconds=self.settings.backfill_stale_seconds)
+        cutoff = self.repository.active_backfill_cutoff(self.settings.model_name, self.model_version, stale_before)
+        aged_before = None
+        if self.settings.priority_max_wait_seconds:
+            aged_before = datetime.utcnow() - timedelta(seconds=self.settings.priority_max_wait_seconds)
+        with profiler.stage("claim"):
+            pending_items = self.repository.claim_pending_items(
+                model_name=route.model_name,
+                model_version=route.model_version,
+                limit=limit or self.batch_size,
+                worker_id=self.worker_id,
+                lease_seconds=self.settings.lease_seconds,
+                languages=route.language_filter,
+                newer_than=cutoff,
+                prioritized=self.settings.priority_scheduling,
+                aged_before=aged_before,
+                aged_share=self.settings.priority_aged_share,
+            )
+        self.last_pending_count = len(pending_items)
+        self.last_claim_limit = limit or self.batch_size
+        return pending_items
+
+    def lease_keeper(self, items: List[TextItem], route: ScoringRoute | None = None) -> LeaseKeeper:
+        route = route or self.default_route
+        return LeaseKeeper(
+            self.repository,
+            [item.id for item in items],
+            route.model_name,
+            route.model_version,
+            self.worker_id,
+            self.settings.lease_seconds,
+        )
+
+    def release_unstored(
+        self,
+        items: List[TextItem],
+        stored_results: List[SentimentResult],
+        route: ScoringRoute | None = None,
+    ) -> None:
+        """Hand back whatever was not written so other workers can retry it."""
+        route = route or self.default_route
+        stored_ids = {str(result.text_item_id) for result in stored_results}
+        self.repository.release_leases(
+            [str(item.id) for item in items if str(item.id) not in stored_ids],
+            route.model_name,
+            route.model_version,
+            self.worker_id,
+        )
+
+    def store_predictions(
+        self,
+        items: List[TextItem],
+        predictions: List[Prediction],
+        route: ScoringRoute | None = None,
+    ) -> List[SentimentResult]:
+        route = route or self.default_route
+        results: List[SentimentResult] = []
+        errors: Dict[str, str] = {}
+        for item, prediction in zip(items, predictions):
+            if not prediction.ok:
+                errors[str(item.id)] = prediction.error or "no scores returned"
+                logger.warning("Skipping item %s: %s", item.id, errors[str(item.id)])
                 continue
-            label, score = _top_label(scores)
-            result = SentimentResult(
-                text_item_id=item.id,
-                model_name=self.settings.model_name,
-                model_version=self.model_version,
-                pipeline_stage=self.settings.pipeline_stage,
-                scored_at=datetime.utcnow(),
-                label=label,
-                score=score,
-                scores_by_label=scores,
+            stage = "lexicon" if prediction.annotations.get("cascade_stage") == "lexicon" else None
+            results.append(
+                self.build_result(item.id, prediction.scores, prediction.annotations, pipeline_stage=stage, route=route)
+            )
+        with profiler.stage("write"):
+            stored_results = self.repository.save_results(results)
+        profiler.record_items(len(items), len(stored_results))
+        if len(stored_results) < len(results):
+            logger.info("%s items already had a result for this model", len(results) - len(stored_results))
+        self.record_failures(errors, route)
+        return stored_results
+
+    def record_failures(self, errors: Dict[str, str], route: ScoringRoute | None = None) -> None:
+        """Count failed items towards their retry limit so poison items stop taking batch slots."""
+        route = route or self.default_route
+        quarantined = self.repository.record_failures(
+            errors, route.model_name, route.model_version, self.settings.max_scoring_attempts
+        )
+        if quarantined:
+            logger.warning(
+                "Quarantined %s items after %s failed attempts with %s:%s: %s",
+                len(quarantined),
+                self.settings.max_scoring_attempts,
+                route.model_name,
+                route.model_version,
+                ", ".join(quarantined),
             )
-            stored = self.repository.save_result(result)
-            stored_results.append(stored)
-            logger.debug("Stored sentiment for text_item_id=%s label=%s", item.id, label)
+
+    def _score_items(self, pending_items: List[TextItem], route: ScoringRoute) -> List[SentimentResult]:
+        padding_stats = PaddingStats()
+        started = time.perf_counter()
+        predictions = self.predict_items(pending_items, padding_stats=padding_stats, route=route)
+        self.observe_batch(len(pending_items), padding_stats.real_tokens, time.perf_counter() - started)
+        stored_results = self.store_predictions(pending_items, predictions, route)
         logger.info("Sentiment scoring complete. Stored %s results", len(stored_results))
+        self.log_run_stats(padding_stats, route)
         return stored_results
 
+    def predict_items(
+        self,
+        items: List[TextItem],
+        padding_stats: PaddingStats | None = None,
+        route: ScoringRoute | None = None,
+    ) -> List[Prediction]:
+        """Score ``items`` through the lexicon cascade (when enabled), the cache and the model."""
+        route = route or self.default_route
+        texts = [item.body for item in items]
+        pending = self.settle(texts, items)
+        scored = predict_with_cache(
+            self.model_for(route),
+            pending.texts(texts),
+            route.cache,
+            padding_stats=padding_stats,
+        )
+        if self.cascade is not None:
+            logger.info("Lexicon cascade settled %s of %s items", len(items) - len(pending.remaining), len(items))
+        return merge_settled(pending, scored)
+
+    def settle(self, texts: List[str], items: List[TextItem]) -> CascadeSplit:
+        if self.cascade is None:
+            return settle(None, texts, [])
+        with profiler.stage("lexicon"):
+            return settle(self.cascade, texts, [item.language for item in items])
+
+    def observe_batch(self, items: int, tokens: int, seconds: float, batch_size: int | None = None) -> None:
+        """Feed one batch's compute time to the batch-size controller, if enabled."""
+        if self.autotuner is not None:
+            self.autotuner.observe(items, tokens, seconds, batch_size=batch_size or self.last_claim_limit)
+
+    def log_run_stats(self, padding_stats: PaddingStats, route: ScoringRoute | None = None) -> None:
+        route = route or self.default_route
+        logger.info(
+            "Padding efficiency %.1f%% over %s batches (unbucketed %.1f%%, %s padded tokens saved)",
+            padding_stats.efficiency * 100,
+            padding_stats.batches,
+            padding_stats.naive_efficiency * 100,
+            padding_stats.naive_padded_tokens - padding_stats.padded_tokens,
+        )
+        if route.cache is not None:
+            logger.info("Inference cache: %s", route.cache.stats())
+        self.last_padding_stats = padding_stats
+
+    def run_forever(self, stop: threading.Event | None = None) -> None:
+        """Keep the model resident and poll for work until ``stop`` is set.
+
+        A full batch is followed immediately by the next one; a run that
+        stores nothing doubles the poll interval up to ``poll_interval_max``.
+        """
+        stop = stop or threading.Event()
+        interval = self.settings.poll_interval_min
+        logger.info("Sentiment worker running in daemon mode")
+        while not stop.is_set():
+            try:
+                stored = len(self.run())
+            except Exception:  # noqa: BLE001
+                logger.exception("Sentiment run failed; retrying after backoff")
+                stored = 0
+            if stored and self.last_run_full:
+                continue
+            if stored:
+                interval = self.settings.poll_interval_min
+            else:
+                interval = min(interval * 2, self.settings.poll_interval_max)
+            logger.debug("Sleeping %.1fs before next poll", interval)
+            stop.wait(interval)
+        logger.info("Sentiment worker stopped")
+
+    def close(self) -> None:
+        if self._remote is not None:
+            self._remote.close()
+        if self._pool is not None:
+            self._pool.close()
+
+    def build_result(
+        self,
+        text_item_id: UUID,
+        scores: Dict[str, float],
+        annotations: Dict[str, object] | None = None,
+        pipeline_stage: str | None = None,
+        route: ScoringRoute | None = None,
+    ) -> SentimentResult:
+        route = route or self.default_route
+        label, score = _top_label(scores)
+        return SentimentResult(
+            text_item_id=text_item_id,
+            model_name=route.model_name,
+            model_version=route.model_version,
+            pipeline_stage=pipeline_stage or self.settings.pipeline_stage,
+            scored_at=datetime.utcnow(),
+            label=label,
+            score=score,
+            scores_by_label=scores,
+            annotations=annotations or None,
+        )
+
+
+def build_routes(settings: Settings, repository: SentimentRepository) -> List[ScoringRoute]:
+    """Default route first, then one route per distinct model in ``model_routes``."""
+    languages_by_model: Dict[str, List[str]] = {}
+    for language, model in settings.model_routes.items():
+        languages_by_model.setdefault(model, []).append(language.lower())
+    routed = [language for languages in languages_by_model.values() for language in languages]
+    routes = [
+        ScoringRoute(
+            settings=settings,
+            exclude_languages=routed,
+            cache=build_inference_cache(settings, repository),
+        )
+    ]
+    for model, languages in languages_by_model.items():
+        route_settings = settings.for_route(model)
+        routes.append(
+            ScoringRoute(
+                settings=route_settings,
+                languages=languages,
+                cache=build_inference_cache(route_settings, repository),
+            )
+        )
+    return routes
+
+
+def build_inference_cache(settings: Settings, repository: SentimentRepository) -> InferenceCache | None:
+    if not settings.cache_enabled:
+        return None
+    return InferenceCache(
+        model_name=settings.model_name,
+        model_version=settings.cache_version,
+        max_entries=settings.cache_max_entries,
+        repository=repository if settings.cache_persistent else None,
+        base_version=settings.effective_model_version,
+    )
+
 
 def _top_label(scores_by_label: dict[str, float]) -> tuple[str, float]:
     label = max(scores_by_label, key=scores_by_label.get)
@@ -76,6 +437,26 @@ def _top_label(scores_by_label: dict[str, float]) -> tuple[str, float]:
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Score pending text items.")
+    parser.add_argument("--daemon", action="store_true", help="keep the model loaded and poll for new items")
+    parser.add_argument("--pipelined", action="store_true", help="overlap claiming, tokenization, inference and writes")
+    args = parser.parse_args()
     init_db()
     worker = SentimentWorker()
-    worker.run()
+    try:
+        stop_event = threading.Event()
+        if args.daemon:
+            signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+            signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+            # SIGHUP: load the model configured in the environment/.env now and swap it in
+            signal.signal(signal.SIGHUP, lambda *_: threading.Thread(target=swapper.reload, daemon=True).start())
+        if args.pipelined or worker.settings.pipelined:
+            from .pipeline import ScoringPipeline
+
+            ScoringPipeline(worker).run(stop_event, until_empty=not args.daemon)
+        elif args.daemon:
+            worker.run_forever(stop_event)
+        else:
+            worker.run()
+    finally:
+        worker.close()